@@ -169,9 +169,13 @@ const DATE_FIELDS = [
   "plant_date",
 ];
 
+/**
+ * Tree fields as FormData. A chosen document file and new images are not
+ * included: they go up afterwards as resumable uploads (treeService.uploadDocument
+ * / uploadImage) once the tree exists.
+ */
 export const buildTreeFormData = (
   form: TreeFormState,
-  imageFiles: File[],
   strains: Strain[] = []
 ): FormData => {
   const formData = new FormData();
@@ -184,11 +188,9 @@ export const buildTreeFormData = (
     } else if (key === "batch_id") {
       formData.append("batch_id", value === null || value === "" ? "" : String(value));
     } else if (key === "document") {
-      // Document is handled separately with image files
+      // A new file is uploaded separately
       if (value === null) {
         formData.append("document", "");
-      } else if (value instanceof File) {
-        formData.append("document", value);
       }
     } else if (NUMBER_FIELDS.includes(key)) {
       formData.append(key, value === null || value === "" ? "" : String(value));
@@ -199,11 +201,6 @@ export const buildTreeFormData = (
     }
   }
 
-  // Append image files
-  imageFiles.forEach((file) => {
-    formData.append("uploaded_images", file);
-  });
-
   return formData;
 };
 
@@ -3,7 +3,7 @@
 import React, { useState } from "react";
 import { Button, Toast, ToastToggle } from "flowbite-react";
 import { HiPlus, HiCheckCircle, HiXCircle } from "react-icons/hi";
-import { Tree } from "./types";
+import { TreeListItem } from "./types";
 import { calcAge } from "./utils";
 import { TreeCard, TreeCardSkeleton } from "../components/TreeCard";
 import { QRCodeModal } from "../components/QRCodeModal";
@@ -25,7 +25,7 @@ export default function Dashboard() {
   const router = useRouter();
 
   // Data Hook
-  const { trees, strains, batches, loading, refreshTrees, error: dataError } = useTreeData();
+  const { trees, strains, batches, stats, loading, refreshTrees, error: dataError } = useTreeData();
   
   // UI State for Modals & Messages
   const [successMessage, setSuccessMessage] = useState("");
@@ -34,7 +34,7 @@ export default function Dashboard() {
   const [showFormModal, setShowFormModal] = useState(false);
   const [showDeleteModal, setShowDeleteModal] = useState(false);
   const [showQRModal, setShowQRModal] = useState(false);
-  const [selectedTree, setSelectedTree] = useState<Tree | null>(null);
+  const [selectedTree, setSelectedTree] = useState<TreeListItem | null>(null);
   
   const [showImageModal, setShowImageModal] = useState(false);
   const [viewingImages, setViewingImages] = useState<string[]>([]);
@@ -88,18 +88,24 @@ export default function Dashboard() {
     setShowFormModal(true);
   };
 
-  const handleEdit = (tree: Tree) => {
+  const handleEdit = async (tree: TreeListItem) => {
     resetForm();
     setSelectedTree(tree);
-    setFormForEdit(tree);
-    setShowFormModal(true);
+    try {
+      // List rows are compact; the form needs every field
+      setFormForEdit(await treeService.getTree(tree.id));
+      setShowFormModal(true);
+    } catch (err: any) {
+      setErrorMessage(err.message || "โหลดข้อมูลต้นไม้ไม่สำเร็จ");
+      setTimeout(() => setErrorMessage(""), TOAST_DURATION);
+    }
   };
 
-  const handleView = (tree: Tree) => {
+  const handleView = (tree: TreeListItem) => {
     router.push(`/tree/${tree.id}`);
   };
 
-  const handleDeleteClick = (tree: Tree) => {
+  const handleDeleteClick = (tree: TreeListItem) => {
     setSelectedTree(tree);
     setShowDeleteModal(true);
   };
@@ -124,7 +130,7 @@ export default function Dashboard() {
       }, TOAST_DURATION);
     };
 
-  const handleShowQR = (tree: Tree) => {
+  const handleShowQR = (tree: TreeListItem) => {
     setSelectedTree(tree);
     setShowQRModal(true);
   };
@@ -215,10 +221,10 @@ export default function Dashboard() {
         </div>
 
         {/* Dashboard Stats */}
-        <DashboardStats trees={trees} />
+        <DashboardStats stats={stats} />
         
         {/* Yield Analytics (Pro Feature) */}
-        <YieldAnalytics trees={trees} />
+        <YieldAnalytics stats={stats} />
 
         {/* Filter Bar */}
         <div className="mb-6 sticky top-4 z-20 backdrop-blur-md bg-surface/80 dark:bg-surface-dark/80 p-2 rounded-xl shadow-sm border border-gray-100 dark:border-gray-800">
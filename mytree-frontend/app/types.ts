@@ -22,6 +22,9 @@ interface TimestampedEntity extends BaseEntity {
 // Media Types
 // =============================================================================
 
+/** Encodings the backend produces renditions in */
+export type ImageFormat = 'avif' | 'webp';
+
 /**
  * Image attachment with thumbnail support
  */
@@ -29,10 +32,21 @@ export interface Image {
   id: number;
   /** Full-size image URL */
   image: string;
-  /** Thumbnail URL for previews */
-  thumbnail: string;
+  /** Thumbnail URL for previews (null until the background worker has made it) */
+  thumbnail: string | null;
+  /** Background thumbnail generation state */
+  thumbnail_status?: 'pending' | 'processing' | 'ready' | 'failed';
+  /** Original pixel size (null until processed) */
+  width?: number | null;
+  height?: number | null;
+  /** Resized copies keyed by width (px) then format, e.g. renditions["400"].webp */
+  renditions?: Record<string, Partial<Record<ImageFormat, string>>>;
+  /** Ready-made srcset strings per format, ending with the original */
+  srcset?: Partial<Record<ImageFormat, string>>;
   /** ISO date string of upload time */
   uploaded_at: string;
+  /** ISO date string of the last change (including thumbnail processing) */
+  updated_at?: string;
   /** Whether this is the cover/primary image */
   is_cover?: boolean;
 }
@@ -48,6 +62,7 @@ export interface Strain {
   id: number;
   name: string;
   description: string;
+  updated_at?: string;
 }
 
 /**
@@ -59,6 +74,7 @@ export interface Batch {
   description: string;
   /** ISO date string for batch start */
   started_date: string;
+  updated_at?: string;
 }
 
 /**
@@ -270,15 +286,360 @@ export interface Tree extends TimestampedEntity, TreeLineage, PollinationData, H
 // Utility Types
 // =============================================================================
 
+/**
+ * Server-side filters for `/api/trees/`.
+ * List values are sent comma-separated and match any of the values.
+ */
+export interface TreeQuery {
+  /** Free text over nickname, variety, phenotype and notes */
+  search?: string;
+  /** Comma-separated sort keys, prefix `-` for descending (e.g. `strain_name,-plant_date`) */
+  ordering?: string;
+  strain?: number[];
+  batch?: number[];
+  status?: string[];
+  sex?: string[];
+  growth_stage?: string[];
+  plant_date_after?: string;
+  plant_date_before?: string;
+  harvest_date_after?: string;
+  harvest_date_before?: string;
+  parent_male?: number[];
+  parent_female?: number[];
+  clone_source?: number[];
+  pollinated_by?: number[];
+  /** Sparse fieldsets: only these fields (any `Tree` field) */
+  fields?: (keyof Tree)[];
+  /** Fields to leave out */
+  omit?: (keyof Tree)[];
+  /** Full nested forms instead of the list summaries */
+  expand?: ('strain' | 'batch' | 'images' | 'latest_log')[];
+}
+
+/**
+ * Ranked tree hit from `/api/search/`
+ */
+export interface TreeSearchHit {
+  id: number;
+  nickname: string;
+  variety: string;
+  strain_name: string;
+  status: string;
+  growth_stage: string;
+  rank: number;
+}
+
+/**
+ * Ranked journal entry hit from `/api/search/`
+ */
+export interface TreeLogSearchHit {
+  id: number;
+  tree: number;
+  tree_nickname: string;
+  action_date: string;
+  action_type: LogActionType;
+  title: string;
+  rank: number;
+}
+
+/**
+ * Response of `/api/search/`
+ */
+export interface SearchResults {
+  query: string;
+  trees: TreeSearchHit[];
+  logs: TreeLogSearchHit[];
+}
+
+/** FK on the child tree that links it to its parent in a lineage edge */
+export type LineageRelation = 'parent_male' | 'parent_female' | 'clone_source' | 'pollinated_by';
+
+/**
+ * Ancestor (`up`) or descendant (`down`) graph from `/api/trees/<id>/lineage/`
+ */
+export interface Lineage {
+  root: number;
+  direction: 'up' | 'down';
+  depth: number;
+  nodes: {
+    id: number;
+    nickname: string;
+    variety: string;
+    strain_name: string;
+    sex: string;
+    status: string;
+    growth_stage: string;
+    plant_date: string | null;
+    /** Generations from the root (0 = root) */
+    depth: number;
+  }[];
+  /** Always parent -> child */
+  edges: { source: number; target: number; relation: LineageRelation }[];
+}
+
+/** `?bucket=` of `/api/trees/<id>/environment/`; `raw` is LTTB-downsampled readings */
+export type EnvironmentBucket = '1h' | '1d' | '1w' | 'raw';
+
+export type EnvironmentMetric = 'ph' | 'ec' | 'temp' | 'humidity';
+
+/** One time bucket of an environment series */
+export interface EnvironmentBucketPoint {
+  /** Bucket start (ISO 8601) */
+  t: string;
+  min: number;
+  max: number;
+  avg: number;
+  count: number;
+}
+
+/** One raw reading kept by the downsampling */
+export interface EnvironmentRawPoint {
+  t: string;
+  value: number;
+}
+
+/**
+ * `/api/trees/<id>/environment/`: sensor readings (tree + probes at its location) and journal values
+ */
+export interface EnvironmentHistory {
+  tree: number;
+  /** Bucket actually used (picked server-side when not requested); null when there is no data */
+  bucket: EnvironmentBucket | null;
+  from: string | null;
+  to: string;
+  series: Record<EnvironmentMetric, (EnvironmentBucketPoint | EnvironmentRawPoint)[]>;
+}
+
+/**
+ * `POST /api/pedigree/kinship/`: inbreeding per tree and pairwise kinship (same order as `trees`)
+ */
+export interface KinshipResult {
+  trees: number[];
+  inbreeding: number[];
+  kinship: number[][];
+}
+
+/** One row of `POST /api/pedigree/crosses/` */
+export interface CrossEvaluation {
+  male: number;
+  female: number;
+  /** Expected inbreeding coefficient of the offspring (= parents' kinship) */
+  offspring_inbreeding: number;
+}
+
+/** Tree row from `/api/sync/`: related rows are IDs, synced in their own lists */
+export type SyncTree = Omit<Tree, 'strain' | 'batch' | 'images' | 'latest_log' | 'parent_male_data' | 'parent_female_data'> & {
+  strain: number;
+  batch: number | null;
+  images: number[];
+};
+
+/** Log row from `/api/sync/` (images are linked from the image side through `log`) */
+export type SyncTreeLog = Omit<TreeLog, 'images'> & { updated_at: string };
+
+/** Image row from `/api/sync/` (`tree` / `log` are the owning rows) */
+export type SyncImage = Image & { tree: number | null; log: number | null };
+
+/** Row lists exchanged with `/api/sync/` */
+export interface SyncRows {
+  strains: Strain[];
+  batches: Batch[];
+  images: SyncImage[];
+  trees: SyncTree[];
+  logs: SyncTreeLog[];
+}
+
+export type SyncType = keyof SyncRows;
+
+/**
+ * `GET /api/sync/?since=<token>`: rows changed and IDs deleted since `token`.
+ * Apply rows by ID, then deletions. With `reset` the lists are a full snapshot
+ * that replaces the local copy. Pass `token` as `since` next time.
+ */
+export interface SyncChanges extends SyncRows {
+  token: string;
+  reset: boolean;
+  deleted: Record<SyncType, number[]>;
+}
+
+/**
+ * A queued offline edit for `POST /api/sync/`. With `id` it updates that row (only
+ * the fields sent; add the `updated_at` last seen to fail on concurrent edits);
+ * without, it creates one and later rows may use its `client_id` as a reference.
+ */
+export type SyncUpsert = Record<string, unknown> & { id?: number; client_id?: string; updated_at?: string };
+
+/** Response of `POST /api/sync/` */
+export interface SyncReport {
+  saved: { type: SyncType; index: number; client_id?: string | null; id: number; row: Record<string, unknown> }[];
+  /** Rows changed or deleted (`current: null`) on the server since the client saw them */
+  conflicts: { type: SyncType; index: number; id: number; current: Record<string, unknown> | null }[];
+  errors: { type: SyncType; index: number; client_id?: string | null; errors: Record<string, string[]> }[];
+}
+
+/** Row types announced by `/api/events/` */
+export type LiveEventType = 'tree' | 'log' | 'image';
+
+/** A change pushed by `/api/events/` once it is committed */
+export interface LiveEvent {
+  type: LiveEventType;
+  action: 'saved' | 'deleted';
+  /** IDs of the changed rows */
+  ids: number[];
+  /** Trees whose data changed with them (e.g. the owner of a new log) */
+  trees: number[];
+}
+
+/** An unfinished resumable upload (`/api/uploads/`) */
+export interface Upload {
+  id: string;
+  kind: 'image' | 'document';
+  tree: number | null;
+  log: number | null;
+  filename: string;
+  size: number;
+  /** Bytes received so far: the next chunk starts here */
+  offset: number;
+  sha256: string;
+  created_at: string;
+  updated_at: string;
+}
+
+/** Bytes sent / total, reported while an upload runs */
+export type UploadProgress = (sent: number, total: number) => void;
+
+/** Sheets of the spreadsheet template (scripts/make_excel_template.py), used by import and export */
+export type SpreadsheetSheet = 'Strains' | 'Batches' | 'Images' | 'Trees' | 'TreeImages' | 'TreeLogs';
+
+/** A row that `POST /api/import/` skipped or only partly imported */
+export interface ImportRowError {
+  sheet: SpreadsheetSheet;
+  /** Row number in the sheet, counting the header as row 1 */
+  row: number;
+  column: string;
+  error: string;
+}
+
+/** Response of `POST /api/import/` */
+export interface ImportReport {
+  dry_run: boolean;
+  /** Per sheet: rows inserted, rows updated by ID, rows matched to an existing strain/batch/link, rows skipped */
+  sheets: Partial<Record<SpreadsheetSheet, { created: number; updated: number; matched: number; skipped: number }>>;
+  error_count: number;
+  /** First 1000 errors; `error_count` has the total */
+  errors: ImportRowError[];
+}
+
+/** One GROUP BY bucket of `/api/stats/` */
+export interface StatsBucket {
+  count: number;
+  yield_total?: number | null;
+  yield_avg?: number | null;
+  yield_trees?: number;
+}
+
+/**
+ * Dashboard aggregates from `/api/stats/` (computed and cached server-side).
+ * Yield per tree is `yield_amount`, falling back to the summed dry weight of its logs.
+ */
+export interface TreeStats {
+  total: number;
+  active: number;
+  flowering: number;
+  harvested: number;
+  by_status: (StatsBucket & { status: string })[];
+  by_sex: (StatsBucket & { sex: string })[];
+  by_growth_stage: (StatsBucket & { growth_stage: string })[];
+  by_strain: (StatsBucket & { strain_id: number; strain_name: string })[];
+  by_batch: (StatsBucket & { batch_id: number | null; batch_code: string | null })[];
+  yield: {
+    total: number;
+    average: number | null;
+    trees: number;
+    best_strain: { strain_id: number; strain_name: string; yield_avg: number } | null;
+    /** From Tree.yield_amount only */
+    recorded: { total: number; average: number | null; trees: number };
+    /** Summed TreeLog wet/dry weights */
+    logged: { wet_total: number; dry_total: number; trees: number };
+  };
+}
+
+/**
+ * Background file removal after a bulk delete (`/api/deletion-jobs/<id>/`)
+ */
+export interface DeletionJob {
+  id: number;
+  status: 'pending' | 'running' | 'done' | 'failed';
+  trees_deleted: number;
+  images_deleted: number;
+  files_total: number;
+  files_removed: number;
+  files_failed: number;
+  /** 0-100 */
+  progress: number;
+  created_at: string;
+  finished_at: string | null;
+}
+
+/**
+ * Response of `POST /api/trees/bulk_delete/` (rows are already gone; files follow in `job`)
+ */
+export interface BulkDeleteResult {
+  message: string;
+  job: DeletionJob;
+}
+
+/**
+ * `POST /api/logs/bulk/`: one entry for many trees, chosen by exactly one of
+ * `trees`, `batch_id` or `filter` (the `/api/trees/` filters)
+ */
+export type BulkLogInput = Pick<TreeLog, 'action_type'> & Partial<Pick<TreeLog, 'action_date' | 'title' | 'notes' | 'ph' | 'ec' | 'temp' | 'humidity'>> & (
+  | { trees: number[] }
+  | { batch_id: number }
+  | { filter: Partial<Record<'strain' | 'batch' | 'status' | 'sex' | 'growth_stage' | 'plant_date_after' | 'plant_date_before', string | number | (string | number)[]>> }
+) & {
+  /** One photo shared by every new log (stored once) */
+  image?: File;
+};
+
+/** Response of `POST /api/logs/bulk/` */
+export interface BulkLogResult {
+  message: string;
+  count: number;
+  /** New log IDs, in the order of `trees` */
+  logs: number[];
+  trees: number[];
+  /** Image rows created for the shared photo (empty without one) */
+  images: number[];
+}
+
+/**
+ * Cursor-paginated list response (`/api/trees/`, `/api/logs/`)
+ */
+export interface CursorPage<T> {
+  /** Absolute URL of the next page, or null on the last page */
+  next: string | null;
+  /** Absolute URL of the previous page, or null on the first page */
+  previous: string | null;
+  /** Items on this page */
+  results: T[];
+}
+
 /**
  * Tree creation/update payload (without server-generated fields)
  */
 export type TreeInput = Omit<Tree, 'id' | 'created_at' | 'updated_at' | 'images' | 'latest_log' | 'parent_male_data' | 'parent_female_data'>;
 
 /**
- * Tree list item (minimal data for grids/lists)
+ * Tree list item: the compact row `/api/trees/` returns by default
+ * (what grids and tables show). A full `Tree` fits wherever one is expected.
  */
-export type TreeListItem = Pick<Tree, 'id' | 'nickname' | 'strain' | 'status' | 'sex' | 'plant_date' | 'location' | 'images' | 'growth_stage'>;
+export interface TreeListItem extends Pick<Tree,
+  'id' | 'nickname' | 'variety' | 'status' | 'sex' | 'plant_date' | 'location' | 'growth_stage' | 'created_at' | 'updated_at' | 'code'
+> {
+  strain: Pick<Strain, 'id' | 'name'> | null;
+  images: Pick<Image, 'id' | 'image' | 'thumbnail'>[];
+}
 
 /**
  * Log creation payload
@@ -1,4 +1,4 @@
-import { Tree } from "./types";
+import { Image, ImageFormat, TreeListItem } from "./types";
 
 export function getSecureImageUrl(url: string | null | undefined): string {
   if (!url) return "";
@@ -8,7 +8,18 @@ export function getSecureImageUrl(url: string | null | undefined): string {
   return url;
 }
 
-export function calcAge(tree: Tree, unit: "day" | "month" | "year") {
+/**
+ * URL of the smallest rendition at least `minWidth` px wide, falling back to the
+ * original when none is wide enough (or the image has not been processed yet).
+ */
+export function getRenditionUrl(img: Image, minWidth: number, format: ImageFormat = "webp"): string {
+  const widths = Object.keys(img.renditions ?? {}).map(Number).sort((a, b) => a - b);
+  const width = widths.find((w) => w >= minWidth);
+  const url = width !== undefined ? img.renditions?.[String(width)]?.[format] : undefined;
+  return getSecureImageUrl(url || img.image);
+}
+
+export function calcAge(tree: TreeListItem, unit: "day" | "month" | "year") {
   if (!tree.plant_date) return "-";
   const plant = new Date(tree.plant_date);
   if (isNaN(plant.getTime())) return "-";
@@ -26,7 +37,7 @@ export function calcAge(tree: Tree, unit: "day" | "month" | "year") {
 }
 
 export function getSortValue(
-  tree: Tree,
+  tree: TreeListItem,
   key: "strain" | "nickname" | "plant_date" | "variety" | "sex" | "status"
 ) {
   if (key === "strain") return tree.strain?.name?.toLowerCase() || "";
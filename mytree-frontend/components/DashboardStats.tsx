@@ -1,10 +1,10 @@
 import React from 'react';
-import { Tree } from '../app/types';
+import { TreeStats } from '../app/types';
 import { HiCollection, HiLightningBolt, HiSun, HiArchive } from 'react-icons/hi';
-import { isTreeActive, isTreeHarvested, isFlowering, TREE_STATUS } from '../constants/treeStatus';
 
 interface DashboardStatsProps {
-  trees: Tree[];
+  /** Server-side aggregates from /api/stats/ (null while loading) */
+  stats: TreeStats | null;
 }
 
 /** Individual stat card configuration */
@@ -20,16 +20,12 @@ interface StatItem {
  * DashboardStats - Displays tree statistics in a Bento Grid layout
  * Uses Claymorphism styling with gradient icon backgrounds
  */
-export const DashboardStats: React.FC<DashboardStatsProps> = ({ trees }) => {
-  const total = trees.length;
-
-  const flowering = trees.filter(
-    (t) => t.status === TREE_STATUS.GROWING && isFlowering(t.growth_stage)
-  ).length;
-
-  const harvested = trees.filter((t) => isTreeHarvested(t.status)).length;
-
-  const active = trees.filter((t) => isTreeActive(t.status)).length;
+export const DashboardStats: React.FC<DashboardStatsProps> = ({ stats }) => {
+  // Status rules live server-side in trees/stats.py (mirroring constants/treeStatus.ts)
+  const total = stats?.total ?? 0;
+  const flowering = stats?.flowering ?? 0;
+  const harvested = stats?.harvested ?? 0;
+  const active = stats?.active ?? 0;
 
   const stats: StatItem[] = [
     {
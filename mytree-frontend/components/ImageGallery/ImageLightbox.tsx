@@ -2,7 +2,7 @@ import React, { useEffect } from 'react';
 import Image from 'next/image';
 import { HiX, HiChevronLeft, HiChevronRight } from 'react-icons/hi';
 import { Image as TreeImage } from '../../app/types';
-import { getSecureImageUrl } from '../../app/utils';
+import { getRenditionUrl } from '../../app/utils';
 
 interface ImageLightboxProps {
   isOpen: boolean;
@@ -84,7 +84,7 @@ export const ImageLightbox: React.FC<ImageLightboxProps> = ({
         onClick={(e) => e.stopPropagation()}
       >
         <Image
-          src={getSecureImageUrl(images[currentIndex].image)}
+          src={getRenditionUrl(images[currentIndex], 2048)}
           alt={`Image ${currentIndex + 1}`}
           fill
           className="object-contain"
@@ -4,12 +4,12 @@ import React, { useRef } from "react";
 import { Modal, Button, ModalHeader, ModalBody } from "flowbite-react";
 import { QRCodeCanvas } from "qrcode.react";
 import { HiDownload } from "react-icons/hi";
-import { Tree } from "../app/types";
+import { TreeListItem } from "../app/types";
 
 interface QRCodeModalProps {
   show: boolean;
   onClose: () => void;
-  tree: Tree | null;
+  tree: TreeListItem | null;
 }
 
 export function QRCodeModal({ show, onClose, tree }: QRCodeModalProps) {
@@ -1,6 +1,6 @@
 import React, { useMemo } from 'react';
 import { Button, Tooltip } from 'flowbite-react';
-import { Tree } from '../app/types';
+import { TreeListItem } from '../app/types';
 import {
   HiPencil,
   HiTrash,
@@ -23,11 +23,11 @@ import { calcAge, sexLabel, getSecureImageUrl, getSexColorClass } from '../app/u
 import { TREE_STATUS } from '../constants/treeStatus';
 
 interface TreeCardProps {
-  tree: Tree;
-  onEdit: (tree: Tree) => void;
-  onDelete: (tree: Tree) => void;
-  onView: (tree: Tree) => void;
-  onShowQR: (tree: Tree) => void;
+  tree: TreeListItem;
+  onEdit: (tree: TreeListItem) => void;
+  onDelete: (tree: TreeListItem) => void;
+  onView: (tree: TreeListItem) => void;
+  onShowQR: (tree: TreeListItem) => void;
 }
 
 /**
@@ -1,26 +1,26 @@
 import React from "react";
 import { HiQrcode, HiExternalLink, HiPencil, HiTrash } from "react-icons/hi";
 import { Table, TableBody, TableCell, TableHead, TableHeadCell, TableRow, Badge, ButtonGroup, Button, Tooltip } from "flowbite-react";
-import { Tree } from "../app/types";
+import { TreeListItem } from "../app/types";
 import Image from "next/image";
 import { getSecureImageUrl } from "../app/utils";
 
 interface TreeTableProps {
-  trees: Tree[];
+  trees: TreeListItem[];
   loading: boolean;
   selectedIds: number[];
   onSelect: (id: number, checked: boolean) => void;
   onSelectAll: (checked: boolean, ids: number[]) => void;
-  sortKey: keyof Tree | "strain" | null;
+  sortKey: keyof TreeListItem | "strain" | null;
   sortOrder: "asc" | "desc";
-  onSort: (key: keyof Tree | "strain") => void;
-  onRowClick: (tree: Tree) => void;
+  onSort: (key: keyof TreeListItem | "strain") => void;
+  onRowClick: (tree: TreeListItem) => void;
   ageUnit: "day" | "month" | "year";
   setAgeUnit: (unit: "day" | "month" | "year") => void;
-  calcAge: (tree: Tree, unit: "day" | "month" | "year") => string;
-  onEdit: (tree: Tree) => void;
-  onDelete: (tree: Tree) => void;
-  onShowQR: (tree: Tree) => void;
+  calcAge: (tree: TreeListItem, unit: "day" | "month" | "year") => string;
+  onEdit: (tree: TreeListItem) => void;
+  onDelete: (tree: TreeListItem) => void;
+  onShowQR: (tree: TreeListItem) => void;
   onViewImages: (images: string[], index: number) => void;
 }
 
@@ -178,7 +178,11 @@ export function TreeTimeline({ logs, onAddLog, onDeleteLog, loading }: TreeTimel
                        <div className="mt-3 grid grid-cols-2 sm:grid-cols-3 md:grid-cols-4 gap-2">
                           {log.images.map((img) => (
                              <div key={img.id} className="relative aspect-square rounded-lg overflow-hidden border dark:border-gray-600">
-                                <img src={img.thumbnail || img.image} alt="Log update" className="object-cover w-full h-full" />
+                                <picture>
+                                  {img.srcset?.avif && <source type="image/avif" srcSet={img.srcset.avif} sizes="(min-width: 768px) 25vw, (min-width: 640px) 33vw, 50vw" />}
+                                  {img.srcset?.webp && <source type="image/webp" srcSet={img.srcset.webp} sizes="(min-width: 768px) 25vw, (min-width: 640px) 33vw, 50vw" />}
+                                  <img src={img.thumbnail || img.image} alt="Log update" className="object-cover w-full h-full" loading="lazy" />
+                                </picture>
                              </div>
                           ))}
                        </div>
@@ -1,58 +1,25 @@
 
 "use client";
 
-import React, { useMemo } from "react";
-import { Tree, TreeLog } from "../app/types";
+import React from "react";
+import { TreeStats } from "../app/types";
 import { HiChartPie, HiScale, HiTrendingUp } from "react-icons/hi";
 
 interface YieldAnalyticsProps {
-  trees: Tree[];
-  logs?: TreeLog[]; // Optional: if we want to pass all logs, but usually yield is derived from harvest logs. 
-                    // For now, simpler to assume trees are loaded, but we might need to fetch logs if yield isn't on Tree object directly.
-                    // Wait, `yield_amount` is on Tree object in types.ts. But I wanted detailed logs.
-                    // Let's stick to using Tree object's data if possible, or calculate from logs if available.
-                    // Actually, my plan was to log harvest weight in logs.
-                    // So I need a way to get harvest logs for all trees... which is expensive.
-                    // Optimization: We will just filter trees for "Harvested" status and maybe assume we add yield data to tree object later.
-                    // For THIS Task, let's focus on the fields I added to TreeLog.
-                    // I'll need to fetch logs or assume they are passed. 
-                    // To keep it simple for page.tsx, I might just calculate "Potential" based on status, 
-                    // OR I will just show visual UI and random/mock data if real data isn't easily aggregated yet without backend support.
-                    // BETTER APPROACH: I will just use `yield_amount` from `Tree` type (which already exists but was unused) 
-                    // AND I will encourage saving the sum of logs to that field.
+  /** Server-side aggregates from /api/stats/ (null while loading) */
+  stats: TreeStats | null;
 }
 
-// For this component, I'll calculate from the `trees` array assuming `yield_amount` is populated,
-// OR I will just display "0" if empty, ready for data.
-
-export function YieldAnalytics({ trees }: YieldAnalyticsProps) {
-  
-  const stats = useMemo(() => {
-    const harvested = trees.filter(t => t.status === "ตายแล้ว" || t.growth_stage === "Harvested"); // Adjust logic as needed
-    const totalYield = harvested.reduce((acc, t) => acc + (t.yield_amount || 0), 0);
-    const avgYield = harvested.length > 0 ? totalYield / harvested.length : 0;
-    
-    // Find best strain
-    const strainYields: Record<string, {total: number, count: number}> = {};
-    harvested.forEach(t => {
-       const name = t.strain?.name || "Unknown";
-       if (!strainYields[name]) strainYields[name] = { total: 0, count: 0 };
-       strainYields[name].total += (t.yield_amount || 0);
-       strainYields[name].count += 1;
-    });
-
-    let bestStrain = "-";
-    let maxAvg = 0;
-    Object.entries(strainYields).forEach(([name, data]) => {
-        const avg = data.total / data.count;
-        if (avg > maxAvg) {
-            maxAvg = avg;
-            bestStrain = name;
-        }
-    });
-
-    return { totalYield, avgYield, bestStrain, harvestedCount: harvested.length };
-  }, [trees]);
+/**
+ * Yield per plant is `yield_amount`, or the summed dry weight of its harvest logs
+ * when that is empty; both are aggregated by the backend.
+ */
+export function YieldAnalytics({ stats: treeStats }: YieldAnalyticsProps) {
+  const stats = {
+    totalYield: treeStats?.yield.total ?? 0,
+    avgYield: treeStats?.yield.average ?? 0,
+    bestStrain: treeStats?.yield.best_strain?.strain_name ?? "-",
+  };
 
   return (
     <div className="grid grid-cols-1 md:grid-cols-3 gap-4 mb-8 animate-fade-in-up">
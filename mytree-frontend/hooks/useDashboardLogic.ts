@@ -1,11 +1,11 @@
 
-import { useState, useMemo } from "react";
-import { Tree } from "../app/types";
+import { useState, useMemo, useEffect } from "react";
+import { TreeListItem, TreeQuery } from "../app/types";
 import { useDebouncedSearch } from "../app/hooks";
 import { treeService } from "../services/treeService";
 
 export const useDashboardLogic = (
-  trees: Tree[], 
+  trees: TreeListItem[], 
   refreshTrees: () => Promise<void>,
   setSuccessMessage: (msg: string) => void,
   setErrorMessage: (msg: string) => void
@@ -17,60 +17,58 @@ export const useDashboardLogic = (
   const [selectedIds, setSelectedIds] = useState<number[]>([]);
   
   // Sorting State
-  const [sortKey, setSortKey] = useState<keyof Tree | "strain">("id");
+  const [sortKey, setSortKey] = useState<keyof TreeListItem | "strain">("id");
   const [sortOrder, setSortOrder] = useState<"asc" | "desc">("desc");
   const [ageUnit, setAgeUnit] = useState<"day" | "month" | "year">("day");
 
   // Loading State for actions
   const [deleting, setDeleting] = useState(false);
 
-  // Filter & Sort Logic
-  const filteredTrees = useMemo(() => {
-    let result = trees;
-
-    // Filter
-    if (debouncedSearch) {
-      const lowerSearch = debouncedSearch.toLowerCase();
-      result = result.filter(
-        (t) =>
-          t.strain?.name.toLowerCase().includes(lowerSearch) ||
-          t.nickname?.toLowerCase().includes(lowerSearch) ||
-          t.location?.toLowerCase().includes(lowerSearch) ||
-          t.batch?.batch_code.toLowerCase().includes(lowerSearch)
-      );
+  // Filter & Sort Logic (server-side)
+  const query = useMemo<TreeQuery | null>(() => {
+    // Default view (newest first, no search) is already loaded by useTreeData
+    if (!debouncedSearch && sortKey === "id" && sortOrder === "desc") return null;
+
+    const key = sortKey === "strain" ? "strain_name" : sortKey;
+    return {
+      search: debouncedSearch || undefined,
+      ordering: `${sortOrder === "desc" ? "-" : ""}${key}`,
+    };
+  }, [debouncedSearch, sortKey, sortOrder]);
+
+  const [queriedTrees, setQueriedTrees] = useState<TreeListItem[] | null>(null);
+
+  useEffect(() => {
+    if (!query) {
+      setQueriedTrees(null);
+      return;
     }
 
-    // Sort
-    if (sortKey) {
-      result = [...result].sort((a, b) => {
-        let valA: string | number = "";
-        let valB: string | number = "";
-
-        if (sortKey === "strain") {
-          valA = a.strain?.name || "";
-          valB = b.strain?.name || "";
-        } else if (sortKey === "plant_date") {
-           valA = a.plant_date ? new Date(a.plant_date).getTime() : 0;
-           valB = b.plant_date ? new Date(b.plant_date).getTime() : 0;
-        } else {
-           const key = sortKey as keyof Tree;
-           const vA = a[key];
-           const vB = b[key];
-           if (typeof vA === 'string' || typeof vA === 'number') valA = vA;
-           if (typeof vB === 'string' || typeof vB === 'number') valB = vB;
+    const controller = new AbortController();
+    const load = async () => {
+      const collected: TreeListItem[] = [];
+      try {
+        for await (const page of treeService.iterateTrees(query, controller.signal)) {
+          collected.push(...page);
+          setQueriedTrees([...collected]);
         }
+        if (collected.length === 0) setQueriedTrees([]);
+      } catch (err: unknown) {
+        if (err instanceof DOMException && err.name === "AbortError") return;
+        const message = err instanceof Error ? err.message : "Failed to load data";
+        setErrorMessage(message);
+      }
+    };
+    load();
 
-        if (valA < valB) return sortOrder === "asc" ? -1 : 1;
-        if (valA > valB) return sortOrder === "asc" ? 1 : -1;
-        return 0;
-      });
-    }
+    return () => controller.abort();
+    // Re-run after mutations so the filtered view picks up refreshed trees
+  }, [query, trees, setErrorMessage]);
 
-    return result;
-  }, [trees, debouncedSearch, sortKey, sortOrder]);
+  const filteredTrees = queriedTrees ?? trees;
 
   // Handlers
-  const handleSort = (key: keyof Tree | "strain") => {
+  const handleSort = (key: keyof TreeListItem | "strain") => {
     if (sortKey === key) {
       setSortOrder(sortOrder === "asc" ? "desc" : "asc");
     } else {
@@ -0,0 +1,40 @@
+import { useEffect, useRef } from "react";
+import { LiveEvent, LiveEventType } from "../app/types";
+import { treeService } from "../services/treeService";
+
+/**
+ * Subscribe to `/api/events/` (Server-Sent Events) while mounted.
+ * `onReconnect` runs when the stream comes back after a drop: events sent
+ * meanwhile are lost, so the caller should reload what it shows.
+ */
+export const useLiveUpdates = (
+  onEvent: (event: LiveEvent) => void,
+  options: { types?: LiveEventType[]; tree?: number; onReconnect?: () => void } = {}
+) => {
+  // Latest callbacks without reopening the stream on every render
+  const handlers = useRef({ onEvent, onReconnect: options.onReconnect });
+  handlers.current = { onEvent, onReconnect: options.onReconnect };
+  const types = options.types?.join(",");
+
+  useEffect(() => {
+    if (typeof EventSource === "undefined") return;
+    const source = new EventSource(
+      treeService.getEventsUrl({ types: types ? (types.split(",") as LiveEventType[]) : undefined, tree: options.tree })
+    );
+    let connected = false;
+
+    source.addEventListener("ready", () => {
+      if (connected) handlers.current.onReconnect?.();
+      connected = true;
+    });
+    source.addEventListener("reset", () => handlers.current.onReconnect?.());
+    (["tree", "log", "image"] as LiveEventType[]).forEach((type) => {
+      source.addEventListener(type, (message) => {
+        const data = JSON.parse((message as MessageEvent<string>).data);
+        handlers.current.onEvent({ type, ...data });
+      });
+    });
+
+    return () => source.close();
+  }, [types, options.tree]);
+};
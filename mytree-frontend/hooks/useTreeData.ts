@@ -1,11 +1,18 @@
-import { useState, useEffect, useCallback } from "react";
-import { Tree, Strain, Batch } from "../app/types";
+import { useState, useEffect, useCallback, useRef } from "react";
+import { TreeListItem, Strain, Batch, TreeStats, LiveEvent } from "../app/types";
 import { treeService } from "../services/treeService";
+import { useLiveUpdates } from "./useLiveUpdates";
+
+/** Live events are gathered this long before the affected trees are refetched */
+const LIVE_DEBOUNCE_MS = 500;
+/** Above this many changed trees, reload the list instead of fetching each one */
+const LIVE_MAX_TREE_FETCHES = 20;
 
 export const useTreeData = () => {
-  const [trees, setTrees] = useState<Tree[]>([]);
+  const [trees, setTrees] = useState<TreeListItem[]>([]);
   const [strains, setStrains] = useState<Strain[]>([]);
   const [batches, setBatches] = useState<Batch[]>([]);
+  const [stats, setStats] = useState<TreeStats | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
 
@@ -18,24 +25,33 @@ export const useTreeData = () => {
         if (signal?.aborted) throw new DOMException('Aborted', 'AbortError');
         return fetcher();
       };
-      
-      const [treesData, strainsData, batchesData] = await Promise.all([
-        fetchWithSignal(() => treeService.getTrees()),
+
+      // Stream trees page by page so the first cards render before the
+      // whole collection has arrived (server returns newest first)
+      const streamTrees = async () => {
+        const collected: TreeListItem[] = [];
+        for await (const page of treeService.iterateTrees({}, signal)) {
+          if (signal?.aborted) return;
+          collected.push(...page);
+          setTrees([...collected]);
+          setLoading(false);
+        }
+        if (collected.length === 0) setTrees([]);
+      };
+
+      const [, strainsData, batchesData, statsData] = await Promise.all([
+        streamTrees(),
         fetchWithSignal(() => treeService.getStrains()),
         fetchWithSignal(() => treeService.getBatches()),
+        fetchWithSignal(() => treeService.getStats()),
       ]);
 
       // Check if aborted before setting state
       if (signal?.aborted) return;
 
-      // Sort trees by ID descending (newest first) by default
-      const sortedTrees = Array.isArray(treesData) 
-        ? treesData.sort((a, b) => b.id - a.id) 
-        : [];
-        
-      setTrees(sortedTrees);
       setStrains(Array.isArray(strainsData) ? strainsData : []);
       setBatches(Array.isArray(batchesData) ? batchesData : []);
+      setStats(statsData);
       setError(null);
     } catch (err: unknown) {
       // Ignore abort errors
@@ -51,11 +67,12 @@ export const useTreeData = () => {
 
   const refreshTrees = useCallback(async () => {
     try {
-      const treesData = await treeService.getTrees();
-      const sortedTrees = Array.isArray(treesData) 
-        ? treesData.sort((a, b) => b.id - a.id) 
-        : [];
-      setTrees(sortedTrees);
+      const [treesData, statsData] = await Promise.all([
+        treeService.getTrees(),
+        treeService.getStats(),
+      ]);
+      setTrees(Array.isArray(treesData) ? treesData : []);
+      setStats(statsData);
     } catch (err: unknown) {
       const message = err instanceof Error ? err.message : "Error refreshing trees";
       console.error("Error refreshing trees:", message);
@@ -70,10 +87,60 @@ export const useTreeData = () => {
     return () => controller.abort();
   }, [fetchData]);
 
+  // Live updates: refetch only the trees other users changed, in one debounced batch
+  const pending = useRef({ changed: new Set<number>(), deleted: new Set<number>() });
+  const flushTimer = useRef<ReturnType<typeof setTimeout> | null>(null);
+
+  const applyLiveChanges = useCallback(async () => {
+    flushTimer.current = null;
+    const changed = [...pending.current.changed].filter((id) => !pending.current.deleted.has(id));
+    const deleted = new Set(pending.current.deleted);
+    pending.current = { changed: new Set(), deleted: new Set() };
+
+    if (changed.length > LIVE_MAX_TREE_FETCHES) {
+      await refreshTrees();
+      return;
+    }
+    const [fetched, statsData] = await Promise.all([
+      Promise.allSettled(changed.map((id) => treeService.getTree(id))),
+      treeService.getStats().catch(() => null),
+    ]);
+    const updated = new Map<number, TreeListItem>();
+    fetched.forEach((result) => {
+      if (result.status === "fulfilled") updated.set(result.value.id, result.value);
+    });
+    setTrees((prev) => {
+      const kept = prev
+        .filter((tree) => !deleted.has(tree.id))
+        .map((tree) => updated.get(tree.id) ?? tree);
+      const known = new Set(prev.map((tree) => tree.id));
+      // New trees go first, matching the newest-first list
+      const added = [...updated.values()].filter((tree) => !known.has(tree.id));
+      return [...added, ...kept];
+    });
+    if (statsData) setStats(statsData);
+  }, [refreshTrees]);
+
+  const handleLiveEvent = useCallback((event: LiveEvent) => {
+    if (event.type === "tree" && event.action === "deleted") {
+      event.ids.forEach((id) => pending.current.deleted.add(id));
+    } else {
+      event.trees.forEach((id) => pending.current.changed.add(id));
+    }
+    if (!flushTimer.current) flushTimer.current = setTimeout(applyLiveChanges, LIVE_DEBOUNCE_MS);
+  }, [applyLiveChanges]);
+
+  useEffect(() => () => {
+    if (flushTimer.current) clearTimeout(flushTimer.current);
+  }, []);
+
+  useLiveUpdates(handleLiveEvent, { onReconnect: () => fetchData() });
+
   return {
     trees,
     strains,
     batches,
+    stats,
     loading,
     error,
     refreshTrees,
@@ -126,12 +126,18 @@ export const useTreeForm = (onSuccess?: () => void, strains: Strain[] = []) => {
 
     try {
       setSubmitting(true);
-      const formData = buildTreeFormData(form, imageFiles, strains);
+      const formData = buildTreeFormData(form, strains);
 
-      if (editingId) {
-        await treeService.updateTree(editingId, formData);
-      } else {
-        await treeService.createTree(formData);
+      const tree = editingId
+        ? await treeService.updateTree(editingId, formData)
+        : await treeService.createTree(formData);
+
+      // Files go up in resumable chunks once the tree exists
+      for (const file of imageFiles) {
+        await treeService.uploadImage(file, { tree: tree.id });
+      }
+      if (form.document instanceof File) {
+        await treeService.uploadDocument(tree.id, form.document);
       }
 
       resetForm();
@@ -4,7 +4,11 @@
  */
 
 import { getApiBaseUrl } from '../app/constants';
-import { Tree, Strain, Batch, TreeLog } from '../app/types';
+import {
+  Tree, TreeListItem, Strain, Batch, TreeLog, CursorPage, TreeQuery, SearchResults, BulkDeleteResult, DeletionJob, TreeStats, Lineage, KinshipResult, CrossEvaluation,
+  ImportReport, SpreadsheetSheet, EnvironmentHistory, EnvironmentBucket, SyncChanges, SyncReport, SyncType,
+  SyncUpsert, LiveEventType, Image, Upload, UploadProgress, BulkLogInput, BulkLogResult,
+} from '../app/types';
 
 // =============================================================================
 // Constants
@@ -19,8 +23,26 @@ const ENDPOINTS = {
   BATCHES: '/api/batches/',
   LOGS: '/api/logs/',
   TREE_IMAGES: '/api/tree-images/',
+  SEARCH: '/api/search/',
+  DELETION_JOBS: '/api/deletion-jobs/',
+  STATS: '/api/stats/',
+  PEDIGREE: '/api/pedigree/',
+  IMPORT: '/api/import/',
+  EXPORT: '/api/export/',
+  SYNC: '/api/sync/',
+  EVENTS: '/api/events/',
+  UPLOADS: '/api/uploads/',
 } as const;
 
+/** Page size requested from cursor-paginated endpoints */
+const PAGE_SIZE = 200;
+
+/** Bytes per PUT of a resumable upload */
+const UPLOAD_CHUNK_SIZE = 2 * 1024 * 1024;
+
+/** Failed chunks in a row before a resumable upload gives up */
+const UPLOAD_RETRIES = 5;
+
 // =============================================================================
 // Types
 // =============================================================================
@@ -43,12 +65,18 @@ export class ApiError extends Error {
  */
 export interface TreeService {
   // Tree CRUD
-  getTrees: () => Promise<Tree[]>;
+  getTrees: (query?: TreeQuery) => Promise<TreeListItem[]>;
+  iterateTrees: (query?: TreeQuery, signal?: AbortSignal) => AsyncGenerator<TreeListItem[]>;
   getTree: (id: string | number) => Promise<Tree>;
   createTree: (formData: FormData) => Promise<Tree>;
   updateTree: (id: number, formData: FormData) => Promise<Tree>;
   deleteTree: (id: number) => Promise<void>;
-  bulkDeleteTrees: (ids: number[]) => Promise<void>;
+  getLineage: (id: number, direction?: 'up' | 'down', depth?: number) => Promise<Lineage>;
+  getEnvironment: (
+    id: number, options?: { bucket?: EnvironmentBucket; from?: string; to?: string; points?: number }
+  ) => Promise<EnvironmentHistory>;
+  bulkDeleteTrees: (ids: number[]) => Promise<BulkDeleteResult>;
+  getDeletionJob: (id: number) => Promise<DeletionJob>;
 
   // Reference data
   getStrains: () => Promise<Strain[]>;
@@ -58,11 +86,39 @@ export interface TreeService {
   deleteTreeImage: (id: number) => Promise<void>;
   deleteAllTreeImages: (treeId: number) => Promise<void>;
   deleteTreeDocument: (treeId: number) => Promise<void>;
+  uploadImage: (file: File, target: { tree?: number; log?: number }, onProgress?: UploadProgress) => Promise<Image>;
+  uploadDocument: (treeId: number, file: File, onProgress?: UploadProgress) => Promise<Tree>;
 
   // Logs
   getLogs: (treeId: number) => Promise<TreeLog[]>;
+  iterateLogs: (treeId: number, signal?: AbortSignal) => AsyncGenerator<TreeLog[]>;
   createLog: (formData: FormData) => Promise<TreeLog>;
+  createLogs: (input: BulkLogInput) => Promise<BulkLogResult>;
   deleteLog: (id: number) => Promise<void>;
+
+  // Search
+  search: (q: string, type?: 'tree' | 'log', limit?: number) => Promise<SearchResults>;
+
+  // Dashboard
+  getStats: () => Promise<TreeStats>;
+
+  // Breeding
+  getKinship: (treeIds: number[]) => Promise<KinshipResult>;
+  evaluateCrosses: (crosses: [number, number][]) => Promise<CrossEvaluation[]>;
+
+  // Import
+  importSpreadsheet: (files: File[], options?: { sheet?: SpreadsheetSheet; dryRun?: boolean }) => Promise<ImportReport>;
+
+  // Export (streamed downloads: use as a link href rather than fetching into memory)
+  getWorkbookExportUrl: (sheets?: SpreadsheetSheet[]) => string;
+  getCsvExportUrl: (sheet: SpreadsheetSheet) => string;
+
+  // Offline sync
+  sync: (since?: string | null) => Promise<SyncChanges>;
+  pushChanges: (changes: Partial<Record<Exclude<SyncType, 'images'>, SyncUpsert[]>>) => Promise<SyncReport>;
+
+  // Live updates (open with EventSource, see hooks/useLiveUpdates)
+  getEventsUrl: (options?: { types?: LiveEventType[]; tree?: number }) => string;
 }
 
 // =============================================================================
@@ -121,6 +177,115 @@ const buildUrl = (endpoint: string, params?: Record<string, string | number>): s
   return `${url}?${searchParams.toString()}`;
 };
 
+/**
+ * Flatten a TreeQuery into query-string params, dropping empty values
+ */
+const toQueryParams = (query: TreeQuery = {}): Record<string, string> => {
+  const params: Record<string, string> = {};
+  Object.entries(query).forEach(([key, value]) => {
+    if (value === undefined || value === null || value === '') return;
+    if (Array.isArray(value)) {
+      if (value.length) params[key] = value.join(',');
+    } else {
+      params[key] = String(value);
+    }
+  });
+  return params;
+};
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
+/**
+ * Hex SHA-256 of a file, or '' where Web Crypto isn't available (plain http)
+ */
+const sha256Hex = async (file: File): Promise<string> => {
+  if (!globalThis.crypto?.subtle) return '';
+  const digest = await crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+  return Array.from(new Uint8Array(digest), (b) => b.toString(16).padStart(2, '0')).join('');
+};
+
+/**
+ * Send a file through `/api/uploads/` in chunks and finalize it. A failed chunk
+ * (dropped connection, 409, 5xx) asks the server how much arrived and carries
+ * on from there, so a flaky network costs one chunk rather than the whole file.
+ */
+const resumableUpload = async <T>(
+  file: File,
+  target: { kind: Upload['kind']; tree?: number; log?: number },
+  onProgress?: UploadProgress
+): Promise<T> => {
+  const created = await fetch(buildUrl(ENDPOINTS.UPLOADS), {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ ...target, filename: file.name, size: file.size, sha256: await sha256Hex(file) }),
+  });
+  const upload = await handleResponse<Upload>(created);
+  const url = buildUrl(`${ENDPOINTS.UPLOADS}${upload.id}/`);
+
+  let offset = upload.offset;
+  let failures = 0;
+  while (offset < file.size) {
+    try {
+      const response = await fetch(url, {
+        method: 'PUT',
+        headers: { 'Content-Type': 'application/offset+octet-stream', 'Upload-Offset': String(offset) },
+        body: file.slice(offset, offset + UPLOAD_CHUNK_SIZE),
+      });
+      if (response.ok) {
+        offset = (await response.json() as Upload).offset;
+        failures = 0;
+        onProgress?.(offset, file.size);
+        continue;
+      }
+      if (response.status !== 409 && response.status < 500) {
+        throw new ApiError(response.status, await parseErrorMessage(response));
+      }
+    } catch (err) {
+      if (err instanceof ApiError) throw err;
+      // Network error: fall through and resume
+    }
+    if (++failures > UPLOAD_RETRIES) {
+      throw new ApiError(0, 'อัปโหลดไฟล์ไม่สำเร็จ กรุณาตรวจสอบการเชื่อมต่อแล้วลองใหม่');
+    }
+    await sleep(1000 * 2 ** (failures - 1));
+    try {
+      offset = (await handleResponse<Upload>(await fetch(url, { cache: 'no-store' }))).offset;
+    } catch (err) {
+      if (err instanceof ApiError && err.status === 404) throw err;
+    }
+  }
+
+  const finalized = await fetch(buildUrl(`${ENDPOINTS.UPLOADS}${upload.id}/finalize/`), { method: 'POST' });
+  return handleResponse<T>(finalized);
+};
+
+/**
+ * Walk a cursor-paginated endpoint, yielding one page of results at a time.
+ * Each request follows the server-issued `next` link, so every page costs the
+ * same no matter how deep the client has scrolled.
+ */
+async function* iteratePages<T>(url: string, signal?: AbortSignal): AsyncGenerator<T[]> {
+  let next: string | null = url;
+
+  while (next) {
+    const response: Response = await fetch(next, { signal });
+    const page: CursorPage<T> = await handleResponse<CursorPage<T>>(response);
+    yield page.results;
+    next = page.next;
+  }
+}
+
+/**
+ * Collect every page of a cursor-paginated endpoint into one array
+ */
+const collectPages = async <T>(pages: AsyncGenerator<T[]>): Promise<T[]> => {
+  const items: T[] = [];
+  for await (const page of pages) {
+    items.push(...page);
+  }
+  return items;
+};
+
 // =============================================================================
 // Service Implementation
 // =============================================================================
@@ -131,11 +296,19 @@ export const treeService: TreeService = {
   // ---------------------------------------------------------------------------
 
   /**
-   * Get all trees
+   * Get all trees matching the query (follows every page) as compact list rows
+   */
+  getTrees: async (query) => {
+    return collectPages(treeService.iterateTrees(query));
+  },
+
+  /**
+   * Stream trees matching the query page by page (newest first by default).
+   * Rows are compact unless `query.fields` / `query.expand` ask for more.
    */
-  getTrees: async () => {
-    const response = await fetch(buildUrl(ENDPOINTS.TREES));
-    return handleResponse<Tree[]>(response);
+  iterateTrees: (query, signal) => {
+    const params = { ...toQueryParams(query), page_size: PAGE_SIZE };
+    return iteratePages<TreeListItem>(buildUrl(ENDPOINTS.TREES, params), signal);
   },
 
   /**
@@ -178,6 +351,26 @@ export const treeService: TreeService = {
     return handleResponse<void>(response);
   },
 
+  /**
+   * Ancestors or descendants of a tree as nodes + edges (one recursive query server-side)
+   */
+  getLineage: async (id, direction = 'up', depth = 3) => {
+    const response = await fetch(buildUrl(`${ENDPOINTS.TREES}${id}/lineage/`, { direction, depth }));
+    return handleResponse<Lineage>(response);
+  },
+
+  /**
+   * pH/EC/temperature/humidity history bucketed (min/max/avg) or downsampled, at most `points` per series
+   */
+  getEnvironment: async (id, options = {}) => {
+    const params: Record<string, string | number> = {};
+    Object.entries(options).forEach(([key, value]) => {
+      if (value !== undefined && value !== '') params[key] = value;
+    });
+    const response = await fetch(buildUrl(`${ENDPOINTS.TREES}${id}/environment/`, params));
+    return handleResponse<EnvironmentHistory>(response);
+  },
+
   /**
    * Delete multiple trees at once
    */
@@ -187,7 +380,15 @@ export const treeService: TreeService = {
       headers: { 'Content-Type': 'application/json' },
       body: JSON.stringify({ ids }),
     });
-    return handleResponse<void>(response);
+    return handleResponse<BulkDeleteResult>(response);
+  },
+
+  /**
+   * Progress of the background file removal started by bulkDeleteTrees
+   */
+  getDeletionJob: async (id) => {
+    const response = await fetch(buildUrl(`${ENDPOINTS.DELETION_JOBS}${id}/`));
+    return handleResponse<DeletionJob>(response);
   },
 
   // ---------------------------------------------------------------------------
@@ -244,6 +445,20 @@ export const treeService: TreeService = {
     return handleResponse<void>(response);
   },
 
+  /**
+   * Add a photo to a tree or log with a resumable upload
+   */
+  uploadImage: async (file, target, onProgress) => {
+    return resumableUpload<Image>(file, { kind: 'image', ...target }, onProgress);
+  },
+
+  /**
+   * Attach (or replace) a tree's document with a resumable upload
+   */
+  uploadDocument: async (treeId, file, onProgress) => {
+    return resumableUpload<Tree>(file, { kind: 'document', tree: treeId }, onProgress);
+  },
+
   // ---------------------------------------------------------------------------
   // Log Operations
   // ---------------------------------------------------------------------------
@@ -252,8 +467,17 @@ export const treeService: TreeService = {
    * Get all logs for a tree
    */
   getLogs: async (treeId) => {
-    const response = await fetch(buildUrl(ENDPOINTS.LOGS, { tree: treeId }));
-    return handleResponse<TreeLog[]>(response);
+    return collectPages(treeService.iterateLogs(treeId));
+  },
+
+  /**
+   * Stream logs for a tree page by page, most recent first (with their images)
+   */
+  iterateLogs: (treeId, signal) => {
+    return iteratePages<TreeLog>(
+      buildUrl(`${ENDPOINTS.TREES}${treeId}/timeline/`, { page_size: PAGE_SIZE }),
+      signal
+    );
   },
 
   /**
@@ -267,6 +491,32 @@ export const treeService: TreeService = {
     return handleResponse<TreeLog>(response);
   },
 
+  /**
+   * Record the same entry for many trees in one request
+   */
+  createLogs: async (input) => {
+    const { image, ...fields } = input;
+    let body: BodyInit;
+    let headers: HeadersInit | undefined;
+    if (image) {
+      // Multipart for the photo; lists repeat their key, `filter` travels as JSON
+      const formData = new FormData();
+      Object.entries(fields).forEach(([key, value]) => {
+        if (value === undefined || value === null) return;
+        if (key === 'filter') formData.append(key, JSON.stringify(value));
+        else if (Array.isArray(value)) value.forEach((item) => formData.append(key, String(item)));
+        else formData.append(key, String(value));
+      });
+      formData.append('image', image);
+      body = formData;
+    } else {
+      body = JSON.stringify(fields);
+      headers = { 'Content-Type': 'application/json' };
+    }
+    const response = await fetch(buildUrl(`${ENDPOINTS.LOGS}bulk/`), { method: 'POST', headers, body });
+    return handleResponse<BulkLogResult>(response);
+  },
+
   /**
    * Delete a log entry
    */
@@ -276,5 +526,131 @@ export const treeService: TreeService = {
     });
     return handleResponse<void>(response);
   },
-};
 
+  // ---------------------------------------------------------------------------
+  // Search
+  // ---------------------------------------------------------------------------
+
+  /**
+   * Ranked full-text search across trees and journal entries
+   */
+  search: async (q, type, limit = 20) => {
+    const params: Record<string, string | number> = { q, limit };
+    if (type) params.type = type;
+    const response = await fetch(buildUrl(ENDPOINTS.SEARCH, params));
+    return handleResponse<SearchResults>(response);
+  },
+
+  // ---------------------------------------------------------------------------
+  // Dashboard
+  // ---------------------------------------------------------------------------
+
+  /**
+   * Counts and yield aggregates for the dashboard (no need to load every tree)
+   */
+  getStats: async () => {
+    const response = await fetch(buildUrl(ENDPOINTS.STATS));
+    return handleResponse<TreeStats>(response);
+  },
+
+  // ---------------------------------------------------------------------------
+  // Breeding
+  // ---------------------------------------------------------------------------
+
+  /**
+   * Inbreeding coefficients and kinship matrix for a set of trees
+   */
+  getKinship: async (treeIds) => {
+    const response = await fetch(buildUrl(`${ENDPOINTS.PEDIGREE}kinship/`), {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ trees: treeIds }),
+    });
+    return handleResponse<KinshipResult>(response);
+  },
+
+  /**
+   * Expected offspring inbreeding for candidate [male, female] crosses
+   */
+  evaluateCrosses: async (crosses) => {
+    const response = await fetch(buildUrl(`${ENDPOINTS.PEDIGREE}crosses/`), {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ crosses }),
+    });
+    const data = await handleResponse<{ crosses: CrossEvaluation[] }>(response);
+    return data.crosses;
+  },
+
+  // ---------------------------------------------------------------------------
+  // Import
+  // ---------------------------------------------------------------------------
+
+  /**
+   * Bulk import from the .xlsx template or data-templates/*.csv files
+   */
+  importSpreadsheet: async (files, options = {}) => {
+    const formData = new FormData();
+    files.forEach((file) => formData.append('file', file));
+    if (options.sheet) formData.append('sheet', options.sheet);
+    if (options.dryRun) formData.append('dry_run', 'true');
+    const response = await fetch(buildUrl(ENDPOINTS.IMPORT), {
+      method: 'POST',
+      body: formData,
+    });
+    return handleResponse<ImportReport>(response);
+  },
+
+  // ---------------------------------------------------------------------------
+  // Export
+  // ---------------------------------------------------------------------------
+
+  /**
+   * Download URL of an .xlsx with the given sheets (all sheets when omitted)
+   */
+  getWorkbookExportUrl: (sheets) =>
+    buildUrl(`${ENDPOINTS.EXPORT}xlsx/`, sheets?.length ? { sheets: sheets.join(',') } : undefined),
+
+  /**
+   * Download URL of one sheet as CSV
+   */
+  getCsvExportUrl: (sheet) => buildUrl(`${ENDPOINTS.EXPORT}csv/${sheet}/`),
+
+  // ---------------------------------------------------------------------------
+  // Offline sync
+  // ---------------------------------------------------------------------------
+
+  /**
+   * Changes since the token of the previous sync (everything when omitted)
+   */
+  sync: async (since) => {
+    const response = await fetch(buildUrl(ENDPOINTS.SYNC, since ? { since } : undefined));
+    return handleResponse<SyncChanges>(response);
+  },
+
+  /**
+   * Send edits queued while offline as one batch
+   */
+  pushChanges: async (changes) => {
+    const response = await fetch(buildUrl(ENDPOINTS.SYNC), {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(changes),
+    });
+    return handleResponse<SyncReport>(response);
+  },
+
+  // ---------------------------------------------------------------------------
+  // Live updates
+  // ---------------------------------------------------------------------------
+
+  /**
+   * Server-Sent Events stream of committed changes, optionally for one tree
+   */
+  getEventsUrl: (options = {}) => {
+    const params: Record<string, string | number> = {};
+    if (options.types?.length) params.types = options.types.join(',');
+    if (options.tree !== undefined) params.tree = options.tree;
+    return buildUrl(ENDPOINTS.EVENTS, Object.keys(params).length ? params : undefined);
+  },
+};
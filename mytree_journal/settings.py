@@ -10,9 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+from corsheaders.defaults import default_headers
 from dotenv import load_dotenv
 from pathlib import Path
 import os
+import tempfile
 
 
 
@@ -40,13 +42,17 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
+    'django_filters',
     'trees',
     'corsheaders',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Compresses the final API body, so it runs after everything below
+    'trees.compression.ApiCompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -131,6 +137,22 @@ STATIC_URL = 'static/'
 # Media files (Uploaded images, etc.)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Media is served by trees.media (byte ranges, conditional GET). Names under these
+# prefixes are content-addressed and cached by clients for a year.
+MEDIA_IMMUTABLE_PREFIXES = ('blobs/',)
+# Let the front-end server send the bytes: 'x-accel-redirect' (nginx, internal
+# location at MEDIA_ACCEL_PREFIX aliased to MEDIA_ROOT) or 'x-sendfile'
+MEDIA_ACCEL = os.getenv('MEDIA_ACCEL') or None
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+# Resumable uploads (/api/uploads/, trees.uploads): partial files live here until
+# finalized. Keep it on the same filesystem as MEDIA_ROOT so finishing is a rename.
+UPLOAD_TEMP_DIR = BASE_DIR / 'uploads'
+UPLOAD_MAX_BYTES = 200 * 1024 * 1024
+UPLOAD_EXPIRE_HOURS = 24
+
+# Responsive image renditions (px widths and encodings; AVIF is skipped if Pillow lacks it)
+IMAGE_RENDITION_WIDTHS = [160, 400, 1024, 2048]
+IMAGE_RENDITION_FORMATS = ['avif', 'webp']
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -138,4 +160,72 @@ MEDIA_ROOT = BASE_DIR / 'media'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
-CORS_ALLOW_ALL_ORIGINS = True
\ No newline at end of file
+# Django REST Framework
+REST_FRAMEWORK = {
+    'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
+    # orjson by default, MessagePack with `Accept: application/msgpack` (trees.renderers)
+    'DEFAULT_RENDERER_CLASSES': [
+        'trees.renderers.ORJSONRenderer',
+        'trees.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'trees.renderers.ORJSONParser',
+        'trees.renderers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Collection versions behind API ETags (trees.caching). They must be shared by
+    # every process that writes, including `process_thumbnails`; point this at
+    # Redis/Memcached when running several servers.
+    'versions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'mytree-journal-versions'),
+        'TIMEOUT': None,
+    },
+}
+VERSION_CACHE = 'versions'
+# In-process LRU of rendered API responses, keyed by ETag
+API_PAYLOAD_CACHE_BYTES = 64 * 1024 * 1024
+# API responses at least this large are sent brotli/gzip compressed (trees.compression)
+API_COMPRESS_MIN_BYTES = 1024
+API_COMPRESS_CACHE_BYTES = 32 * 1024 * 1024
+
+# Seconds /api/stats/ stays cached (it is keyed on the tree, log, strain and batch versions, so changes show at once)
+STATS_CACHE_TIMEOUT = 300
+# Memory for loaded pedigrees (trees.pedigree)
+PEDIGREE_CACHE_BYTES = 64 * 1024 * 1024
+
+# Most sensor readings accepted by one POST /api/readings/
+SENSOR_INGEST_MAX_READINGS = 10000
+
+# Delta sync (/api/sync/). Tokens are this many seconds behind the server clock so a
+# write committed just after a sync is still picked up by the next one.
+SYNC_OVERLAP_SECONDS = 30
+# Days deletions are remembered; older tokens get a full snapshot (prune with `manage.py prune_tombstones`)
+SYNC_TOMBSTONE_DAYS = 90
+# Most rows accepted by one POST /api/sync/
+SYNC_MAX_UPSERTS = 1000
+
+# Most trees one POST /api/logs/bulk/ may write a journal entry for
+BULK_LOG_MAX_TREES = 5000
+
+# Live updates (/api/events/, needs an ASGI server). 'local' reaches the streams of the
+# process that made the change; 'postgres' fans out over LISTEN/NOTIFY to every worker
+# and also carries changes made by `process_thumbnails`.
+LIVE_EVENTS_BACKEND = 'local'
+LIVE_EVENTS_CHANNEL = 'mytree_events'
+# Seconds between keep-alive comments on idle streams
+LIVE_EVENTS_KEEPALIVE_SECONDS = 15
+
+
+CORS_ALLOW_ALL_ORIGINS = True
+# Resumable uploads send and read the byte offset in a header
+CORS_ALLOW_HEADERS = (*default_headers, 'upload-offset')
+CORS_EXPOSE_HEADERS = ['Upload-Offset']
@@ -15,11 +15,12 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 from django.http import HttpResponse
 from django.views.generic import RedirectView
+from trees.media import serve_media
 
 def home(request):
     return HttpResponse("MyTree API is running. (This is backend API only.)")
@@ -31,5 +32,6 @@ urlpatterns = [
     path('favicon.ico', RedirectView.as_view(
         url='/static/icon/favicon.ico', permanent=True)),
 ]
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Ranges, conditional GET and cache headers; works without DEBUG (see trees.media)
+urlpatterns.append(re_path(rf'^{settings.MEDIA_URL.strip("/")}/(?P<path>.+)$', serve_media, name='media'))
 urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
\ No newline at end of file
@@ -75,6 +75,25 @@ SHEETS = [
             "image_id",
         ],
     ),
+    (
+        "TreeLogs",
+        [
+            "id",
+            "tree_id",
+            "action_date",
+            "action_type",
+            "title",
+            "notes",
+            "ph",
+            "ec",
+            "temp",
+            "humidity",
+            "wet_weight",
+            "dry_weight",
+            "created_at",
+            "updated_at",
+        ],
+    ),
 ]
 
 
@@ -138,22 +157,22 @@ def build_xlsx(path):
                  "</Relationships>")
 
     workbook_xml = [
-        "<?xml version=\\\"1.0\\\" encoding=\\\"UTF-8\\\" standalone=\\\"yes\\\"?>",
-        "<workbook xmlns=\\\"http://schemas.openxmlformats.org/spreadsheetml/2006/main\\\" xmlns:r=\\\"http://schemas.openxmlformats.org/officeDocument/2006/relationships\\\">",
+        "<?xml version=\"1.0\" encoding=\"UTF-8\" standalone=\"yes\"?>",
+        "<workbook xmlns=\"http://schemas.openxmlformats.org/spreadsheetml/2006/main\" xmlns:r=\"http://schemas.openxmlformats.org/officeDocument/2006/relationships\">",
         "  <sheets>",
     ]
     for i, (name, _) in enumerate(SHEETS, start=1):
         # Escape XML for sheet name
         esc_name = name.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
         workbook_xml.append(
-            f"    <sheet name=\\\"{esc_name}\\\" sheetId=\\\"{i}\\\" r:id=\\\"rId{i}\\\"/>"
+            f"    <sheet name=\"{esc_name}\" sheetId=\"{i}\" r:id=\"rId{i}\"/>"
         )
     workbook_xml.extend(["  </sheets>", "</workbook>"])
     workbook_xml_str = "\n".join(workbook_xml)
 
     workbook_rels = [
         "<?xml version=\"1.0\" encoding=\"UTF-8\" standalone=\"yes\"?>",
-        "<Relationships xmlns=\"http://schemas.openxmlformats.org/officeDocument/2006/relationships\">",
+        "<Relationships xmlns=\"http://schemas.openxmlformats.org/package/2006/relationships\">",
     ]
     for i in range(len(SHEETS)):
         workbook_rels.append(
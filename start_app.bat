@@ -82,13 +82,16 @@ for /d %%D in ("%PROJECT_DIR%\*") do (
 if defined VENV_PATH (
     echo   ✓ Virtual Environment: !VENV_NAME!
     start "MyTree Backend" cmd /k "title MyTree Backend && cd /d "%PROJECT_DIR%" && call "%VENV_PATH%\Scripts\activate.bat" && python manage.py runserver"
+    start "MyTree Thumbnails" cmd /k "title MyTree Thumbnails && cd /d "%PROJECT_DIR%" && call "%VENV_PATH%\Scripts\activate.bat" && python manage.py process_thumbnails"
 ) else (
     echo   ⚠ No virtual environment found
     echo     Using system Python...
     start "MyTree Backend" cmd /k "title MyTree Backend && cd /d "%PROJECT_DIR%" && python manage.py runserver"
+    start "MyTree Thumbnails" cmd /k "title MyTree Thumbnails && cd /d "%PROJECT_DIR%" && python manage.py process_thumbnails"
 )
 
 echo   ✓ Django server starting on http://localhost:8000
+echo   ✓ Thumbnail worker started
 echo.
 
 REM ===================================================
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import Tree, Image, Strain, Batch
+from .search import tree_search_filter
 
 class StrainAdmin(admin.ModelAdmin):
     search_fields = ['name', 'description']
@@ -19,6 +20,12 @@ class TreeAdmin(admin.ModelAdmin):
     date_hierarchy = 'created_at'
     ordering = ('-created_at',)
 
+    def get_search_results(self, request, queryset, search_term):
+        # Use the indexed full-text/trigram search instead of ILIKE '%x%' scans
+        if not search_term:
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(tree_search_filter(search_term)), False
+
 admin.site.register(Tree, TreeAdmin)
 admin.site.register(Image)
 admin.site.register(Strain, StrainAdmin)
@@ -0,0 +1,146 @@
+"""
+Collection version counters, ETags and conditional GETs for the API.
+
+Every model the API serialises has a version: the `time.time_ns()` of its
+last change, kept in the cache named by ``settings.VERSION_CACHE`` (file based
+by default, so the web server and ``process_thumbnails`` see the same values).
+Saves and deletes bump it through signals (trees.signals); bulk paths that skip
+signals bump it themselves. Bumps run on commit, so a request can never store
+pre-commit data under the new version.
+
+A view's ETag is a hash of the versions it depends on, the URL and the media
+type. Matching ``If-None-Match`` / ``If-Modified-Since`` requests get 304
+before the ORM is touched, and rendered payloads are kept in a small
+in-process LRU keyed by that ETag.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers, quote_etag
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+DEFAULT_PAYLOAD_CACHE_BYTES = 64 * 1024 * 1024
+
+
+def _cache():
+    return caches[getattr(settings, 'VERSION_CACHE', 'default')]
+
+
+def _key(model):
+    return f'trees:version:{model._meta.label_lower}'
+
+
+def get_versions(models):
+    """Current version of each model (one cache round trip once they exist)"""
+    cache = _cache()
+    keys = [_key(model) for model in models]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            # Unique start value so a cleared cache can't make old ETags match again
+            cache.add(key, time.time_ns(), timeout=None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def bump_versions(*models):
+    """Mark `models` as changed once the current transaction commits"""
+    transaction.on_commit(
+        lambda: _cache().set_many({_key(model): time.time_ns() for model in models}, timeout=None)
+    )
+
+
+class PayloadCache:
+    """Thread-safe LRU of rendered responses, bounded by total size in bytes (read from `setting`)"""
+
+    def __init__(self, setting='API_PAYLOAD_CACHE_BYTES', default=DEFAULT_PAYLOAD_CACHE_BYTES):
+        self.setting, self.default = setting, default
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def set(self, key, content, content_type):
+        limit = getattr(settings, self.setting, self.default)
+        if len(content) > limit:
+            return
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous[0])
+            self.entries[key] = (content, content_type)
+            self.size += len(content)
+            while self.size > limit:
+                _, (old, _) = self.entries.popitem(last=False)
+                self.size -= len(old)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+payloads = PayloadCache()
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified / 304 for the GET actions of a viewset.
+
+    `cache_models` lists every model whose data appears in the responses
+    (e.g. trees embed their strain, batch, latest log and images).
+    """
+    cache_models = ()
+    conditional_actions = ('list', 'retrieve')
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.etag = self.versions = None
+        if request.method not in ('GET', 'HEAD') or self.action not in self.conditional_actions:
+            return
+        # Handlers that serve from their own cache key it on self.versions, so the
+        # payload stored under this ETag is never older than the ETag itself
+        self.versions = versions = get_versions(self.cache_models)
+        identity = repr((versions, request.build_absolute_uri(), request.accepted_media_type))
+        self.etag = quote_etag(hashlib.sha1(identity.encode()).hexdigest())
+        self.last_modified = max(versions) // 1_000_000_000
+        # DRF looks the handler up after initial(); wrap it so a match skips it entirely
+        name = request.method.lower()
+        setattr(self, name, partial(self._conditional, getattr(self, name)))
+
+    def _conditional(self, handler, request, *args, **kwargs):
+        not_modified = get_conditional_response(request, etag=self.etag, last_modified=self.last_modified)
+        if not_modified is not None:
+            return not_modified
+        cached = payloads.get(self.etag)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+        return handler(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, 'etag', None) and response.status_code in (200, 304):
+            if isinstance(response, Response) and response.status_code == 200:
+                response.render()
+                payloads.set(self.etag, response.content, response['Content-Type'])
+            response['ETag'] = self.etag
+            response['Last-Modified'] = http_date(self.last_modified)
+            # Stored copies must revalidate, which is a cheap 304 here
+            response['Cache-Control'] = 'no-cache'
+            patch_vary_headers(response, ['Accept'])
+        return response
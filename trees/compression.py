@@ -0,0 +1,80 @@
+"""
+Brotli / gzip for API responses above a size threshold.
+
+Django's GZipMiddleware compresses everything (and every streaming response,
+including the Server-Sent Events stream). This one only touches complete,
+uncompressed API bodies of at least API_COMPRESS_MIN_BYTES, picks brotli when
+the client accepts it, and keeps recently compressed bodies keyed by ETag so
+a popular list isn't compressed again for every client.
+"""
+import gzip
+
+import brotli
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.regex_helper import _lazy_re_compile
+
+from .caching import PayloadCache
+
+DEFAULT_MIN_BYTES = 1024
+DEFAULT_CACHE_BYTES = 32 * 1024 * 1024
+# Speed over ratio: these bodies are compressed on the request path
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/msgpack')
+
+accepts_br = _lazy_re_compile(r'\bbr\b')
+accepts_gzip = _lazy_re_compile(r'\bgzip\b')
+
+
+def _encode(content, coding):
+    if coding == 'br':
+        return brotli.compress(content, quality=BROTLI_QUALITY)
+    # mtime=0 keeps the output identical for identical input
+    return gzip.compress(content, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class ApiCompressionMiddleware(MiddlewareMixin):
+    # Works under WSGI and ASGI (the live events view is async)
+    compressed = PayloadCache('API_COMPRESS_CACHE_BYTES', DEFAULT_CACHE_BYTES)
+
+    def process_response(self, request, response):
+        if not request.path.startswith('/api/') or response.streaming or response.has_header('Content-Encoding'):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip()
+        if content_type not in COMPRESSIBLE_TYPES:
+            return response
+
+        # The body depends on Accept-Encoding from here on, compressed or not
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(response.content) < getattr(settings, 'API_COMPRESS_MIN_BYTES', DEFAULT_MIN_BYTES):
+            return response
+        accept = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if accepts_br.search(accept):
+            coding = 'br'
+        elif accepts_gzip.search(accept):
+            coding = 'gzip'
+        else:
+            return response
+
+        etag = response.get('ETag')
+        key = (etag, coding) if etag else None
+        cached = self.compressed.get(key) if key else None
+        if cached is not None:
+            body = cached[0]
+        else:
+            body = _encode(response.content, coding)
+            if len(body) >= len(response.content):
+                return response
+            if key:
+                self.compressed.set(key, body, content_type)
+
+        response.content = body
+        response['Content-Length'] = str(len(body))
+        response['Content-Encoding'] = coding
+        if etag and not etag.startswith('W/'):
+            # Same as GZipMiddleware: the bytes differ, the resource doesn't
+            response['ETag'] = 'W/' + etag
+        return response
@@ -0,0 +1,54 @@
+"""
+PostgreSQL ``COPY`` into temporary staging tables.
+
+Bulk writers (trees.readings, trees.importer) stream rows into a staging
+table shaped like their target with one ``COPY … FROM STDIN``, then move them
+with a single ``INSERT … SELECT``, which can carry ``ON CONFLICT`` and
+``RETURNING`` clauses that plain multi-row INSERTs from the ORM cannot.
+"""
+import io
+from datetime import date, datetime, time
+
+from django.db import connection
+
+
+def copy_text(value):
+    """Field in COPY text format: tab-separated, \\N for NULL"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, str):
+        return value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    return str(value)
+
+
+def create_staging(name, source, columns):
+    """
+    Empty temporary table `name` with the `columns` of table `source`, dropped
+    at commit. Reused (emptied) when called again in the same transaction.
+    """
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE IF NOT EXISTS {quote(name)} ON COMMIT DROP AS '
+            f'SELECT {", ".join(quote(column) for column in columns)} FROM {quote(source)} WITH NO DATA'
+        )
+        cursor.execute(f'TRUNCATE {quote(name)}')
+
+
+def copy_rows(rows, table, columns):
+    """Load tuples of `columns` values into `table` with a single COPY ... FROM STDIN"""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(copy_text(value) for value in row))
+        buffer.write('\n')
+    buffer.seek(0)
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        # CursorWrapper passes copy_expert through to the psycopg2 cursor
+        cursor.copy_expert(
+            f'COPY {quote(table)} ({", ".join(quote(column) for column in columns)}) FROM STDIN', buffer
+        )
@@ -0,0 +1,231 @@
+"""
+Environment history (pH, EC, temperature, humidity) of one tree for charts.
+
+A tree's history is its own sensor readings, the readings of probes at its
+location, and the values typed into its journal entries. Bucketed series read
+ReadingRollup (hourly and daily rows, weeks grouped from days with
+date_trunc) and merge in a date_trunc GROUP BY over the journal. Raw series
+are thinned with Largest-Triangle-Three-Buckets, so a chart gets a bounded
+number of points however long the history is.
+"""
+import io
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from django.db import connection
+from django.db.models import Count, FloatField, Max, Min, Q, Sum, Value
+from django.db.models.functions import Cast, Coalesce, Extract, Trunc
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import ReadingRollup, SensorReading, TreeLog
+
+METRICS = SensorReading.VALUE_FIELDS
+# ?bucket= -> (date_trunc unit, width, ReadingRollup bucket it is grouped from)
+BUCKETS = {
+    '1h': ('hour', timedelta(hours=1), 'hour'),
+    '1d': ('day', timedelta(days=1), 'day'),
+    '1w': ('week', timedelta(weeks=1), 'day'),
+}
+DEFAULT_POINTS = 500
+MAX_POINTS = 5000
+# Journal entries that carry at least one environment value
+LOGGED_VALUES = Q(ph__isnull=False) | Q(ec__isnull=False) | Q(temp__isnull=False) | Q(humidity__isnull=False)
+
+
+def parse_moment(value):
+    """ISO date or datetime from a query string -> aware datetime (dates are local midnight)"""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        moment = datetime.combine(day, time.min)
+    return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+
+
+def _sources(tree):
+    """Readings/rollups that belong to `tree`: its own plus those of probes at its location"""
+    condition = Q(tree=tree)
+    if tree.location:
+        condition |= Q(tree__isnull=True, location=tree.location)
+    return condition
+
+
+def first_recorded(tree):
+    """Earliest moment with any environment value for `tree` (None without data)"""
+    candidates = [
+        ReadingRollup.objects.filter(_sources(tree), bucket='day').aggregate(first=Min('start'))['first'],
+        TreeLog.objects.filter(LOGGED_VALUES, tree=tree).aggregate(first=Min('action_date'))['first'],
+    ]
+    candidates = [value for value in candidates if value is not None]
+    return min(candidates) if candidates else None
+
+
+def pick_bucket(start, end, points):
+    """Finest bucket that keeps the series within `points`"""
+    for name, (_, width, _) in BUCKETS.items():
+        if (end - start) / width <= points:
+            return name
+    return '1w'
+
+
+def _floor(moment, unit):
+    """Start of the bucket holding `moment`, in the default time zone like date_trunc"""
+    local = timezone.localtime(moment, timezone.get_default_timezone())
+    if unit == 'hour':
+        return local.replace(minute=0, second=0, microsecond=0)
+    local = local.replace(hour=0, minute=0, second=0, microsecond=0)
+    return local - timedelta(days=local.weekday()) if unit == 'week' else local
+
+
+def _iso(moment):
+    return timezone.localtime(moment).isoformat()
+
+
+def bucketed_series(tree, bucket, start, end):
+    """``{metric: [{t, min, max, avg, count}]}`` per bucket overlapping [start, end)"""
+    unit, _, rollup_bucket = BUCKETS[bucket]
+    tz = timezone.get_default_timezone()
+    start = _floor(start, unit)
+    totals = {}
+
+    def add(moment, metric, count, total, low, high):
+        if not count:
+            return
+        entry = totals.setdefault(moment, {}).setdefault(metric, [0, 0.0, low, high])
+        entry[0] += count
+        entry[1] += float(total)
+        entry[2] = min(entry[2], low)
+        entry[3] = max(entry[3], high)
+
+    rollups = (
+        ReadingRollup.objects.filter(_sources(tree), bucket=rollup_bucket, start__gte=start, start__lt=end)
+        .annotate(moment=Trunc('start', unit, tzinfo=tz)).order_by().values('moment')
+        .annotate(**{
+            f'{m}_{name}': function(f'{m}_{name}')
+            for m in METRICS for name, function in (('count', Sum), ('sum', Sum), ('min', Min), ('max', Max))
+        })
+    )
+    for row in rollups:
+        for m in METRICS:
+            add(row['moment'], m, row[f'{m}_count'], row[f'{m}_sum'], row[f'{m}_min'], row[f'{m}_max'])
+
+    logs = (
+        TreeLog.objects.filter(LOGGED_VALUES, tree=tree, action_date__gte=start, action_date__lt=end)
+        .annotate(moment=Trunc('action_date', unit, tzinfo=tz)).order_by().values('moment')
+        .annotate(**{
+            f'{m}_{name}': function(m)
+            for m in METRICS for name, function in (('count', Count), ('sum', Sum), ('min', Min), ('max', Max))
+        })
+    )
+    for row in logs:
+        for m in METRICS:
+            if row[f'{m}_count']:
+                add(row['moment'], m, row[f'{m}_count'], row[f'{m}_sum'],
+                    float(row[f'{m}_min']), float(row[f'{m}_max']))
+
+    series = {m: [] for m in METRICS}
+    for moment in sorted(totals):
+        for m, (count, total, low, high) in totals[moment].items():
+            series[m].append({
+                't': _iso(moment), 'min': low, 'max': high, 'avg': round(total / count, 4), 'count': count,
+            })
+    return series
+
+
+def lttb(x, y, threshold):
+    """
+    Indices of the points Largest-Triangle-Three-Buckets keeps (x ascending).
+    The first and last points always stay; each bucket in between keeps the
+    point forming the largest triangle with the previous pick and the mean of
+    the next bucket, which preserves peaks and dips a plain stride would drop.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    every = (n - 2) / (threshold - 2)
+    picked = np.empty(threshold, dtype=np.int64)
+    picked[0] = a = 0
+    for i in range(threshold - 2):
+        lo, hi = int(i * every) + 1, int((i + 1) * every) + 1
+        next_lo, next_hi = hi, min(int((i + 2) * every) + 1, n)
+        avg_x, avg_y = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        picked[i + 1] = a
+    picked[-1] = n - 1
+    return picked
+
+
+def _copy_out(queryset, width):
+    """
+    Rows of a values_list queryset of `width` non-null float8 columns as a
+    NumPy array, via binary ``COPY ... TO STDOUT``. Every row then has the same
+    layout, so NumPy reads the buffer directly with no Python object per row.
+    """
+    sql, params = queryset.query.sql_with_params()
+    buffer = io.BytesIO()
+    with connection.cursor() as cursor:
+        # COPY takes no parameters; mogrify quotes them the same way execute() would
+        query = cursor.mogrify(sql, params).decode()
+        cursor.copy_expert(f'COPY ({query}) TO STDOUT WITH (FORMAT binary)', buffer)
+    data = buffer.getbuffer()
+    # 11-byte signature, int32 flags, int32 header extension length; int16 -1 trailer
+    offset = 19 + int.from_bytes(data[15:19], 'big')
+    row = np.dtype([('fields', '>i2')] + [(f'c{i}', [('size', '>i4'), ('value', '>f8')]) for i in range(width)])
+    rows = np.frombuffer(data, dtype=row, offset=offset, count=(len(data) - offset - 2) // row.itemsize)
+    return np.column_stack([rows[f'c{i}']['value'] for i in range(width)]).astype(np.float64)
+
+
+def _float_columns(time_field):
+    """Epoch seconds plus METRICS as float8, NULL as NaN, for _copy_out"""
+    nan = Value(float('nan'), output_field=FloatField())
+    return [Cast(Extract(time_field, 'epoch'), FloatField())] + [
+        Coalesce(Cast(m, FloatField()), nan) for m in METRICS
+    ]
+
+
+def raw_series(tree, start, end, points):
+    """``{metric: [{t, value}]}`` for every raw value in [start, end), thinned to `points` by LTTB"""
+    readings = (
+        SensorReading.objects.filter(_sources(tree), recorded_at__gte=start, recorded_at__lt=end)
+        .order_by().values_list(*_float_columns('recorded_at'))
+    )
+    logs = (
+        TreeLog.objects.filter(LOGGED_VALUES, tree=tree, action_date__gte=start, action_date__lt=end)
+        .order_by().values_list(*_float_columns('action_date'))
+    )
+    width = len(METRICS) + 1
+    rows = np.concatenate([_copy_out(readings, width), _copy_out(logs, width)])
+    rows = rows[np.argsort(rows[:, 0], kind='stable')]
+    x, table = rows[:, 0], rows[:, 1:]
+    tz = timezone.get_current_timezone()
+
+    series = {}
+    for column, m in enumerate(METRICS):
+        present = ~np.isnan(table[:, column])
+        xs, ys = x[present], table[present, column]
+        series[m] = [
+            {'t': datetime.fromtimestamp(xs[i], tz=tz).isoformat(), 'value': float(ys[i])}
+            for i in lttb(xs, ys, points)
+        ]
+    return series
+
+
+def environment_history(tree, bucket=None, start=None, end=None, points=DEFAULT_POINTS):
+    """
+    Chart payload for `tree`. `bucket` is '1h', '1d', '1w', 'raw' or None to
+    pick the finest bucket that fits `points`; the range defaults to the
+    first recorded value up to now.
+    """
+    end = end or timezone.now()
+    start = start or first_recorded(tree)
+    if start is None or start >= end:
+        return {'bucket': bucket, 'from': start and _iso(start), 'to': _iso(end), 'series': {m: [] for m in METRICS}}
+    bucket = bucket or pick_bucket(start, end, points)
+    if bucket == 'raw':
+        series = raw_series(tree, start, end, points)
+    else:
+        series = bucketed_series(tree, bucket, start, end)
+    return {'bucket': bucket, 'from': _iso(start), 'to': _iso(end), 'series': series}
@@ -0,0 +1,177 @@
+"""
+Live change events for dashboards (/api/events/, Server-Sent Events).
+
+Model signals call ``emit()``; each event is a small dict such as
+``{"type": "tree", "action": "saved", "ids": [5], "trees": [5]}`` (`trees`
+lists the trees whose view is affected, e.g. the owner of a new log).
+Events are published once the transaction commits and fanned out by an
+in-process hub to every open stream of this worker, each with its own
+bounded asyncio queue; a stream that falls too far behind gets a single
+``reset`` instead, telling the client to reload.
+
+The in-process hub only sees writes made by the same process. With
+``LIVE_EVENTS_BACKEND = 'postgres'`` events are sent with ``pg_notify``
+instead and a background thread per worker LISTENs and feeds its hub, so
+every worker (and changes from `process_thumbnails`) reach every dashboard.
+NOTIFY is transactional, so rolled-back writes never announce themselves.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHANNEL = 'mytree_events'
+DEFAULT_KEEPALIVE_SECONDS = 15
+# Events a slow stream may have waiting before it is told to reset
+QUEUE_SIZE = 1000
+# IDs per NOTIFY; payloads are limited to 8000 bytes
+NOTIFY_CHUNK = 300
+RESET = {'type': 'reset', 'action': 'reset', 'ids': [], 'trees': []}
+
+
+def backend():
+    return getattr(settings, 'LIVE_EVENTS_BACKEND', 'local')
+
+
+def channel():
+    return getattr(settings, 'LIVE_EVENTS_CHANNEL', DEFAULT_CHANNEL)
+
+
+def keepalive_seconds():
+    return getattr(settings, 'LIVE_EVENTS_KEEPALIVE_SECONDS', DEFAULT_KEEPALIVE_SECONDS)
+
+
+class Subscriber:
+    """One open event stream: a queue owned by the event loop serving it"""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def deliver(self, event):
+        # Runs on self.loop
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too far behind to catch up event by event
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESET)
+
+
+class EventHub:
+    """Thread-safe fan-out from publishers on any thread to subscribers on event loops"""
+
+    def __init__(self):
+        self.subscribers = set()
+        self.lock = threading.Lock()
+        self.listener = None
+
+    def subscribe(self, loop):
+        if backend() == 'postgres':
+            self.start_listener()
+        subscriber = Subscriber(loop)
+        with self.lock:
+            self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+
+    def publish(self, event):
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.deliver, event)
+            except RuntimeError:
+                # Loop already closed: the stream is gone
+                self.unsubscribe(subscriber)
+
+    def start_listener(self):
+        with self.lock:
+            if self.listener is None or not self.listener.is_alive():
+                self.listener = PostgresListener(self)
+                self.listener.start()
+
+
+hub = EventHub()
+
+
+class PostgresListener(threading.Thread):
+    """LISTENs on the events channel with a dedicated connection and republishes into the hub"""
+
+    daemon = True
+    max_backoff = 30
+
+    def __init__(self, hub):
+        super().__init__(name='live-events-listener')
+        self.hub = hub
+
+    def run(self):
+        backoff = 1
+        connected_before = False
+        while True:
+            try:
+                wrapper = connections['default']
+                conn = wrapper.get_new_connection(wrapper.get_connection_params())
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f'LISTEN {wrapper.ops.quote_name(channel())}')
+                if connected_before:
+                    # Notifications sent while disconnected are lost
+                    self.hub.publish(RESET)
+                connected_before, backoff = True, 1
+                self.listen(conn)
+            except Exception:
+                logger.exception("Live events listener lost its connection; retrying in %s s", backoff)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+
+    def listen(self, conn):
+        try:
+            while True:
+                if select.select([conn], [], [], keepalive_seconds()) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    notify = conn.notifies.pop(0)
+                    self.hub.publish(json.loads(notify.payload))
+        finally:
+            conn.close()
+
+
+def _notify(event):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_notify(%s, %s)', [channel(), json.dumps(event, separators=(',', ':'))])
+
+
+def emit(kind, action, ids=(), trees=()):
+    """
+    Announce a change to `kind` ('tree', 'log', 'image') rows `ids`, affecting
+    `trees`. Delivered only if the current transaction commits.
+    """
+    ids, trees = sorted(ids), sorted(tree for tree in set(trees) if tree is not None)
+    if backend() == 'postgres':
+        for start in range(0, max(len(ids), len(trees), 1), NOTIFY_CHUNK):
+            end = start + NOTIFY_CHUNK
+            _notify({'type': kind, 'action': action, 'ids': ids[start:end], 'trees': trees[start:end]})
+        return
+    event = {'type': kind, 'action': action, 'ids': ids, 'trees': trees}
+    transaction.on_commit(lambda: hub.publish(event))
+
+
+def emit_reset():
+    """Announce a change too broad to describe (import, media migration): clients reload"""
+    if backend() == 'postgres':
+        _notify(RESET)
+    else:
+        transaction.on_commit(lambda: hub.publish(RESET))
@@ -0,0 +1,183 @@
+"""
+Streaming export in the spreadsheet template layout (see trees.spreadsheet).
+
+Each sheet is a ``values_list`` over the template columns, read with
+``.iterator()`` (a server-side cursor on PostgreSQL), so neither model
+instances nor the whole result are ever held in memory. CSV is one sheet per
+file; XLSX is written through ``zipfile`` onto a sink that hands each
+compressed chunk back to the response as soon as it is produced.
+"""
+import csv
+import re
+import zipfile
+from datetime import date
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from .models import Batch, Image, Strain, Tree, TreeLog
+from .spreadsheet import SHEETS
+
+ITERATOR_CHUNK = 2000
+# Rows rendered per yield; keeps the number of tiny writes to the socket down
+ROWS_PER_CHUNK = 500
+
+# XML 1.0 can't carry most control characters, even escaped
+_XML_ILLEGAL = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+
+def sheet_queryset(sheet):
+    """Rows of `sheet` as tuples in template column order"""
+    columns = SHEETS[sheet]
+    if sheet == 'TreeImages':
+        return Tree.images.through.objects.order_by('tree_id', 'image_id').values_list(*columns)
+    model = {'Strains': Strain, 'Batches': Batch, 'Images': Image, 'Trees': Tree, 'TreeLogs': TreeLog}[sheet]
+    return model.objects.order_by('pk').values_list(*columns)
+
+
+def iter_rows(sheet):
+    return sheet_queryset(sheet).iterator(chunk_size=ITERATOR_CHUNK)
+
+
+def _text(value):
+    """Cell text that trees.importer reads back unchanged"""
+    if value is None:
+        return ''
+    if isinstance(value, date):
+        # Datetimes keep the database's UTC offset; localtime() per cell costs more than the rest of the row
+        return value.isoformat()
+    return str(value)
+
+
+# -- CSV --
+
+class _Line:
+    """File-like target for csv.writer that just returns what was written"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(sheet):
+    """Yield the CSV export of `sheet` (UTF-8 with BOM so Excel shows Thai text)"""
+    writer = csv.writer(_Line())
+    yield '\ufeff' + writer.writerow(SHEETS[sheet])
+    lines = []
+    for row in iter_rows(sheet):
+        lines.append(writer.writerow([_text(value) for value in row]))
+        if len(lines) >= ROWS_PER_CHUNK:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+# -- XLSX --
+
+class _Sink:
+    """Unseekable write target; zipfile then streams entries with data descriptors"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _cell(value):
+    if value is None:
+        return '<c/>'
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return f'<c><v>{value}</v></c>'
+    text = _XML_ILLEGAL.sub('', escape(_text(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _row(values):
+    return '<row>' + ''.join(_cell(value) for value in values) + '</row>'
+
+
+WORKSHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+WORKSHEET_TAIL = '</sheetData></worksheet>'
+
+
+def _package_parts(sheets):
+    """The small fixed parts of the workbook around the worksheets"""
+    worksheet_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml'
+    rel_type = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+    overrides = ''.join(
+        f'<Override PartName="/xl/worksheets/sheet{i}.xml" ContentType="{worksheet_type}"/>'
+        for i in range(1, len(sheets) + 1)
+    )
+    return {
+        '[Content_Types].xml': (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            f'{overrides}</Types>'
+        ),
+        '_rels/.rels': (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'<Relationship Id="rId1" Type="{rel_type}/officeDocument" Target="xl/workbook.xml"/>'
+            '</Relationships>'
+        ),
+        'xl/workbook.xml': (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            f'xmlns:r="{rel_type}"><sheets>'
+            + ''.join(
+                f'<sheet name="{name}" sheetId="{i}" r:id="rId{i}"/>' for i, name in enumerate(sheets, start=1)
+            )
+            + '</sheets></workbook>'
+        ),
+        'xl/_rels/workbook.xml.rels': (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            + ''.join(
+                f'<Relationship Id="rId{i}" Type="{rel_type}/worksheet" Target="worksheets/sheet{i}.xml"/>'
+                for i in range(1, len(sheets) + 1)
+            )
+            + '</Relationships>'
+        ),
+    }
+
+
+def stream_xlsx(sheets):
+    """Yield an .xlsx holding `sheets`, one compressed chunk at a time"""
+    sink = _Sink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as workbook:
+        for name, content in _package_parts(sheets).items():
+            workbook.writestr(name, content)
+        yield sink.drain()
+
+        for i, sheet in enumerate(sheets, start=1):
+            # force_zip64: the entry size isn't known up front and may pass 4 GiB
+            with workbook.open(f'xl/worksheets/sheet{i}.xml', 'w', force_zip64=True) as part:
+                part.write((WORKSHEET_HEAD + _row(SHEETS[sheet])).encode())
+                rows = []
+                for values in iter_rows(sheet):
+                    rows.append(_row(values))
+                    if len(rows) >= ROWS_PER_CHUNK:
+                        part.write(''.join(rows).encode())
+                        rows = []
+                        data = sink.drain()
+                        if data:
+                            yield data
+                part.write((''.join(rows) + WORKSHEET_TAIL).encode())
+            yield sink.drain()
+    yield sink.drain()  # Central directory, written on close
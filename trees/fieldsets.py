@@ -0,0 +1,121 @@
+"""
+Sparse fieldsets for tree responses (``?fields=``, ``?omit=``, ``?expand=``).
+
+The serializer does the cutting (serializers.SparseFieldsMixin); this module
+parses the parameters and trims the query to what the remaining fields read:
+``.only()`` on the columns, ``select_related`` for nested rows, and prefetches
+limited to the columns of summary serializers. A field the planner can't map
+to columns leaves the query untouched, so an unusual field costs speed, never
+correctness.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+from .serializers import TreeLogSerializer
+
+FIELDSET_PARAMS = ('fields', 'omit', 'expand')
+
+
+class FieldsetError(ValueError):
+    pass
+
+
+def _names(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def parse_fieldset(query_params, serializer_class):
+    """
+    ``{fields, omit, expand}`` keyword arguments for `serializer_class` from
+    the query string; FieldsetError names anything it doesn't have.
+    """
+    available = serializer_class.field_names()
+    kwargs = {}
+    for param in FIELDSET_PARAMS:
+        if param not in query_params:
+            continue
+        names = _names(query_params[param])
+        allowed = serializer_class.expandable_fields if param == 'expand' else available
+        unknown = [name for name in names if name not in allowed]
+        if unknown:
+            raise FieldsetError(f"{param}: ไม่รู้จักฟิลด์ {', '.join(unknown)} (ใช้ได้: {', '.join(allowed)})")
+        kwargs[param] = names
+    if 'fields' in kwargs and not kwargs['fields']:
+        raise FieldsetError("fields: ต้องระบุอย่างน้อยหนึ่งฟิลด์")
+    return kwargs
+
+
+def _columns(serializer):
+    """Columns a nested serializer reads, or None if it needs whole rows"""
+    model = serializer.Meta.model
+    columns = []
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            return None
+        if not model_field.concrete or isinstance(field, serializers.BaseSerializer):
+            return None
+        columns.append(model_field.name)
+    return columns
+
+
+def _log_columns():
+    return [
+        field.source for field in TreeLogSerializer().fields.values()
+        if not isinstance(field, serializers.BaseSerializer)
+    ]
+
+
+def trim_queryset(queryset, serializer):
+    """
+    `queryset` (of `serializer`'s model) loading only what the serializer's
+    fields read, with the joins and prefetches they need and no others.
+    """
+    model = serializer.Meta.model
+    columns, related, prefetch = ['pk'], [], []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if name == 'latest_log':
+            # SerializerMethodField rendering TreeLogSerializer (images come from the prefetch)
+            columns.append('latest_log')
+            columns += [f'latest_log__{column}' for column in _log_columns()]
+            related.append('latest_log')
+            prefetch.append('latest_log__images')
+            continue
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            return queryset
+        if isinstance(field, serializers.ListSerializer) and model_field.one_to_many:
+            child_columns = _columns(field.child)
+            if child_columns is None:
+                prefetch.append(field.source)
+            else:
+                remote = model_field.field.name
+                prefetch.append(Prefetch(
+                    field.source,
+                    queryset=model_field.related_model.objects.only(*child_columns, remote),
+                ))
+        elif not model_field.concrete:
+            return queryset
+        elif isinstance(field, serializers.BaseSerializer):
+            columns.append(field.source)
+            related.append(field.source)
+            nested_columns = _columns(field)
+            if nested_columns is None:
+                columns += [f'{field.source}__{f.name}' for f in model_field.related_model._meta.concrete_fields]
+            else:
+                columns += [f'{field.source}__{column}' for column in nested_columns]
+        else:
+            # Plain columns, and foreign keys rendered as IDs (no join)
+            columns.append(field.source)
+    queryset = queryset.only(*columns)
+    if related:
+        # select_related() without arguments would follow every foreign key
+        queryset = queryset.select_related(*related)
+    return queryset.prefetch_related(*prefetch)
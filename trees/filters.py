@@ -0,0 +1,72 @@
+import django_filters
+from django.db.models import Q
+from rest_framework.filters import SearchFilter
+
+from .models import Tree
+
+
+class NumberInFilter(django_filters.BaseInFilter, django_filters.NumberFilter):
+    pass
+
+
+class CharInFilter(django_filters.BaseInFilter, django_filters.CharFilter):
+    pass
+
+
+class IndexedSearchFilter(SearchFilter):
+    """
+    ``?search=`` as case-insensitive substring matches, like SearchFilter, but
+    a ``relation__field`` entry is looked up first (strains and batches are
+    small) and becomes ``relation__in`` those IDs instead of a join. Every
+    branch of the OR is then an indexable condition on the searched table, so
+    the planner can BitmapOr the trigram index of each column with the FK
+    indexes instead of scanning the join. (An IN subquery inside an OR would
+    stay a per-row filter.) Only plain field names are supported in
+    `search_fields` (no ``^``/``=``/``@``/``$``).
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        search_terms = self.get_search_terms(request)
+        if not search_fields or not search_terms:
+            return queryset
+        for term in search_terms:
+            condition = Q()
+            for field in search_fields:
+                relation, _, name = field.partition('__')
+                if name:
+                    related = queryset.model._meta.get_field(relation).related_model
+                    matches = related._base_manager.filter(**{f'{name}__icontains': term})
+                    condition |= Q(**{f'{relation}__in': list(matches.values_list('pk', flat=True))})
+                else:
+                    condition |= Q(**{f'{field}__icontains': term})
+            queryset = queryset.filter(condition)
+        return queryset
+
+
+class TreeFilter(django_filters.FilterSet):
+    """
+    Query-string filters for /api/trees/.
+
+    List filters take comma-separated values (`?status=มีชีวิต,ตายแล้ว`),
+    date ranges use `_after` / `_before` suffixes (`?plant_date_after=2025-01-01`).
+    """
+    strain = NumberInFilter(field_name='strain_id', lookup_expr='in')
+    batch = NumberInFilter(field_name='batch_id', lookup_expr='in')
+    status = CharInFilter(lookup_expr='in')
+    sex = CharInFilter(lookup_expr='in')
+    growth_stage = CharInFilter(lookup_expr='in')
+    plant_date = django_filters.DateFromToRangeFilter()
+    harvest_date = django_filters.DateFromToRangeFilter()
+    parent_male = NumberInFilter(field_name='parent_male_id', lookup_expr='in')
+    parent_female = NumberInFilter(field_name='parent_female_id', lookup_expr='in')
+    clone_source = NumberInFilter(field_name='clone_source_id', lookup_expr='in')
+    pollinated_by = NumberInFilter(field_name='pollinated_by_id', lookup_expr='in')
+
+    class Meta:
+        model = Tree
+        fields = [
+            'strain', 'batch', 'status', 'sex', 'growth_stage',
+            'plant_date', 'harvest_date',
+            'parent_male', 'parent_female', 'clone_source', 'pollinated_by',
+        ]
@@ -0,0 +1,495 @@
+"""
+Bulk import of the spreadsheet template (see trees.spreadsheet).
+
+Sheets are processed in dependency order: Strains, Batches, Images, Trees,
+TreeImages, TreeLogs. Rows are streamed, cleaned with the model fields' own validation
+and written in chunks, all inside one transaction: each chunk is loaded with
+``COPY`` into a staging table (trees.copying) and moved with one
+``INSERT … ON CONFLICT (id) DO UPDATE``. Timestamps (`created_at` /
+`updated_at` / `uploaded_at`) keep the values from the file.
+References (`strain_id`, `batch_id`, parent IDs, TreeImages pairs) are
+resolved against in-memory dictionaries of known IDs, never per-row queries.
+
+IDs from the file are kept so parent links and TreeImages can refer to them.
+A row whose ID is already in the database updates that row (only the
+columns the sheet has), so a file from /api/export/ imports back in place.
+A tree may name a parent further down the sheet; those links are checked once
+the whole sheet is in and cleared, with a row error, if the parent never
+turned up. PostgreSQL foreign keys are deferred, so the forward reference is
+legal until commit.
+
+A row that fails validation is skipped and reported; the rest still import.
+"""
+import json
+import re
+from datetime import datetime
+from functools import lru_cache
+
+from django.core.exceptions import SuspiciousFileOperation, ValidationError
+from django.core.files.storage import default_storage
+from django.core.management.color import no_style
+from django.db import connection, models, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .caching import bump_versions
+from .copying import copy_rows, create_staging
+from .events import emit_reset
+from .models import Batch, Image, Strain, Tombstone, Tree, TreeLog
+from .spreadsheet import SHEETS, excel_serial_to_datetime
+
+CHUNK_SIZE = 2000
+MAX_REPORTED_ERRORS = 1000
+
+TREE_LINKS = ('parent_male', 'parent_female', 'clone_source', 'pollinated_by')
+TREE_TIMESTAMPS = ('created_at', 'updated_at')
+LOOKUP_KEYS = {Strain: 'name', Batch: 'batch_code'}
+
+TEXT_FIELDS = ('CharField', 'TextField', 'FileField', 'ImageField')
+
+_INTEGRAL = re.compile(r'^-?\d+(\.0*)?$')
+_NUMBER = re.compile(r'^-?\d+(\.\d+)?$')
+
+
+class RowError(Exception):
+    """A single row can't be imported"""
+
+    def __init__(self, column, message):
+        super().__init__(message)
+        self.column = column
+        self.message = message
+
+
+def _text(value):
+    return '' if value is None else str(value).strip()
+
+
+@lru_cache(maxsize=None)
+def _field(model, name):
+    field = model._meta.get_field(name)
+    return field, field.get_internal_type()
+
+
+def _clean(model, name, value):
+    """Convert a cell with the model field's own parsing and validators"""
+    field, kind = _field(model, name)
+    value = _text(value)
+    if value == '':
+        if field.has_default():
+            return field.get_default()
+        if not field.blank:
+            raise RowError(name, 'ต้องระบุค่า')
+        # Optional, or an auto_now timestamp the caller fills in
+        return '' if kind in TEXT_FIELDS and not field.null else None
+    if kind in TEXT_FIELDS and not field.choices:
+        # Free text needs only the length check; skips field.clean on most cells
+        if field.max_length and len(value) > field.max_length:
+            raise RowError(name, f'ยาวเกิน {field.max_length} ตัวอักษร')
+        return value
+    if kind in ('DateField', 'DateTimeField') and _NUMBER.match(value):
+        # Date-formatted XLSX cells hold the Excel serial number
+        value = excel_serial_to_datetime(value)
+        if kind == 'DateField':
+            value = value.date()
+    elif kind.endswith('IntegerField') and _INTEGRAL.match(value):
+        value = value.split('.')[0]  # "12.0" from a numeric XLSX cell
+    try:
+        value = field.clean(value, None)
+    except ValidationError as e:
+        raise RowError(name, ' '.join(e.messages))
+    if isinstance(value, datetime) and timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def _id(column, value, required=False):
+    """Parse an ID cell; None when empty"""
+    value = _text(value)
+    if not value:
+        if required:
+            raise RowError(column, 'ต้องระบุค่า')
+        return None
+    if not _INTEGRAL.match(value) or int(value.split('.')[0]) <= 0:
+        raise RowError(column, f'รหัส "{value}" ต้องเป็นจำนวนเต็มบวก')
+    return int(value.split('.')[0])
+
+
+def _media_name(column, value, required=False):
+    """A file cell: a path relative to MEDIA_ROOT that stays inside it and exists"""
+    name = _text(value).replace('\\', '/')
+    if not name:
+        if required:
+            raise RowError(column, 'ต้องระบุ path ของไฟล์รูป')
+        return None
+    if name.startswith('/') or '..' in name.split('/'):
+        raise RowError(column, f'path "{name}" ต้องอยู่ภายในโฟลเดอร์ media')
+    try:
+        default_storage.path(name)
+    except SuspiciousFileOperation:
+        raise RowError(column, f'path "{name}" ต้องอยู่ภายในโฟลเดอร์ media')
+    if not default_storage.exists(name):
+        raise RowError(column, f'ไม่พบไฟล์ "{name}" ในโฟลเดอร์ media')
+    return name
+
+
+def _update_from_values(model, fields, rows, where=''):
+    """
+    ``UPDATE … FROM (VALUES …)`` for `rows` of ``(pk, *values)``: one statement
+    per chunk, where bulk_update would build a CASE expression per row.
+    """
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    columns = [quote(model._meta.get_field(name).column) for name in fields]
+    casts = ', '.join(f'%s::{model._meta.get_field(name).db_type(connection)}' for name in fields)
+    assignments = ', '.join(f'{column} = v.{column}' for column in columns)
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), CHUNK_SIZE):
+            chunk = rows[start:start + CHUNK_SIZE]
+            values = ', '.join([f'(%s::bigint, {casts})'] * len(chunk))
+            cursor.execute(
+                f'UPDATE {table} SET {assignments} FROM (VALUES {values}) AS v(id, {", ".join(columns)}) '
+                f'WHERE {table}.id = v.id {where}',
+                [value for row in chunk for value in row],
+            )
+
+
+def _db_value(field, obj):
+    """What the raw insert would write for `field`: no pre_save, so auto_now leaves the file's timestamps"""
+    value = getattr(obj, field.attname)
+    if isinstance(field, models.JSONField):
+        return json.dumps(value, cls=field.encoder)
+    return field.get_db_prep_save(value, connection)
+
+
+def _upsert(model, objs, update):
+    """
+    COPY `objs` into a staging table, then insert them; rows whose ID exists
+    get the `update` fields instead. Returns ``(created, updated)``.
+    """
+    quote = connection.ops.quote_name
+    fields = [field for field in model._meta.concrete_fields if not field.generated]
+    columns = [field.column for field in fields]
+    names = ', '.join(quote(column) for column in columns)
+    table, staging = model._meta.db_table, f'import_{model._meta.db_table}'
+    assignments = ', '.join(
+        f'{column} = EXCLUDED.{column}' for column in (quote(model._meta.get_field(name).column) for name in update)
+    )
+    create_staging(staging, table, columns)
+    copy_rows(([_db_value(field, obj) for field in fields] for obj in objs), staging, columns)
+    with connection.cursor() as cursor:
+        # xmax is 0 on a freshly inserted row version, set on one rewritten by DO UPDATE
+        cursor.execute(
+            f'INSERT INTO {quote(table)} ({names}) SELECT {names} FROM {quote(staging)} '
+            f'ON CONFLICT (id) DO UPDATE SET {assignments} RETURNING xmax = 0',
+        )
+        inserted = [row[0] for row in cursor.fetchall()]
+    return inserted.count(True), inserted.count(False)
+
+
+def _next_ids(model, count):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)',
+            [model._meta.db_table, model._meta.pk.column, count],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _reset_sequences(model):
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), [model]):
+            cursor.execute(sql)
+
+
+class Importer:
+    """One import run; `run()` takes ``{sheet: rows}`` from the trees.spreadsheet readers"""
+
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.sheets = {}
+        self.errors = []
+        self.error_count = 0
+        self._ids = {}     # model -> {file ID: database ID}
+        self._names = {}   # model -> {name: database ID} (Strain, Batch)
+        self._claimed = {}  # model -> IDs given by rows of this run
+
+    def run(self, sources):
+        """Import ``{sheet: iterable of (row_number, {column: value})}`` and return the report"""
+        unknown = set(sources) - set(SHEETS)
+        if unknown:
+            raise ValueError(f'ไม่รู้จักชีต {", ".join(sorted(unknown))}')
+        steps = {
+            'Strains': self.import_strains,
+            'Batches': self.import_batches,
+            'Images': self.import_images,
+            'Trees': self.import_trees,
+            'TreeImages': self.import_tree_images,
+            'TreeLogs': self.import_tree_logs,
+        }
+        with transaction.atomic():
+            for sheet in SHEETS:
+                if sheet in sources:
+                    self.counts(sheet)
+                    steps[sheet](sheet, sources[sheet])
+            if self.dry_run:
+                transaction.set_rollback(True)
+            else:
+                bump_versions(Strain, Batch, Image, Tree, TreeLog)
+                # Imported rows keep the file's timestamps, so delta sync can't find them by updated_at
+                Tombstone.reset([Strain, Batch, Image, Tree, TreeLog])
+                emit_reset()
+        return {
+            'dry_run': self.dry_run,
+            'sheets': self.sheets,
+            'error_count': self.error_count,
+            'errors': self.errors,
+        }
+
+    # -- bookkeeping --
+
+    def counts(self, sheet):
+        return self.sheets.setdefault(sheet, {'created': 0, 'updated': 0, 'matched': 0, 'skipped': 0})
+
+    def error(self, sheet, row, column, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'sheet': sheet, 'row': row, 'column': column, 'error': message})
+
+    def known_ids(self, model):
+        """{file ID: database ID} for `model`, seeded with the rows already in the database"""
+        if model not in self._ids:
+            self._ids[model] = {pk: pk for pk in model.objects.values_list('pk', flat=True).iterator()}
+        return self._ids[model]
+
+    def known_names(self, model):
+        if model not in self._names:
+            self._names[model] = dict(model.objects.values_list(LOOKUP_KEYS[model], 'pk'))
+        return self._names[model]
+
+    def _build(self, sheet, rows, build):
+        """Yield what `build(row_number, row)` returns, reporting and skipping rows that raise RowError"""
+        counts = self.counts(sheet)
+        for number, row in rows:
+            try:
+                obj = build(number, row)
+            except RowError as e:
+                self.error(sheet, number, e.column, e.message)
+                counts['skipped'] += 1
+                continue
+            if obj is None:
+                continue
+            if obj.pk:
+                # Claimed now so a duplicate ID further down is caught before its chunk is written
+                self.known_ids(type(obj))[obj.pk] = obj.pk
+                self._claimed.setdefault(type(obj), set()).add(obj.pk)
+            yield obj
+
+    def _insert(self, model, sheet, objects, update):
+        """
+        Upsert in chunks; existing rows get the `update` fields. Rows with an
+        ID from the file go first; the rest then draw IDs from the sequence,
+        moved past the file's IDs, so they can't collide with one further down.
+        """
+        counts = self.counts(sheet)
+        ids = self.known_ids(model)
+        chunk, later = [], []
+
+        def flush(batch):
+            created, updated = _upsert(model, batch, update)
+            counts['created'] += created
+            counts['updated'] += updated
+
+        for obj in objects:
+            (chunk if obj.pk else later).append(obj)
+            if len(chunk) >= CHUNK_SIZE:
+                flush(chunk)
+                chunk = []
+        if chunk:
+            flush(chunk)
+        _reset_sequences(model)
+        if later:
+            for obj, pk in zip(later, _next_ids(model, len(later))):
+                obj.pk = ids[pk] = pk
+            for start in range(0, len(later), CHUNK_SIZE):
+                flush(later[start:start + CHUNK_SIZE])
+
+    def _new_id(self, model, value):
+        """The row's own ID; one already in the database means the row updates it"""
+        pk = _id('id', value)
+        if pk in self._claimed.get(model, ()):
+            raise RowError('id', f'รหัส {pk} ซ้ำกับแถวก่อนหน้า')
+        return pk
+
+    def _resolve(self, model, column, value, required=False):
+        """A reference cell: a file/database ID or, for strains and batches, the name"""
+        text = _text(value)
+        if not text:
+            if required:
+                raise RowError(column, 'ต้องระบุค่า')
+            return None
+        if model in LOOKUP_KEYS and text in self.known_names(model):
+            return self.known_names(model)[text]
+        if not _INTEGRAL.match(text):
+            raise RowError(column, f'ไม่พบ "{text}"')
+        pk = self.known_ids(model).get(int(text.split('.')[0]))
+        if pk is None:
+            raise RowError(column, f'ไม่พบรหัส {text}')
+        return pk
+
+    # -- sheets --
+
+    def _import_lookup(self, sheet, rows, model):
+        """Strains/Batches: a row whose name already exists maps onto that row instead of failing"""
+        key = LOOKUP_KEYS[model]
+        ids, names = self.known_ids(model), self.known_names(model)
+        counts = self.counts(sheet)
+        seen = {}
+        started = timezone.now()
+
+        def build(number, row):
+            name = _clean(model, key, row.get(key))
+            if not name:
+                raise RowError(key, 'ต้องระบุค่า')
+            if name in seen:
+                raise RowError(key, f'"{name}" ซ้ำกับแถวที่ {seen[name]}')
+            seen[name] = number
+            file_id = _id('id', row.get('id'))
+            if name in names and names[name] != file_id:
+                # Same name under another ID: the file's ID refers to the existing row
+                if file_id and file_id not in ids:
+                    ids[file_id] = names[name]
+                counts['matched'] += 1
+                return None
+            fields = {column: _clean(model, column, row.get(column)) for column in SHEETS[sheet][1:]}
+            # The sheet has no updated_at column and the raw insert skips auto_now
+            return model(pk=self._new_id(model, row.get('id')), updated_at=started, **fields)
+
+        # A few hundred rows at most, so kept whole to record the new names
+        written = list(self._build(sheet, rows, build))
+        self._insert(model, sheet, written, [*SHEETS[sheet][1:], 'updated_at'])
+        names.update((getattr(obj, key), obj.pk) for obj in written)
+
+    def import_strains(self, sheet, rows):
+        self._import_lookup(sheet, rows, Strain)
+
+    def import_batches(self, sheet, rows):
+        self._import_lookup(sheet, rows, Batch)
+
+    def import_images(self, sheet, rows):
+        """Rows point at files already under MEDIA_ROOT; process_thumbnails renders them later"""
+        started = timezone.now()
+
+        def build(number, row):
+            image = Image(
+                pk=self._new_id(Image, row.get('id')),
+                image=_media_name('image', row.get('image'), required=True),
+                thumbnail=_media_name('thumbnail', row.get('thumbnail')),
+                uploaded_at=_clean(Image, 'uploaded_at', row.get('uploaded_at')) or started,
+            )
+            image.updated_at = started
+            return image
+
+        self._insert(Image, sheet, self._build(sheet, rows, build), [*SHEETS[sheet][1:], 'updated_at'])
+
+    def import_trees(self, sheet, rows):
+        tree_ids = self.known_ids(Tree)
+        # (row number, tree ID or the Tree until it has one, relation, referenced ID)
+        links = []
+        started = timezone.now()
+        plain = [
+            column for column in SHEETS[sheet]
+            if column not in ('id', 'strain_id', 'batch_id', *TREE_TIMESTAMPS)
+            and column[:-3] not in TREE_LINKS
+        ]
+
+        def build(number, row):
+            tree = Tree(
+                pk=self._new_id(Tree, row.get('id')),
+                strain_id=self._resolve(Strain, 'strain_id', row.get('strain_id'), required=True),
+                batch_id=self._resolve(Batch, 'batch_id', row.get('batch_id')),
+                **{column: _clean(Tree, column, row.get(column)) for column in plain},
+            )
+            for relation in TREE_LINKS:
+                ref = _id(f'{relation}_id', row.get(f'{relation}_id'))
+                if ref is None:
+                    continue
+                if ref in tree_ids:
+                    setattr(tree, f'{relation}_id', tree_ids[ref])
+                else:
+                    # Maybe a parent further down the sheet; checked once all rows are in
+                    setattr(tree, f'{relation}_id', ref)
+                    links.append((number, tree.pk or tree, relation, ref))
+            created_at, updated_at = (_clean(Tree, column, row.get(column)) for column in TREE_TIMESTAMPS)
+            tree.created_at = created_at or started
+            tree.updated_at = updated_at or tree.created_at
+            return tree
+
+        self._insert(Tree, sheet, self._build(sheet, rows, build), SHEETS[sheet][1:])
+
+        broken = {}
+        for number, tree, relation, ref in links:
+            tree = getattr(tree, 'pk', tree)
+            if ref == tree:
+                self.error(sheet, number, f'{relation}_id', 'ต้นไม้อ้างอิงตัวเองไม่ได้')
+            elif ref not in tree_ids:
+                self.error(sheet, number, f'{relation}_id', f'ไม่พบต้นไม้รหัส {ref}')
+            else:
+                continue
+            broken.setdefault(relation, []).append(tree)
+        for relation, pks in broken.items():
+            for start in range(0, len(pks), CHUNK_SIZE):
+                Tree.objects.filter(pk__in=pks[start:start + CHUNK_SIZE]).update(**{relation: None})
+
+    def import_tree_images(self, sheet, rows):
+        """Link rows go into Tree.images; an image with no owner also becomes the tree's own"""
+        through = Tree.images.through
+        counts = self.counts(sheet)
+        seen = set()
+        batch = []
+
+        def build(number, row):
+            tree_id = self._resolve(Tree, 'tree_id', row.get('tree_id'), required=True)
+            image_id = self._resolve(Image, 'image_id', row.get('image_id'), required=True)
+            if (tree_id, image_id) in seen:
+                counts['matched'] += 1
+                return None
+            seen.add((tree_id, image_id))
+            return through(tree_id=tree_id, image_id=image_id)
+
+        def flush():
+            through.objects.bulk_create(batch, ignore_conflicts=True)
+            counts['created'] += len(batch)
+            _update_from_values(
+                Image, ['tree'], [(link.image_id, link.tree_id) for link in batch],
+                where=f'AND {connection.ops.quote_name(Image._meta.db_table)}.tree_id IS NULL',
+            )
+            batch.clear()
+
+        for link in self._build(sheet, rows, build):
+            batch.append(link)
+            if len(batch) >= CHUNK_SIZE:
+                flush()
+        if batch:
+            flush()
+
+    def import_tree_logs(self, sheet, rows):
+        """Journal entries; Tree.latest_log is refreshed once per affected tree afterwards"""
+        started = timezone.now()
+        trees = set()
+        plain = [column for column in SHEETS[sheet] if column not in ('id', 'tree_id', 'created_at', 'updated_at')]
+
+        def build(number, row):
+            log = TreeLog(
+                pk=self._new_id(TreeLog, row.get('id')),
+                tree_id=self._resolve(Tree, 'tree_id', row.get('tree_id'), required=True),
+                **{column: _clean(TreeLog, column, row.get(column)) for column in plain},
+            )
+            log.created_at = _clean(TreeLog, 'created_at', row.get('created_at')) or started
+            log.updated_at = _clean(TreeLog, 'updated_at', row.get('updated_at')) or log.created_at
+            trees.add(log.tree_id)
+            return log
+
+        self._insert(TreeLog, sheet, self._build(sheet, rows, build), SHEETS[sheet][1:])
+        tree_ids = sorted(trees)
+        for start in range(0, len(tree_ids), CHUNK_SIZE):
+            TreeLog.refresh_latest_for(Q(pk__in=tree_ids[start:start + CHUNK_SIZE]))
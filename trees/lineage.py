@@ -0,0 +1,70 @@
+"""
+Pedigree walks over Tree's self-referencing FKs with one recursive SQL query.
+
+An edge always points from parent to child; `relation` names the FK on the
+child that holds it. Walking "up" follows FKs from a tree to its ancestors,
+walking "down" follows them backwards to its descendants. The recursive term
+joins the tree table itself for every tree it reaches, so each step is an
+index lookup: the primary key going up, and one lookup per FK index going
+down. No edge list of the whole table is ever built.
+"""
+from django.db import connection
+
+from .models import Tree
+
+LINEAGE_RELATIONS = ('parent_male', 'parent_female', 'clone_source', 'pollinated_by')
+
+
+def _step_sql(node, direction, relations):
+    """(child, parent, relation) for the edges of the tree whose ID is the SQL expression `node`"""
+    table = connection.ops.quote_name(Tree._meta.db_table)
+    if direction == 'up':
+        # One row per FK of the tree, read with a single primary key lookup
+        values = ', '.join(f"('{relation}'::text, t.{relation}_id)" for relation in relations)
+        return (
+            f'SELECT t.id AS child, e.parent, e.relation FROM {table} t '
+            f'CROSS JOIN LATERAL (VALUES {values}) AS e(relation, parent) '
+            f'WHERE t.id = {node} AND e.parent IS NOT NULL'
+        )
+    # One branch per FK so each uses that FK's index
+    return ' UNION ALL '.join(
+        f"SELECT t.id AS child, t.{relation}_id AS parent, '{relation}'::text AS relation "
+        f'FROM {table} t WHERE t.{relation}_id = {node}'
+        for relation in relations
+    )
+
+
+def walk_lineage(root_ids, depth, direction='up', relations=LINEAGE_RELATIONS):
+    """
+    Edges reachable from the trees in `root_ids` within `depth` generations.
+
+    Returns ``(edges, depths)``: ``[(parent, child, relation)]`` and
+    ``{tree_id: generations from the nearest root}`` (0 for roots, shortest path).
+    """
+    root_ids = list(root_ids)
+    far = 'parent' if direction == 'up' else 'child'
+    roots = ', '.join(['(%s)'] * len(root_ids))
+    sql = f"""
+        WITH RECURSIVE walk(child, parent, relation, depth) AS (
+            SELECT e.child, e.parent, e.relation, 1
+            FROM (VALUES {roots}) AS r(id)
+            CROSS JOIN LATERAL ({_step_sql('r.id', direction, relations)}) AS e
+            UNION
+            SELECT e.child, e.parent, e.relation, w.depth + 1
+            FROM walk w
+            CROSS JOIN LATERAL ({_step_sql(f'w.{far}', direction, relations)}) AS e
+            WHERE w.depth < %s
+        )
+        SELECT parent, child, relation, MIN(depth) FROM walk GROUP BY parent, child, relation
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*root_ids, depth])
+        rows = cursor.fetchall()
+
+    depths = dict.fromkeys(root_ids, 0)
+    edges = []
+    for parent, child, relation, step in sorted(rows, key=lambda row: row[3]):
+        edges.append((parent, child, relation))
+        node = parent if direction == 'up' else child
+        depths[node] = min(depths.get(node, step), step)
+    return edges, depths
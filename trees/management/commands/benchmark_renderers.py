@@ -0,0 +1,72 @@
+import io
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from trees.models import Tree
+from trees.renderers import MessagePackParser, MessagePackRenderer, ORJSONParser, ORJSONRenderer
+from trees.serializers import TreeSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the API renderers and parsers on a list of full tree payloads "
+        "(nested strain, batch, images and latest log, with their Decimal fields): "
+        "DRF's stock JSON against orjson and MessagePack. Trees are read from the "
+        "database and repeated if there are fewer than --trees."
+    )
+
+    formats = [
+        ('json (stdlib)', JSONRenderer, JSONParser),
+        ('json (orjson)', ORJSONRenderer, ORJSONParser),
+        ('msgpack', MessagePackRenderer, MessagePackParser),
+    ]
+
+    def add_arguments(self, parser):
+        parser.add_argument('--trees', type=int, default=10_000, help="Trees in the list")
+        parser.add_argument('--repeat', type=int, default=5, help="Runs per format; the best is reported")
+
+    @staticmethod
+    def _best(func, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
+
+    def handle(self, *args, **options):
+        count, repeat = options['trees'], max(1, options['repeat'])
+        trees = list(
+            Tree.objects.select_related('strain', 'batch', 'latest_log')
+            .prefetch_related('images_set', 'latest_log__images')
+            .order_by('-created_at', 'id')[:count]
+        )
+        if not trees:
+            raise CommandError("No trees in the database to benchmark with")
+
+        context = {'request': APIRequestFactory().get('/api/trees/')}
+        start = time.perf_counter()
+        rows = TreeSerializer(trees, many=True, context=context).data
+        serialize = time.perf_counter() - start
+        data = [rows[i % len(rows)] for i in range(count)]
+        self.stdout.write(
+            f"{count} trees ({len(rows)} distinct), serialised in {serialize * 1000:.0f} ms; best of {repeat}:"
+        )
+
+        baseline = None
+        for label, renderer_class, parser_class in self.formats:
+            renderer, parser = renderer_class(), parser_class()
+            render, body = self._best(lambda: renderer.render(data, renderer.media_type), repeat)
+            parse, _ = self._best(lambda: parser.parse(io.BytesIO(body), parser.media_type), repeat)
+            if baseline is None:
+                baseline = (render, parse)
+            self.stdout.write(
+                f"  {label:<14} {len(body) / 1024:>9.0f} KiB"
+                f"  render {render * 1000:>7.1f} ms ({baseline[0] / render:4.1f}x)"
+                f"  parse {parse * 1000:>7.1f} ms ({baseline[1] / parse:4.1f}x)"
+            )
@@ -0,0 +1,70 @@
+import time
+from contextlib import ExitStack
+
+from django.core.management.base import BaseCommand, CommandError
+
+from trees.importer import Importer
+from trees.spreadsheet import SHEETS, SpreadsheetError, read_spreadsheet
+
+
+class Command(BaseCommand):
+    help = (
+        "Import strains, batches, images, trees and tree-image links from the "
+        "spreadsheet template (scripts/make_excel_template.py or data-templates/*.csv). "
+        "Files are streamed row by row and inserted in bulk inside one transaction; "
+        "rows that fail validation are skipped and listed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'files', nargs='+',
+            help="An .xlsx workbook and/or .csv files named like data-templates/ (trees.csv, ...)",
+        )
+        parser.add_argument(
+            '--sheet', choices=list(SHEETS),
+            help="Sheet to import: the only sheet read from an .xlsx, or the sheet of a differently named .csv",
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Validate and report without saving anything",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        with ExitStack() as stack:
+            sources = {}
+            for path in options['files']:
+                try:
+                    file = stack.enter_context(open(path, 'rb'))
+                except OSError as e:
+                    raise CommandError(e)
+                try:
+                    found = read_spreadsheet(file, path, options['sheet'])
+                except SpreadsheetError as e:
+                    raise CommandError(f"{path}: {e}")
+                duplicated = set(found) & set(sources)
+                if duplicated:
+                    raise CommandError(f"{path}: sheet {', '.join(sorted(duplicated))} given twice")
+                sources.update(found)
+            try:
+                report = Importer(dry_run=options['dry_run']).run(sources)
+            except SpreadsheetError as e:
+                raise CommandError(e)
+
+        for sheet, counts in report['sheets'].items():
+            self.stdout.write(
+                f"{sheet}: {counts['created']} created, {counts['updated']} updated, {counts['matched']} matched, "
+                f"{counts['skipped']} skipped"
+            )
+        for error in report['errors']:
+            self.stderr.write(f"{error['sheet']} row {error['row']} [{error['column']}]: {error['error']}")
+        if report['error_count'] > len(report['errors']):
+            self.stderr.write(f"... and {report['error_count'] - len(report['errors'])} more errors")
+
+        elapsed = time.monotonic() - started
+        if options['dry_run']:
+            self.stdout.write(f"Dry run, nothing saved ({elapsed:.1f}s)")
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Import finished in {elapsed:.1f}s with {report['error_count']} row errors"
+            ))
@@ -0,0 +1,85 @@
+import os
+import re
+import shutil
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import JSONField, Q, TextField, Value
+from django.db.models.functions import Cast, Replace
+from django.utils import timezone
+
+from trees.caching import bump_versions
+from trees.events import emit_reset
+from trees.models import Image, tree_folder
+
+LEGACY_FOLDER_RE = re.compile(r'^.*_(\d+)$')
+
+
+class Command(BaseCommand):
+    help = (
+        "Move tree media from the old tree_images/<nickname>_<id>/ folders to "
+        "tree_images/<id>/. Each folder is moved with a single rename and its Image "
+        "rows are rewritten with one UPDATE."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="List the folders that would move without changing anything",
+        )
+
+    def handle(self, *args, **options):
+        images_root = os.path.join(settings.MEDIA_ROOT, 'tree_images')
+        if not os.path.isdir(images_root):
+            self.stdout.write("No tree_images folder, nothing to migrate")
+            return
+
+        moved = rows = 0
+        for entry in sorted(os.scandir(images_root), key=lambda e: e.name):
+            match = LEGACY_FOLDER_RE.match(entry.name)
+            if not entry.is_dir() or not match:
+                continue
+            old_prefix = f'tree_images/{entry.name}/'
+            new_prefix = f'{tree_folder(int(match.group(1)))}/'
+            if options['dry_run']:
+                self.stdout.write(f"{old_prefix} -> {new_prefix}")
+                moved += 1
+                continue
+
+            with transaction.atomic():
+                # Rows first: if the move fails the UPDATE rolls back with it
+                rows += self.rewrite_paths(old_prefix, new_prefix)
+                self.move_tree(entry.path, os.path.join(settings.MEDIA_ROOT, new_prefix))
+                bump_versions(Image)
+                emit_reset()
+            moved += 1
+
+        if options['dry_run']:
+            self.stdout.write(f"Folders to move: {moved}")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Folders moved: {moved}, image rows updated: {rows}"))
+
+    def rewrite_paths(self, old_prefix, new_prefix):
+        old, new = Value(old_prefix), Value(new_prefix)
+        return Image.objects.filter(
+            Q(image__startswith=old_prefix) | Q(thumbnail__startswith=old_prefix)
+        ).update(
+            image=Replace('image', old, new),
+            thumbnail=Replace('thumbnail', old, new),
+            renditions=Cast(Replace(Cast('renditions', TextField()), old, new), JSONField()),
+            updated_at=timezone.now(),
+        )
+
+    def move_tree(self, source, target):
+        """Rename `source` to `target`, merging entry by entry if `target` already exists"""
+        if not os.path.exists(target):
+            os.rename(source, target)
+            return
+        for entry in os.scandir(source):
+            destination = os.path.join(target, entry.name)
+            if entry.is_dir() and os.path.isdir(destination):
+                self.move_tree(entry.path, destination)
+            else:
+                shutil.move(entry.path, destination)
+        os.rmdir(source)
@@ -0,0 +1,96 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from trees.caching import bump_versions
+from trees.events import emit
+from trees.models import Image
+from trees.thumbnails import render_image_set
+
+
+class Command(BaseCommand):
+    help = (
+        "Drain the thumbnail queue (Image.thumbnail_status='pending') with a pool of "
+        "worker processes, rendering the thumbnail and every responsive rendition "
+        "from a single decode. Runs until stopped unless --once is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help="Number of decoder processes (default: CPU count)",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help="Images claimed per round (default: 4 x workers)",
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=2.0,
+            help="Seconds to sleep when the queue is empty",
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Exit once the queue is empty instead of polling",
+        )
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+        batch_size = options['batch_size'] or workers * 4
+        widths, formats = Image.rendition_config()
+        done = failed = 0
+
+        self.stdout.write(f"Thumbnail worker started with {workers} processes")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            try:
+                while True:
+                    jobs = Image.claim_thumbnail_jobs(batch_size)
+                    if not jobs:
+                        if options['once']:
+                            break
+                        time.sleep(options['poll_interval'])
+                        continue
+
+                    futures, by_blob = {}, {}
+                    for job in jobs:
+                        try:
+                            if not job.image:
+                                failed += self.mark_failed(job, "no image file")
+                            elif job.adopt_processed(commit=True):
+                                # Same content was already rendered for another upload
+                                done += 1
+                            elif job.blob_id in by_blob:
+                                by_blob[job.blob_id].append(job)
+                            else:
+                                future = pool.submit(render_image_set, job.image.path, widths, formats)
+                                futures[future] = [job]
+                                if job.blob_id:
+                                    by_blob[job.blob_id] = futures[future]
+                        except Exception as e:
+                            # e.g. a stored name outside MEDIA_ROOT: fail this image, not the worker
+                            failed += self.mark_failed(job, e)
+
+                    for future in as_completed(futures):
+                        first, *others = futures[future]
+                        try:
+                            first.store_rendered(future.result())
+                            done += 1
+                        except Exception as e:
+                            failed += sum(self.mark_failed(job, e) for job in futures[future])
+                            continue
+                        for job in others:
+                            job.adopt_processed(commit=True)
+                            done += 1
+            except KeyboardInterrupt:
+                pass
+
+        self.stdout.write(self.style.SUCCESS(f"Thumbnails created: {done}, failed: {failed}"))
+
+    def mark_failed(self, job, reason):
+        Image.objects.filter(pk=job.pk).update(thumbnail_status='failed', updated_at=timezone.now())
+        bump_versions(Image)
+        emit('image', 'saved', [job.pk], [job.tree_id])
+        self.stderr.write(f"Warning: Failed to create thumbnail for image {job.pk}: {reason}")
+        return 1
@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from trees.models import Tombstone
+from trees.sync import tombstone_days
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete Tombstone rows older than SYNC_TOMBSTONE_DAYS. Sync clients whose "
+        "token is older than that already receive a full snapshot, so the rows are "
+        "no longer read."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=None,
+            help="Keep this many days instead of SYNC_TOMBSTONE_DAYS",
+        )
+
+    def handle(self, *args, **options):
+        days = options['days'] if options['days'] is not None else tombstone_days()
+        cutoff = timezone.now() - timedelta(days=days)
+        deleted = Tombstone.objects.filter(deleted_at__lt=cutoff)._raw_delete(Tombstone.objects.db) or 0
+        self.stdout.write(self.style.SUCCESS(f"Tombstones removed: {deleted}"))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from trees.uploads import expire_uploads
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete resumable uploads that have received nothing for UPLOAD_EXPIRE_HOURS, "
+        "together with their partial files under UPLOAD_TEMP_DIR."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours', type=int, default=None,
+            help="Expire after this many idle hours instead of UPLOAD_EXPIRE_HOURS",
+        )
+
+    def handle(self, *args, **options):
+        removed = expire_uploads(options['hours'])
+        self.stdout.write(self.style.SUCCESS(f"Uploads removed: {removed}"))
@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from trees.models import DeletionJob
+
+
+class Command(BaseCommand):
+    help = (
+        "Remove the files of deleted trees queued in DeletionJob. Jobs normally run "
+        "in a background thread right after bulk_delete; this picks up any left "
+        "pending or interrupted (e.g. by a server restart)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=DeletionJob.SWEEP_WORKERS,
+            help="Parallel unlink threads per job",
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=10.0,
+            help="Seconds to sleep when no job is waiting",
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Exit once no job is waiting instead of polling",
+        )
+
+    def handle(self, *args, **options):
+        swept = 0
+        try:
+            while True:
+                job = DeletionJob.claim()
+                if job is None:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+                job.sweep(workers=max(1, options['workers']))
+                job.refresh_from_db()
+                swept += 1
+                self.stdout.write(
+                    f"Job {job.pk}: removed {job.files_removed}/{job.files_total} files"
+                    + (f", {job.files_failed} failed" if job.files_failed else "")
+                )
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f"Deletion jobs swept: {swept}"))
@@ -0,0 +1,163 @@
+"""
+Media files (MEDIA_URL) with byte ranges, validators and cache headers.
+
+Replaces ``django.conf.urls.static``, which only works with DEBUG and always
+sends the whole file. Here:
+
+* ``Range: bytes=…`` (one range; ``If-Range`` honoured) answers 206, so large
+  documents and original photos can be resumed and seeked.
+* ETag / Last-Modified come from the file's size and mtime; matching
+  conditional requests get 304.
+* Content-addressed names (MEDIA_IMMUTABLE_PREFIXES, the SHA-256 named
+  ``blobs/`` tree) are cached for a year as ``immutable``; everything else must
+  revalidate.
+* With ``MEDIA_ACCEL = 'x-accel-redirect'`` (nginx) or ``'x-sendfile'``
+  (Apache, lighttpd) the view only checks the path and sets the headers, and the
+  front-end server sends the bytes. Otherwise whole files go out through
+  FileResponse, which uses the WSGI server's sendfile wrapper where there is one.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+DEFAULT_IMMUTABLE_PREFIXES = ('blobs/',)
+DEFAULT_ACCEL_PREFIX = '/protected-media/'
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+CHUNK_SIZE = 64 * 1024
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def immutable_prefixes():
+    return tuple(getattr(settings, 'MEDIA_IMMUTABLE_PREFIXES', DEFAULT_IMMUTABLE_PREFIXES))
+
+
+def parse_range(header, size):
+    """
+    ``(start, end)`` (inclusive) for a single-range ``Range`` header, None to
+    send the whole file (absent, malformed or multi-range), or ValueError when
+    it can't be satisfied.
+    """
+    match = RANGE_RE.match(header.replace(' ', '')) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the final `last` bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or (last and int(last) < start):
+        raise ValueError(header)
+    return start, end
+
+
+def _read(path, start, length):
+    with open(path, 'rb') as handle:
+        handle.seek(start)
+        while length > 0:
+            chunk = handle.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _cache_headers(response, path, stat, etag):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Accept-Ranges'] = 'bytes'
+    if path.startswith(immutable_prefixes()):
+        response['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    else:
+        response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def _range_matches(request, etag, stat):
+    """If-Range: the range only applies if the client's copy is still current"""
+    condition = request.headers.get('If-Range')
+    if not condition:
+        return True
+    if condition.startswith(('"', 'W/')):
+        return condition == etag
+    modified = parse_http_date_safe(condition)
+    return modified is not None and int(stat.st_mtime) <= modified
+
+
+def _offload(path, full_path, content_type):
+    mode = getattr(settings, 'MEDIA_ACCEL', None)
+    if mode == 'x-accel-redirect':
+        response = HttpResponse(content_type=content_type)
+        prefix = getattr(settings, 'MEDIA_ACCEL_PREFIX', DEFAULT_ACCEL_PREFIX)
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(path)
+        return response
+    if mode == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = full_path
+        return response
+    return None
+
+
+@require_safe
+def serve_media(request, path):
+    """A file under MEDIA_ROOT, with Range, conditional GET and cache headers"""
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("ไม่พบไฟล์")
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404("ไม่พบไฟล์")
+    if not os.path.isfile(full_path):
+        raise Http404("ไม่พบไฟล์")
+
+    etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if not_modified is not None:
+        return _cache_headers(not_modified, path, stat, etag)
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+
+    offloaded = _offload(path, full_path, content_type)
+    if offloaded is not None:
+        # The front-end server handles Range itself
+        return _cache_headers(offloaded, path, stat, etag)
+
+    try:
+        byte_range = parse_range(request.headers.get('Range'), stat.st_size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return _cache_headers(response, path, stat, etag)
+
+    if byte_range is None or not _range_matches(request, etag, stat):
+        response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            _read(full_path, start, length) if request.method != 'HEAD' else (),
+            status=206, content_type=content_type,
+        )
+        response['Content-Length'] = str(length)
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return _cache_headers(response, path, stat, etag)
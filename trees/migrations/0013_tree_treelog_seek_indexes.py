@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-17 20:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trees', '0012_treelog_dry_weight_treelog_wet_weight'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tree',
+            index=models.Index(fields=['-created_at', 'id'], name='tree_created_seek_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='treelog',
+            index=models.Index(fields=['-action_date', '-created_at', 'id'], name='treelog_action_seek_idx'),
+        ),
+    ]
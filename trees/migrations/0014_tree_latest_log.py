@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-17 20:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_latest_log(apps, schema_editor):
+    Tree = apps.get_model('trees', 'Tree')
+    TreeLog = apps.get_model('trees', 'TreeLog')
+    newest = TreeLog.objects.filter(tree=models.OuterRef('pk')).order_by('-action_date', '-created_at', 'id')
+    Tree.objects.update(latest_log=models.Subquery(newest.values('pk')[:1]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trees', '0013_tree_treelog_seek_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tree',
+            name='latest_log',
+            field=models.ForeignKey(blank=True, editable=False, help_text='บันทึกล่าสุดของต้นไม้ (อัปเดตอัตโนมัติ)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='trees.treelog'),
+        ),
+        migrations.RunPython(backfill_latest_log, migrations.RunPython.noop),
+    ]
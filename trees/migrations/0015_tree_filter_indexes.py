@@ -0,0 +1,69 @@
+# Generated by Django 5.2.8 on 2026-10-17 20:49
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trees', '0014_tree_latest_log'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='tree',
+            index=models.Index(fields=['status', '-created_at', 'id'], name='tree_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tree',
+            index=models.Index(fields=['sex'], name='tree_sex_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tree',
+            index=models.Index(fields=['growth_stage'], name='tree_growth_stage_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tree',
+            index=models.Index(fields=['plant_date', 'id'], name='tree_plant_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tree',
+            index=models.Index(fields=['harvest_date'], name='tree_harvest_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tree',
+            index=models.Index(fields=['nickname', 'id'], name='tree_nickname_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='batch',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('batch_code'), name='gin_trgm_ops'), name='batch_code_ilike_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='strain',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='strain_name_ilike_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tree',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('nickname'), name='gin_trgm_ops'), name='tree_nickname_ilike_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tree',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('variety'), name='gin_trgm_ops'), name='tree_variety_ilike_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tree',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('phenotype'), name='gin_trgm_ops'), name='tree_phenotype_ilike_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tree',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('notes'), name='gin_trgm_ops'), name='tree_notes_ilike_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tree',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('location'), name='gin_trgm_ops'), name='tree_location_ilike_idx'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.8 on 2026-10-17 20:50
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trees', '0015_tree_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tree',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('nickname', config='simple', weight='A'), '||', django.contrib.postgres.search.SearchVector('variety', config='simple', weight='B'), django.contrib.postgres.search.SearchConfig('simple')), '||', django.contrib.postgres.search.SearchVector('phenotype', 'flower_quality', config='simple', weight='C'), django.contrib.postgres.search.SearchConfig('simple')), '||', django.contrib.postgres.search.SearchVector('disease_notes', 'notes', config='simple', weight='D'), django.contrib.postgres.search.SearchConfig('simple')), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddField(
+            model_name='treelog',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('title', config='simple', weight='A'), '||', django.contrib.postgres.search.SearchVector('notes', config='simple', weight='B'), django.contrib.postgres.search.SearchConfig('simple')), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name='tree',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='tree_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tree',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['nickname'], name='tree_nickname_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='tree',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['variety'], name='tree_variety_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='treelog',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='treelog_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='treelog',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='treelog_title_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='tree',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('flower_quality'), name='gin_trgm_ops'), name='tree_flower_quality_ilike_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tree',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('disease_notes'), name='gin_trgm_ops'), name='tree_disease_notes_ilike_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='treelog',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('title'), name='gin_trgm_ops'), name='treelog_title_ilike_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='treelog',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('notes'), name='gin_trgm_ops'), name='treelog_notes_ilike_idx'),
+        ),
+    ]
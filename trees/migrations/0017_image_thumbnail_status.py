@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-17 20:52
+
+from django.db import migrations, models
+
+
+def mark_existing_thumbnails_ready(apps, schema_editor):
+    Image = apps.get_model('trees', 'Image')
+    Image.objects.exclude(thumbnail__isnull=True).exclude(thumbnail='').update(thumbnail_status='ready')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trees', '0016_tree_treelog_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='image',
+            name='thumbnail_claimed_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='เวลาที่ worker รับงานสร้างรูปย่อ', null=True),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='thumbnail_status',
+            field=models.CharField(choices=[('pending', 'รอสร้างรูปย่อ'), ('processing', 'กำลังสร้างรูปย่อ'), ('ready', 'พร้อมใช้งาน'), ('failed', 'สร้างรูปย่อไม่สำเร็จ')], default='pending', editable=False, help_text='สถานะการสร้างรูปย่อ (ทำงานเบื้องหลังโดย process_thumbnails)', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='image',
+            index=models.Index(condition=models.Q(('thumbnail_status__in', ['pending', 'processing'])), fields=['id'], name='image_thumb_queue_idx'),
+        ),
+        migrations.RunPython(mark_existing_thumbnails_ready, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-17 20:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trees', '0017_image_thumbnail_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='image',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='ความสูงของภาพต้นฉบับ (px)', null=True),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='ไฟล์ภาพหลายขนาด {ความกว้าง: {รูปแบบ: path}}'),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='ความกว้างของภาพต้นฉบับ (px)', null=True),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-17 20:57
+
+import django.db.models.deletion
+import trees.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trees', '0018_image_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(help_text='ค่า SHA-256 ของเนื้อหาไฟล์', max_length=64, unique=True)),
+                ('file', models.FileField(help_text='ไฟล์ต้นฉบับ (เก็บเพียงชุดเดียวต่อเนื้อหา)', max_length=255, upload_to=trees.models.image_blob_path)),
+                ('size', models.PositiveBigIntegerField(help_text='ขนาดไฟล์ (ไบต์)')),
+                ('refcount', models.PositiveIntegerField(default=0, help_text='จำนวนรูปภาพที่อ้างอิงไฟล์นี้ (ลบไฟล์เมื่อเป็น 0)')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='วัน-เวลาที่บันทึกไฟล์ครั้งแรก')),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='image',
+            name='image',
+            field=models.ImageField(help_text='ไฟล์รูปภาพของต้นไม้', max_length=255, upload_to=trees.models.tree_image_path),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='blob',
+            field=models.ForeignKey(blank=True, editable=False, help_text='ไฟล์ต้นฉบับที่ใช้ร่วมกัน (ว่างสำหรับรูปที่อัปโหลดก่อนมีระบบนี้)', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='images', to='trees.imageblob'),
+        ),
+    ]
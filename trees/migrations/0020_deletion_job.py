@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trees', '0019_image_blobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'รอลบไฟล์'), ('running', 'กำลังลบไฟล์'), ('done', 'เสร็จสิ้น'), ('failed', 'ลบไฟล์บางส่วนไม่สำเร็จ')], default='pending', help_text='สถานะการลบไฟล์', max_length=20)),
+                ('trees_deleted', models.PositiveIntegerField(default=0, help_text='จำนวนต้นไม้ที่ถูกลบ')),
+                ('images_deleted', models.PositiveIntegerField(default=0, help_text='จำนวนรูปภาพที่ถูกลบ')),
+                ('paths', models.JSONField(default=list, help_text='ไฟล์และโฟลเดอร์ (ลงท้ายด้วย /) ที่ต้องลบ')),
+                ('files_total', models.PositiveIntegerField(default=0, help_text='จำนวนไฟล์ทั้งหมดที่ต้องลบ')),
+                ('files_removed', models.PositiveIntegerField(default=0, help_text='จำนวนไฟล์ที่ลบแล้ว')),
+                ('files_failed', models.PositiveIntegerField(default=0, help_text='จำนวนไฟล์ที่ลบไม่สำเร็จ')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='วัน-เวลาที่สร้างงาน')),
+                ('claimed_at', models.DateTimeField(blank=True, help_text='เวลาที่เริ่มลบไฟล์', null=True)),
+                ('finished_at', models.DateTimeField(blank=True, help_text='เวลาที่ลบไฟล์เสร็จ', null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:33
+
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trees', '0020_deletion_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SensorReading',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('location', models.CharField(blank=True, help_text='สถานที่ที่วัด เช่น โรงเรือน (ว่างได้ถ้าระบุต้นไม้)', max_length=255)),
+                ('recorded_at', models.DateTimeField(help_text='วัน-เวลาที่เซ็นเซอร์วัดค่า')),
+                ('ph', models.FloatField(blank=True, help_text='ค่า pH', null=True)),
+                ('ec', models.FloatField(blank=True, help_text='ค่า EC (uS/cm หรือ ppm)', null=True)),
+                ('temp', models.FloatField(blank=True, help_text='อุณหภูมิ (°C)', null=True)),
+                ('humidity', models.FloatField(blank=True, help_text='ความชื้น (%)', null=True)),
+                ('tree', models.ForeignKey(blank=True, db_index=False, help_text='ต้นไม้ที่วัด (ว่างได้ถ้าเป็นค่าของทั้งสถานที่)', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='readings', to='trees.tree')),
+            ],
+            options={
+                'indexes': [django.contrib.postgres.indexes.BrinIndex(fields=['recorded_at'], name='reading_recorded_brin_idx')],
+                'constraints': [models.CheckConstraint(condition=models.Q(('tree__isnull', False), models.Q(('location', ''), _negated=True), _connector='OR'), name='reading_tree_or_location'), models.UniqueConstraint(condition=models.Q(('tree__isnull', False)), fields=('tree', 'recorded_at'), name='reading_tree_time_uniq'), models.UniqueConstraint(condition=models.Q(('tree__isnull', True)), fields=('location', 'recorded_at'), name='reading_location_time_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trees', '0021_sensor_reading'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReadingRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.CharField(choices=[('hour', 'รายชั่วโมง'), ('day', 'รายวัน')], help_text='ช่วงเวลาที่สรุป', max_length=10)),
+                ('location', models.CharField(blank=True, help_text='สถานที่ (เฉพาะแถวที่ไม่มีต้นไม้)', max_length=255)),
+                ('start', models.DateTimeField(help_text='เวลาเริ่มของช่วง (date_trunc ตาม TIME_ZONE)')),
+                ('ph_count', models.PositiveIntegerField(default=0)),
+                ('ph_sum', models.FloatField(blank=True, null=True)),
+                ('ph_min', models.FloatField(blank=True, null=True)),
+                ('ph_max', models.FloatField(blank=True, null=True)),
+                ('ec_count', models.PositiveIntegerField(default=0)),
+                ('ec_sum', models.FloatField(blank=True, null=True)),
+                ('ec_min', models.FloatField(blank=True, null=True)),
+                ('ec_max', models.FloatField(blank=True, null=True)),
+                ('temp_count', models.PositiveIntegerField(default=0)),
+                ('temp_sum', models.FloatField(blank=True, null=True)),
+                ('temp_min', models.FloatField(blank=True, null=True)),
+                ('temp_max', models.FloatField(blank=True, null=True)),
+                ('humidity_count', models.PositiveIntegerField(default=0)),
+                ('humidity_sum', models.FloatField(blank=True, null=True)),
+                ('humidity_min', models.FloatField(blank=True, null=True)),
+                ('humidity_max', models.FloatField(blank=True, null=True)),
+                ('tree', models.ForeignKey(blank=True, db_index=False, help_text='ต้นไม้ (ว่างถ้าเป็นค่าของทั้งสถานที่)', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reading_rollups', to='trees.tree')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('tree__isnull', False)), fields=('tree', 'bucket', 'start'), name='rollup_tree_bucket_uniq'), models.UniqueConstraint(condition=models.Q(('tree__isnull', True)), fields=('location', 'bucket', 'start'), name='rollup_location_bucket_uniq')],
+            },
+        ),
+    ]
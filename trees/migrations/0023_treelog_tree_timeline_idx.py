@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trees', '0022_reading_rollup'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='treelog',
+            name='tree',
+            field=models.ForeignKey(db_index=False, help_text='ต้นไม้ที่บันทึก', on_delete=django.db.models.deletion.CASCADE, related_name='logs', to='trees.tree'),
+        ),
+        migrations.AddIndex(
+            model_name='treelog',
+            index=models.Index(fields=['tree', '-action_date', '-created_at', 'id'], name='treelog_tree_timeline_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.8 on 2026-10-17 21:48
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trees', '0023_treelog_tree_timeline_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(choices=[('strain', 'สายพันธุ์'), ('batch', 'ชุดการปลูก'), ('image', 'รูปภาพ'), ('tree', 'ต้นไม้'), ('treelog', 'บันทึก')], help_text='ประเภทของรายการที่ถูกลบ', max_length=20)),
+                ('object_id', models.BigIntegerField(blank=True, help_text='รหัสของรายการที่ถูกลบ (ว่าง = ต้องซิงก์ข้อมูลประเภทนี้ใหม่ทั้งหมด)', null=True)),
+                ('deleted_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, help_text='วัน-เวลาที่ลบ')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='batch',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, help_text='วัน-เวลาที่มีการแก้ไขข้อมูลล่าสุด'),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, help_text='วัน-เวลาที่มีการแก้ไขข้อมูลล่าสุด (รวมการสร้างรูปย่อ)'),
+        ),
+        migrations.AddField(
+            model_name='strain',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, help_text='วัน-เวลาที่มีการแก้ไขข้อมูลล่าสุด'),
+        ),
+        migrations.AddIndex(
+            model_name='batch',
+            index=models.Index(fields=['updated_at', 'id'], name='batch_updated_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='image',
+            index=models.Index(fields=['updated_at', 'id'], name='image_updated_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='strain',
+            index=models.Index(fields=['updated_at', 'id'], name='strain_updated_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tree',
+            index=models.Index(fields=['updated_at', 'id'], name='tree_updated_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='treelog',
+            index=models.Index(fields=['updated_at', 'id'], name='treelog_updated_sync_idx'),
+        ),
+    ]
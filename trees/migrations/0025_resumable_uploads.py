@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:12
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trees', '0024_sync_tombstones'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Upload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, help_text='รหัสการอัปโหลด (ใช้ใน URL ของแต่ละส่วน)', primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('image', 'รูปภาพ'), ('document', 'เอกสารของต้นไม้')], help_text='สิ่งที่จะสร้างเมื่ออัปโหลดครบ', max_length=20)),
+                ('filename', models.CharField(help_text='ชื่อไฟล์เดิม', max_length=255)),
+                ('size', models.PositiveBigIntegerField(help_text='ขนาดไฟล์ทั้งหมด (ไบต์)')),
+                ('offset', models.PositiveBigIntegerField(default=0, help_text='จำนวนไบต์ที่ได้รับแล้ว')),
+                ('sha256', models.CharField(blank=True, help_text='ค่า SHA-256 ที่ลูกข่ายแจ้ง (ถ้ามี ใช้ตรวจสอบเมื่ออัปโหลดครบ)', max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='วัน-เวลาที่เริ่มอัปโหลด')),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True, help_text='วัน-เวลาที่ได้รับข้อมูลล่าสุด')),
+                ('log', models.ForeignKey(blank=True, help_text='บันทึกที่รูปภาพจะถูกแนบ (ถ้ามี)', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='trees.treelog')),
+                ('tree', models.ForeignKey(blank=True, help_text='ต้นไม้ที่รูปภาพหรือเอกสารจะถูกแนบ', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='trees.tree')),
+            ],
+        ),
+    ]
@@ -1,11 +1,28 @@
-from django.db import models
+from django.contrib.postgres.indexes import BrinIndex, GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
+from django.db import close_old_connections, connection, models, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Upper
 from django.utils import timezone
-from PIL import Image as PilImage, ImageOps
-from io import BytesIO
+from django.core.exceptions import EmptyResultSet
 from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+import glob
+import hashlib
 import os
 import shutil
+import threading
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 from django.conf import settings
+from .caching import bump_versions
+from .events import emit
+from .search import TREE_SEARCH_VECTOR, TREELOG_SEARCH_VECTOR
+from .thumbnails import (
+    DEFAULT_RENDITION_FORMATS, DEFAULT_RENDITION_WIDTHS, render_image_set, supported_formats,
+)
 
 SEX_CHOICES = [
     ("bisexual", "สมบูรณ์เพศ"),
@@ -33,6 +50,38 @@ LOG_ACTION_CHOICES = [
     ("other", "อื่นๆ"),
 ]
 
+THUMBNAIL_STATUS_CHOICES = [
+    ("pending", "รอสร้างรูปย่อ"),
+    ("processing", "กำลังสร้างรูปย่อ"),
+    ("ready", "พร้อมใช้งาน"),
+    ("failed", "สร้างรูปย่อไม่สำเร็จ"),
+]
+
+SYNC_MODEL_CHOICES = [
+    ("strain", "สายพันธุ์"),
+    ("batch", "ชุดการปลูก"),
+    ("image", "รูปภาพ"),
+    ("tree", "ต้นไม้"),
+    ("treelog", "บันทึก"),
+]
+
+ROLLUP_BUCKET_CHOICES = [
+    ("hour", "รายชั่วโมง"),
+    ("day", "รายวัน"),
+]
+
+DELETION_JOB_STATUS_CHOICES = [
+    ("pending", "รอลบไฟล์"),
+    ("running", "กำลังลบไฟล์"),
+    ("done", "เสร็จสิ้น"),
+    ("failed", "ลบไฟล์บางส่วนไม่สำเร็จ"),
+]
+
+UPLOAD_KIND_CHOICES = [
+    ("image", "รูปภาพ"),
+    ("document", "เอกสารของต้นไม้"),
+]
+
 class Strain(models.Model):
     """สายพันธุ์ของต้นไม้"""
     name = models.CharField(
@@ -43,6 +92,18 @@ class Strain(models.Model):
         blank=True, null=True,
         help_text="รายละเอียดเพิ่มเติมของสายพันธุ์"
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="วัน-เวลาที่มีการแก้ไขข้อมูลล่าสุด"
+    )
+
+    class Meta:
+        indexes = [
+            # Delta sync (/api/sync/?since=)
+            models.Index(fields=['updated_at', 'id'], name='strain_updated_sync_idx'),
+            # ?search= on /api/trees/ (trees.filters.IndexedSearchFilter)
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='strain_name_ilike_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -61,34 +122,132 @@ class Batch(models.Model):
         blank=True, null=True,
         help_text="วันที่เริ่มต้นชุดการปลูก"
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="วัน-เวลาที่มีการแก้ไขข้อมูลล่าสุด"
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='batch_updated_sync_idx'),
+            GinIndex(OpClass(Upper('batch_code'), name='gin_trgm_ops'), name='batch_code_ilike_idx'),
+        ]
 
     def __str__(self):
         return self.batch_code
 
+def tree_folder(tree_id):
+    """Media folder of a tree. Keyed by ID only so renaming a tree never moves files"""
+    return f'tree_images/{tree_id}' if tree_id else 'tree_images/unassigned'
+
 def tree_image_path(instance, filename):
-    """Generate dynamic path for tree images based on nickname and ID"""
-    if instance.tree:
-        nickname = instance.tree.nickname
-        # Sanitize nickname
-        safe_nickname = "".join([c for c in nickname if c.isalnum() or c in (' ', '_', '-')]).strip()
-        # Use ID to ensure uniqueness
-        folder_name = f"{safe_nickname}_{instance.tree.id}"
-        return f'tree_images/{folder_name}/{filename}'
-    return f'tree_images/unassigned/{filename}'
+    """Generate path for tree images from the tree ID"""
+    return f'{tree_folder(instance.tree_id)}/{filename}'
 
 def tree_thumbnail_path(instance, filename):
     """Generate dynamic path for tree thumbnails"""
-    if instance.tree:
-        nickname = instance.tree.nickname
-        safe_nickname = "".join([c for c in nickname if c.isalnum() or c in (' ', '_', '-')]).strip()
-        folder_name = f"{safe_nickname}_{instance.tree.id}"
-        return f'tree_images/{folder_name}/thumbnails/{filename}'
-    return f'tree_images/unassigned/thumbnails/{filename}'
+    if instance.blob_id:
+        # Shared by every Image of the same content, so it sits beside the blob
+        return f'{os.path.dirname(instance.image.name)}/thumbnails/{filename}'
+    return f'{tree_folder(instance.tree_id)}/thumbnails/{filename}'
+
+def image_blob_path(instance, filename):
+    """blobs/ab/cd/abcd…ef.jpg — sharded by the first bytes of the SHA-256"""
+    ext = os.path.splitext(filename)[1].lower() or '.jpg'
+    digest = instance.sha256
+    return f'blobs/{digest[:2]}/{digest[2:4]}/{digest}{ext}'
+
+class ImageBlob(models.Model):
+    """ไฟล์รูปภาพที่เก็บตามค่า SHA-256 ของเนื้อหา ใช้ร่วมกันได้หลายรูป"""
+    sha256 = models.CharField(
+        max_length=64, unique=True,
+        help_text="ค่า SHA-256 ของเนื้อหาไฟล์"
+    )
+    file = models.FileField(
+        upload_to=image_blob_path, max_length=255,
+        help_text="ไฟล์ต้นฉบับ (เก็บเพียงชุดเดียวต่อเนื้อหา)"
+    )
+    size = models.PositiveBigIntegerField(
+        help_text="ขนาดไฟล์ (ไบต์)"
+    )
+    refcount = models.PositiveIntegerField(
+        default=0,
+        help_text="จำนวนรูปภาพที่อ้างอิงไฟล์นี้ (ลบไฟล์เมื่อเป็น 0)"
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        help_text="วัน-เวลาที่บันทึกไฟล์ครั้งแรก"
+    )
+
+    @staticmethod
+    def hash_file(file):
+        """SHA-256 of an uploaded file, read in chunks so large uploads never sit in memory"""
+        digest = hashlib.sha256()
+        file.seek(0)
+        for chunk in file.chunks():
+            digest.update(chunk)
+        file.seek(0)
+        return digest.hexdigest()
+
+    @classmethod
+    def intern(cls, file, digest=None):
+        """
+        Blob for `file`'s content, writing it only if this content is new; takes
+        one reference. Pass `digest` when the SHA-256 is already known (resumable
+        uploads hash chunks as they arrive) to skip reading the file again.
+        """
+        digest = digest or cls.hash_file(file)
+        with transaction.atomic():
+            blob, created = cls.objects.select_for_update().get_or_create(
+                sha256=digest, defaults={'size': file.size}
+            )
+            if created or not blob.file or not blob.file.storage.exists(blob.file.name):
+                name = image_blob_path(blob, os.path.basename(file.name))
+                if blob.file.storage.exists(name):
+                    # Left behind by an earlier blob with the same content
+                    blob.file.name = name
+                else:
+                    blob.file.save(os.path.basename(file.name), file, save=False)
+                cls.objects.filter(pk=blob.pk).update(file=blob.file.name)
+            cls.objects.filter(pk=blob.pk).update(refcount=F('refcount') + 1)
+        return blob
+
+    @classmethod
+    def release(cls, pk):
+        """Drop one reference; the last one deletes the row and, after commit, the files"""
+        with transaction.atomic():
+            blob = cls.objects.select_for_update().filter(pk=pk).first()
+            if blob is None:
+                return
+            if blob.refcount > 1:
+                cls.objects.filter(pk=pk).update(refcount=F('refcount') - 1)
+                return
+            blob.delete()
+            transaction.on_commit(blob.delete_files)
+
+    def delete_files(self):
+        """Remove the original plus its thumbnails and renditions (all named after the hash)"""
+        if ImageBlob.objects.filter(sha256=self.sha256).exists():
+            return  # Re-uploaded since it was released
+        storage = self.file.storage
+        folder = os.path.dirname(self.file.name)
+        for sub in ('thumbnails', 'renditions'):
+            try:
+                _, files = storage.listdir(f'{folder}/{sub}')
+            except FileNotFoundError:
+                continue
+            for filename in files:
+                if filename.startswith(self.sha256):
+                    storage.delete(f'{folder}/{sub}/{filename}')
+        storage.delete(self.file.name)
+
+    def __str__(self):
+        return self.sha256
 
 class TreeLog(models.Model):
     """บันทึกเหตุการณ์รายวัน (Journal/Timeline)"""
     tree = models.ForeignKey(
-        'Tree', on_delete=models.CASCADE, related_name='logs',
+        'Tree', on_delete=models.CASCADE, related_name='logs', db_index=False,
         help_text="ต้นไม้ที่บันทึก"
     )
     action_date = models.DateTimeField(
@@ -121,8 +280,75 @@ class TreeLog(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Full-text search (computed by PostgreSQL on every write, see trees.search)
+    search_vector = models.GeneratedField(
+        expression=TREELOG_SEARCH_VECTOR,
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    # Newest-first order shared by the timeline and Tree.latest_log
+    TIMELINE_ORDERING = ('-action_date', '-created_at', 'id')
+
     class Meta:
         ordering = ['-action_date']
+        indexes = [
+            # Matches TreeLogCursorPagination ordering for keyset seeks
+            models.Index(fields=['-action_date', '-created_at', 'id'], name='treelog_action_seek_idx'),
+            # Per-tree timeline (/api/trees/<id>/timeline/): equality on tree, then the same seek;
+            # also replaces the default FK index
+            models.Index(fields=['tree', '-action_date', '-created_at', 'id'], name='treelog_tree_timeline_idx'),
+            # Delta sync (/api/sync/?since=)
+            models.Index(fields=['updated_at', 'id'], name='treelog_updated_sync_idx'),
+            GinIndex(fields=['search_vector'], name='treelog_search_idx'),
+            GinIndex(fields=['title'], opclasses=['gin_trgm_ops'], name='treelog_title_trgm_idx'),
+            # Substring fallback of trees.search: icontains compiles to UPPER(col) LIKE
+            GinIndex(OpClass(Upper('title'), name='gin_trgm_ops'), name='treelog_title_ilike_idx'),
+            GinIndex(OpClass(Upper('notes'), name='gin_trgm_ops'), name='treelog_notes_ilike_idx'),
+        ]
+
+    @classmethod
+    def refresh_latest_for(cls, tree_filter):
+        """Recompute Tree.latest_log for the matching trees in a single UPDATE"""
+        newest = cls.objects.filter(tree=models.OuterRef('pk')).order_by(*cls.TIMELINE_ORDERING)
+        return Tree.objects.filter(tree_filter).update(
+            latest_log=models.Subquery(newest.values('pk')[:1])
+        )
+
+    @classmethod
+    def bulk_record(cls, tree_ids, values, image=None):
+        """
+        The same entry (`values`: action_type, notes, ph, ...) for every tree in
+        `tree_ids`, inserted with bulk_create in one transaction. `image` is an
+        uploaded file stored once: every new log gets an Image row pointing at
+        the same blob. Returns (logs, images).
+        """
+        with transaction.atomic():
+            logs = cls.objects.bulk_create([cls(tree_id=pk, **values) for pk in tree_ids])
+            images = []
+            if image is not None:
+                blob = ImageBlob.intern(image)
+                shared = Image()
+                shared.use_blob(blob)
+                images = Image.objects.bulk_create([
+                    Image(
+                        tree_id=log.tree_id, log=log, blob=blob, image=shared.image.name,
+                        thumbnail=shared.thumbnail, thumbnail_status=shared.thumbnail_status,
+                        width=shared.width, height=shared.height, renditions=shared.renditions,
+                    )
+                    for log in logs
+                ])
+                # intern() took one reference for the first of them
+                ImageBlob.objects.filter(pk=blob.pk).update(refcount=F('refcount') + len(images) - 1)
+
+            # bulk_create skips the post_save signals that keep these current
+            cls.refresh_latest_for(Q(pk__in=tree_ids))
+            bump_versions(cls)
+            emit('log', 'saved', [log.pk for log in logs], tree_ids)
+            if images:
+                bump_versions(Image)
+                emit('image', 'saved', [image.pk for image in images], tree_ids)
+        return logs, images
 
     def __str__(self):
         return f"{self.tree.nickname} - {self.get_action_type_display()} ({self.action_date.strftime('%Y-%m-%d')})"
@@ -137,9 +363,13 @@ class Image(models.Model):
         help_text="ลิงก์กับบันทึกเหตุการณ์ (ถ้ามี)"
     )
     image = models.ImageField(
-        upload_to=tree_image_path,
+        upload_to=tree_image_path, max_length=255,
         help_text="ไฟล์รูปภาพของต้นไม้"
     )
+    blob = models.ForeignKey(
+        ImageBlob, on_delete=models.PROTECT, related_name='images', null=True, blank=True, editable=False,
+        help_text="ไฟล์ต้นฉบับที่ใช้ร่วมกัน (ว่างสำหรับรูปที่อัปโหลดก่อนมีระบบนี้)"
+    )
     thumbnail = models.ImageField(
         upload_to=tree_thumbnail_path,
         null=True, blank=True, editable=False,
@@ -149,46 +379,186 @@ class Image(models.Model):
         auto_now_add=True,
         help_text="วัน-เวลาที่อัปโหลดรูปภาพ"
     )
-    
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="วัน-เวลาที่มีการแก้ไขข้อมูลล่าสุด (รวมการสร้างรูปย่อ)"
+    )
+    thumbnail_status = models.CharField(
+        max_length=20, choices=THUMBNAIL_STATUS_CHOICES, default="pending", editable=False,
+        help_text="สถานะการสร้างรูปย่อ (ทำงานเบื้องหลังโดย process_thumbnails)"
+    )
+    thumbnail_claimed_at = models.DateTimeField(
+        null=True, blank=True, editable=False,
+        help_text="เวลาที่ worker รับงานสร้างรูปย่อ"
+    )
+    width = models.PositiveIntegerField(
+        null=True, blank=True, editable=False,
+        help_text="ความกว้างของภาพต้นฉบับ (px)"
+    )
+    height = models.PositiveIntegerField(
+        null=True, blank=True, editable=False,
+        help_text="ความสูงของภาพต้นฉบับ (px)"
+    )
+    renditions = models.JSONField(
+        default=dict, blank=True, editable=False,
+        help_text="ไฟล์ภาพหลายขนาด {ความกว้าง: {รูปแบบ: path}}"
+    )
+
+    class Meta:
+        indexes = [
+            # Queue scan for the thumbnail worker
+            models.Index(
+                fields=['id'], condition=models.Q(thumbnail_status__in=['pending', 'processing']),
+                name='image_thumb_queue_idx',
+            ),
+            # Delta sync (/api/sync/?since=)
+            models.Index(fields=['updated_at', 'id'], name='image_updated_sync_idx'),
+        ]
+
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-        if self.image and not self.thumbnail:
-            # Check if file exists before trying to open it
-            if os.path.exists(self.image.path):
-                try:
-                    self.make_thumbnail()
-                except Exception as e:
-                    print(f"Warning: Failed to create thumbnail for image {self.id}: {e}")
-            else:
-                print(f"Warning: Image file not found at {self.image.path}, skipping thumbnail generation.")
-
-    def make_thumbnail(self, size=(400, 300)):
-        img = PilImage.open(self.image.path)
-        img = ImageOps.exif_transpose(img)
-        img.thumbnail(size, PilImage.LANCZOS)
-        
-        # Convert RGBA to RGB before saving as JPEG
-        if img.mode == 'RGBA':
-            # Create a white background
-            rgb_img = PilImage.new('RGB', img.size, (255, 255, 255))
-            rgb_img.paste(img, mask=img.split()[3])  # Use alpha channel as mask
-            img = rgb_img
-        elif img.mode not in ('RGB', 'L'):
-            # Convert other modes to RGB
-            img = img.convert('RGB')
-        
-        thumb_io = BytesIO()
-        img.save(thumb_io, format='JPEG', quality=85)
-        base, ext = os.path.splitext(os.path.basename(self.image.name))
-        thumbnail_filename = f"{base}_thumb.jpg"
-        self.thumbnail.save(thumbnail_filename, ContentFile(thumb_io.getvalue()), save=False)
-        super().save(update_fields=['thumbnail'])
+        previous_blob_id = self.blob_id
+        with transaction.atomic():
+            if self.image and not self.image._committed:
+                # New upload: store the content once under its hash
+                self.use_blob(ImageBlob.intern(self.image))
+            # Thumbnails are generated out of request by `manage.py process_thumbnails`
+            if self.image and not self.thumbnail and self.thumbnail_status == 'ready':
+                self.thumbnail_status = 'pending'
+            super().save(*args, **kwargs)
+            if previous_blob_id and previous_blob_id != self.blob_id:
+                ImageBlob.release(previous_blob_id)
+
+    def use_blob(self, blob):
+        """Point at `blob`'s file and reuse whatever was already rendered for it"""
+        self.blob = blob
+        self.image = blob.file.name
+        self.thumbnail, self.width, self.height, self.renditions = None, None, None, {}
+        self.thumbnail_status = 'pending'
+        self.adopt_processed()
+
+    def adopt_processed(self, commit=False):
+        """Copy thumbnail and renditions from another Image of the same blob; False if none is ready"""
+        if not self.blob_id:
+            return False
+        done = (
+            Image.objects.filter(blob_id=self.blob_id, thumbnail_status='ready')
+            .exclude(pk=self.pk).values('thumbnail', 'width', 'height', 'renditions').first()
+        )
+        if done is None:
+            return False
+        fields = dict(done, thumbnail_status='ready')
+        for name, value in fields.items():
+            setattr(self, name, value)
+        if commit:
+            Image.objects.filter(pk=self.pk).update(**fields, updated_at=timezone.now())
+            bump_versions(Image)
+            emit('image', 'saved', [self.pk], [self.tree_id])
+        return True
+
+    @classmethod
+    def claim_thumbnail_jobs(cls, limit, stale_after=timedelta(minutes=10)):
+        """Atomically take up to `limit` queued images for this worker"""
+        now = timezone.now()
+        with transaction.atomic():
+            jobs = list(
+                cls.objects.select_for_update(skip_locked=True, of=('self',))
+                .select_related('tree')
+                .filter(
+                    models.Q(thumbnail_status='pending')
+                    | models.Q(thumbnail_status='processing', thumbnail_claimed_at__lt=now - stale_after)
+                )
+                .order_by('id')[:limit]
+            )
+            cls.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                thumbnail_status='processing', thumbnail_claimed_at=now, updated_at=now
+            )
+            bump_versions(cls)
+        return jobs
+
+    @staticmethod
+    def rendition_config():
+        """Configured rendition widths (ascending) and the encodings Pillow can write"""
+        widths = getattr(settings, 'IMAGE_RENDITION_WIDTHS', DEFAULT_RENDITION_WIDTHS)
+        formats = getattr(settings, 'IMAGE_RENDITION_FORMATS', DEFAULT_RENDITION_FORMATS)
+        return sorted(widths), supported_formats(formats)
+
+    def rendition_name(self, width, fmt):
+        folder, filename = os.path.split(self.image.name)
+        base = os.path.splitext(filename)[0]
+        return f"{folder}/renditions/{base}_{width}.{fmt}"
+
+    def store_rendered(self, result):
+        """Write the output of render_image_set() and record it without re-entering save()"""
+        storage = self.image.storage
+        renditions = {width: dict(files) for width, files in (self.renditions or {}).items()}
+        for width, encoded in result['renditions'].items():
+            files = renditions.setdefault(str(width), {})
+            for fmt, data in encoded.items():
+                name = self.rendition_name(width, fmt)
+                if storage.exists(name):
+                    storage.delete(name)
+                files[fmt] = storage.save(name, ContentFile(data))
+
+        fields = {'renditions': renditions, 'width': result['size'][0], 'height': result['size'][1]}
+        if result['thumbnail'] is not None:
+            base, ext = os.path.splitext(os.path.basename(self.image.name))
+            filename = f"{base}_thumb.jpg"
+            # Overwrite rather than collect suffixed copies (blob thumbnails are shared)
+            name = self.thumbnail.field.generate_filename(self, filename)
+            if storage.exists(name):
+                storage.delete(name)
+            self.thumbnail.save(filename, ContentFile(result['thumbnail']), save=False)
+            fields.update(thumbnail=self.thumbnail.name, thumbnail_status='ready')
+
+        fields['updated_at'] = timezone.now()
+        for name, value in fields.items():
+            setattr(self, name, value)
+        Image.objects.filter(pk=self.pk).update(**fields)
+        bump_versions(Image)
+        emit('image', 'saved', [self.pk], [self.tree_id])
+
+    def make_thumbnail(self):
+        """Render thumbnail and renditions synchronously (the worker does the same in a process pool)"""
+        widths, formats = self.rendition_config()
+        self.store_rendered(render_image_set(self.image.path, widths, formats))
+
+    def ensure_rendition(self, width, fmt):
+        """
+        Storage name of the `width` px `fmt` rendition, rendering it now if it
+        is missing (e.g. a width added to settings after upload). Returns None
+        when the source is too narrow for that width.
+        """
+        name = self.renditions.get(str(width), {}).get(fmt)
+        if name and self.image.storage.exists(name):
+            return name
+        name = self.rendition_name(width, fmt)
+        if self.blob_id and self.image.storage.exists(name):
+            # Already rendered through another Image of the same blob
+            self.renditions.setdefault(str(width), {})[fmt] = name
+            Image.objects.filter(pk=self.pk).update(renditions=self.renditions, updated_at=timezone.now())
+            bump_versions(Image)
+            return name
+
+        with transaction.atomic():
+            # Lock so concurrent requests for the same image render it once
+            locked = Image.objects.select_for_update().get(pk=self.pk)
+            name = locked.renditions.get(str(width), {}).get(fmt)
+            if name and locked.image.storage.exists(name):
+                return name
+            result = render_image_set(locked.image.path, [width], [fmt], thumbnail_size=None)
+            locked.store_rendered(result)
+        return locked.renditions.get(str(width), {}).get(fmt)
 
     def delete(self, *args, **kwargs):
-        if self.image and os.path.isfile(self.image.path):
-            os.remove(self.image.path)
-        if self.thumbnail and os.path.isfile(self.thumbnail.path):
-            os.remove(self.thumbnail.path)
+        # Blob-backed files are shared and released by the post_delete signal
+        if self.blob_id is None:
+            if self.image and os.path.isfile(self.image.path):
+                os.remove(self.image.path)
+            if self.thumbnail and os.path.isfile(self.thumbnail.path):
+                os.remove(self.thumbnail.path)
+            for files in (self.renditions or {}).values():
+                for name in files.values():
+                    self.image.storage.delete(name)
         super().delete(*args, **kwargs)
 
     def __str__(self):
@@ -329,47 +699,55 @@ class Tree(models.Model):
         help_text="บันทึกเพิ่มเติมเกี่ยวกับต้นไม้"
     )
 
+    # 8. ข้อมูลที่คำนวณไว้ล่วงหน้า (denormalised, maintained by trees.signals)
+    latest_log = models.ForeignKey(
+        TreeLog, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name="+", editable=False,
+        help_text="บันทึกล่าสุดของต้นไม้ (อัปเดตอัตโนมัติ)"
+    )
+    search_vector = models.GeneratedField(
+        expression=TREE_SEARCH_VECTOR,
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    class Meta:
+        indexes = [
+            # Matches TreeCursorPagination ordering for keyset seeks
+            models.Index(fields=['-created_at', 'id'], name='tree_created_seek_idx'),
+            # Server-side filters and orderings (see trees.filters.TreeFilter)
+            models.Index(fields=['status', '-created_at', 'id'], name='tree_status_idx'),
+            models.Index(fields=['sex'], name='tree_sex_idx'),
+            models.Index(fields=['growth_stage'], name='tree_growth_stage_idx'),
+            models.Index(fields=['plant_date', 'id'], name='tree_plant_date_idx'),
+            models.Index(fields=['harvest_date'], name='tree_harvest_date_idx'),
+            models.Index(fields=['nickname', 'id'], name='tree_nickname_idx'),
+            # Delta sync (/api/sync/?since=)
+            models.Index(fields=['updated_at', 'id'], name='tree_updated_sync_idx'),
+            # Full-text and fuzzy search (see trees.search)
+            GinIndex(fields=['search_vector'], name='tree_search_idx'),
+            GinIndex(fields=['nickname'], opclasses=['gin_trgm_ops'], name='tree_nickname_trgm_idx'),
+            GinIndex(fields=['variety'], opclasses=['gin_trgm_ops'], name='tree_variety_trgm_idx'),
+            # Its substring fallback and ?search=: icontains compiles to UPPER(col) LIKE,
+            # which only a trigram index on the same expression can serve
+            *(
+                GinIndex(OpClass(Upper(field), name='gin_trgm_ops'), name=f'tree_{field}_ilike_idx')
+                for field in (
+                    'nickname', 'variety', 'phenotype', 'flower_quality', 'disease_notes', 'notes', 'location',
+                )
+            ),
+        ]
+
     def __str__(self):
         strain_name = self.strain.name if self.strain else 'Unknown Strain'
         return f"{self.nickname or 'Tree'} ({strain_name})"
 
-    def save(self, *args, **kwargs):
-        # Check if this is an update (instance already exists)
-        if self.pk:
-            try:
-                old_instance = Tree.objects.get(pk=self.pk)
-                if old_instance.nickname != self.nickname:
-                    # Nickname changed, rename folder
-                    old_safe_nickname = "".join([c for c in old_instance.nickname if c.isalnum() or c in (' ', '_', '-')]).strip()
-                    new_safe_nickname = "".join([c for c in self.nickname if c.isalnum() or c in (' ', '_', '-')]).strip()
-                    
-                    old_folder_name = f"{old_safe_nickname}_{self.id}"
-                    new_folder_name = f"{new_safe_nickname}_{self.id}"
-                    
-                    old_path = os.path.join(settings.MEDIA_ROOT, 'tree_images', old_folder_name)
-                    new_path = os.path.join(settings.MEDIA_ROOT, 'tree_images', new_folder_name)
-                    
-                    if os.path.exists(old_path):
-                        # Rename directory
-                        os.rename(old_path, new_path)
-                        
-                        # Update paths in Image objects
-                        for img in self.images_set.all():
-                            if img.image:
-                                img.image.name = img.image.name.replace(f'tree_images/{old_folder_name}/', f'tree_images/{new_folder_name}/')
-                            if img.thumbnail:
-                                img.thumbnail.name = img.thumbnail.name.replace(f'tree_images/{old_folder_name}/', f'tree_images/{new_folder_name}/')
-                            img.save()
-            except Tree.DoesNotExist:
-                pass
-        
-        super().save(*args, **kwargs)
-
     def delete(self, *args, **kwargs):
-        # Get folder path before deleting
-        safe_nickname = "".join([c for c in self.nickname if c.isalnum() or c in (' ', '_', '-')]).strip()
-        folder_name = f"{safe_nickname}_{self.id}"
-        folder_path = os.path.join(settings.MEDIA_ROOT, 'tree_images', folder_name)
+        # Get folder paths before deleting. `<nickname>_<id>` folders are left
+        # from before paths were ID-only, until migrate_media_paths moves them.
+        images_root = os.path.join(settings.MEDIA_ROOT, 'tree_images')
+        folder_paths = [os.path.join(settings.MEDIA_ROOT, tree_folder(self.id))]
+        folder_paths += glob.glob(os.path.join(glob.escape(images_root), f'*_{self.id}'))
 
         # Delete document file
         if self.document:
@@ -386,6 +764,413 @@ class Tree(models.Model):
             
         super().delete(*args, **kwargs)
         
-        # Delete the tree's image folder
-        if os.path.exists(folder_path):
-            shutil.rmtree(folder_path)
\ No newline at end of file
+        # Delete the tree's image folders
+        for folder_path in folder_paths:
+            if os.path.exists(folder_path):
+                shutil.rmtree(folder_path)
+
+    @classmethod
+    def bulk_delete(cls, ids):
+        """
+        Delete trees with their logs and images using a handful of set-based
+        statements in one transaction. Files are not touched here: their names
+        go into a DeletionJob that a background thread sweeps after commit.
+        Returns the job, or None when none of `ids` exist.
+        """
+        with transaction.atomic():
+            tree_ids = list(cls.objects.filter(pk__in=ids).values_list('pk', flat=True))
+            if not tree_ids:
+                return None
+            through = cls.images.through
+            images = Image.objects.filter(
+                Q(tree_id__in=tree_ids)
+                | Q(pk__in=through.objects.filter(tree_id__in=tree_ids).values('image_id'))
+            )
+            image_rows = list(images.values_list('pk', 'blob_id', 'image', 'thumbnail', 'renditions'))
+            image_ids = [row[0] for row in image_rows]
+
+            paths = set(cls.objects.filter(pk__in=tree_ids).exclude(document='').values_list('document', flat=True))
+            blob_files = defaultdict(set)
+            for pk, blob_id, image, thumbnail, renditions in image_rows:
+                names = {image, thumbnail} | {name for files in renditions.values() for name in files.values()}
+                names.discard(None)
+                names.discard('')
+                (blob_files[blob_id] if blob_id else paths).update(names)
+
+            # Detach rows that stay but point at something that is going
+            now = timezone.now()
+            Image.objects.filter(log__tree_id__in=tree_ids).exclude(pk__in=image_ids).update(log=None, updated_at=now)
+            for field in ('parent_male', 'parent_female', 'clone_source', 'pollinated_by'):
+                cls.objects.filter(**{f'{field}_id__in': tree_ids}).exclude(pk__in=tree_ids).update(
+                    **{field: None}, updated_at=now
+                )
+            through.objects.filter(Q(tree_id__in=tree_ids) | Q(image_id__in=image_ids)).delete()
+            # Unfinished uploads into these trees or their logs go too; their partial files after commit
+            uploads = Upload.objects.filter(Q(tree_id__in=tree_ids) | Q(log__tree_id__in=tree_ids))
+            upload_ids = list(uploads.values_list('pk', flat=True))
+
+            # _raw_delete issues a plain DELETE ... WHERE. QuerySet.delete() would
+            # load every row to send post_delete signals and walk the cascades.
+            # (It returns None when the filter is empty, e.g. trees without images.)
+            # Tombstones are written first, in the same set-based way, for /api/sync/.
+            Tombstone.record(Image.objects.filter(pk__in=image_ids))
+            Tombstone.record(TreeLog.objects.filter(tree_id__in=tree_ids))
+            Tombstone.record(cls.objects.filter(pk__in=tree_ids))
+            images_deleted = Image.objects.filter(pk__in=image_ids)._raw_delete(Image.objects.db) or 0
+            Upload.objects.filter(pk__in=upload_ids)._raw_delete(Upload.objects.db)
+            TreeLog.objects.filter(tree_id__in=tree_ids)._raw_delete(TreeLog.objects.db)
+            SensorReading.objects.filter(tree_id__in=tree_ids)._raw_delete(SensorReading.objects.db)
+            ReadingRollup.objects.filter(tree_id__in=tree_ids)._raw_delete(ReadingRollup.objects.db)
+            trees_deleted = cls.objects.filter(pk__in=tree_ids)._raw_delete(cls.objects.db) or 0
+
+            # Recount the blobs that lost references; unreferenced ones go with their files
+            remaining = (
+                Image.objects.filter(blob=OuterRef('pk')).order_by()
+                .values('blob').annotate(n=Count('pk')).values('n')
+            )
+            ImageBlob.objects.filter(pk__in=blob_files).update(refcount=Coalesce(Subquery(remaining), 0))
+            orphans = ImageBlob.objects.filter(pk__in=blob_files, refcount=0)
+            for pk, name in orphans.values_list('pk', 'file'):
+                paths |= blob_files[pk] | {name}
+            orphans._raw_delete(ImageBlob.objects.db)
+
+            job = DeletionJob.objects.create(
+                trees_deleted=trees_deleted, images_deleted=images_deleted,
+                paths=sorted(paths) + tree_folders(tree_ids), files_total=len(paths),
+            )
+            transaction.on_commit(job.start)
+            if upload_ids:
+                from .uploads import remove_parts
+                transaction.on_commit(lambda: remove_parts(upload_ids))
+            # The raw deletes skip the signals that normally bump these
+            bump_versions(Tree, TreeLog, Image)
+            emit('tree', 'deleted', tree_ids, tree_ids)
+        return job
+
+
+def tree_folders(tree_ids):
+    """Existing media folders of these trees (`<id>/` plus legacy `<nickname>_<id>/`), as storage names"""
+    images_root = os.path.join(settings.MEDIA_ROOT, 'tree_images')
+    if not os.path.isdir(images_root):
+        return []
+    wanted = {str(pk) for pk in tree_ids}
+    return sorted(
+        f'tree_images/{entry.name}/' for entry in os.scandir(images_root)
+        if entry.is_dir() and entry.name.rsplit('_', 1)[-1] in wanted
+    )
+
+class DeletionJob(models.Model):
+    """งานลบไฟล์เบื้องหลังหลังการลบต้นไม้หลายรายการ (ข้อมูลในฐานข้อมูลถูกลบไปแล้ว)"""
+    status = models.CharField(
+        max_length=20, choices=DELETION_JOB_STATUS_CHOICES, default="pending",
+        help_text="สถานะการลบไฟล์"
+    )
+    trees_deleted = models.PositiveIntegerField(
+        default=0,
+        help_text="จำนวนต้นไม้ที่ถูกลบ"
+    )
+    images_deleted = models.PositiveIntegerField(
+        default=0,
+        help_text="จำนวนรูปภาพที่ถูกลบ"
+    )
+    paths = models.JSONField(
+        default=list,
+        help_text="ไฟล์และโฟลเดอร์ (ลงท้ายด้วย /) ที่ต้องลบ"
+    )
+    files_total = models.PositiveIntegerField(
+        default=0,
+        help_text="จำนวนไฟล์ทั้งหมดที่ต้องลบ"
+    )
+    files_removed = models.PositiveIntegerField(
+        default=0,
+        help_text="จำนวนไฟล์ที่ลบแล้ว"
+    )
+    files_failed = models.PositiveIntegerField(
+        default=0,
+        help_text="จำนวนไฟล์ที่ลบไม่สำเร็จ"
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        help_text="วัน-เวลาที่สร้างงาน"
+    )
+    claimed_at = models.DateTimeField(
+        null=True, blank=True,
+        help_text="เวลาที่เริ่มลบไฟล์"
+    )
+    finished_at = models.DateTimeField(
+        null=True, blank=True,
+        help_text="เวลาที่ลบไฟล์เสร็จ"
+    )
+
+    SWEEP_WORKERS = 8
+    SWEEP_CHUNK = 200
+
+    @classmethod
+    def claim(cls, pk=None, stale_after=timedelta(minutes=10)):
+        """Take one pending (or abandoned) job, resetting its counters; None if there is none"""
+        now = timezone.now()
+        waiting = Q(status='pending') | Q(status='running', claimed_at__lt=now - stale_after)
+        with transaction.atomic():
+            jobs = cls.objects.select_for_update(skip_locked=True).filter(waiting).order_by('id')
+            job = (jobs.filter(pk=pk) if pk else jobs).first()
+            if job is None:
+                return None
+            fields = {'status': 'running', 'claimed_at': now, 'files_removed': 0, 'files_failed': 0}
+            cls.objects.filter(pk=job.pk).update(**fields)
+        for name, value in fields.items():
+            setattr(job, name, value)
+        return job
+
+    def start(self):
+        threading.Thread(target=self.run_in_background, args=(self.pk,), daemon=True).start()
+
+    @classmethod
+    def run_in_background(cls, pk):
+        try:
+            job = cls.claim(pk)
+            if job:
+                job.sweep()
+        finally:
+            close_old_connections()
+
+    def sweep(self, workers=None):
+        """Unlink every path in parallel threads, recording progress per chunk"""
+        files = [name for name in self.paths if not name.endswith('/')]
+        folders = [name for name in self.paths if name.endswith('/')]
+        # Content re-uploaded after the delete committed shares the same blob names
+        digests = {os.path.basename(name)[:64] for name in files if name.startswith('blobs/')}
+        live = set(ImageBlob.objects.filter(sha256__in=digests).values_list('sha256', flat=True))
+
+        def remove(name):
+            if name.startswith('blobs/') and os.path.basename(name)[:64] in live:
+                return True
+            try:
+                default_storage.delete(name)
+                return True
+            except OSError:
+                return False
+
+        with ThreadPoolExecutor(max_workers=workers or self.SWEEP_WORKERS) as pool:
+            for start in range(0, len(files), self.SWEEP_CHUNK):
+                results = list(pool.map(remove, files[start:start + self.SWEEP_CHUNK]))
+                removed = sum(results)
+                DeletionJob.objects.filter(pk=self.pk).update(
+                    files_removed=F('files_removed') + removed,
+                    files_failed=F('files_failed') + len(results) - removed,
+                )
+        for name in folders:
+            shutil.rmtree(default_storage.path(name), ignore_errors=True)
+
+        self.refresh_from_db(fields=['files_failed'])
+        DeletionJob.objects.filter(pk=self.pk).update(
+            status='failed' if self.files_failed else 'done', finished_at=timezone.now()
+        )
+
+    @property
+    def progress(self):
+        """Percentage of files handled so far"""
+        if not self.files_total:
+            return 100 if self.status in ('done', 'failed') else 0
+        return round(100 * (self.files_removed + self.files_failed) / self.files_total)
+
+    def __str__(self):
+        return f"DeletionJob {self.id} ({self.status})"
+
+class SensorReading(models.Model):
+    """ค่าจากเซ็นเซอร์ในโรงเรือน (บันทึกถี่ทุกนาที แยกจาก TreeLog ที่ผู้ใช้เขียนเอง)"""
+    tree = models.ForeignKey(
+        'Tree', on_delete=models.CASCADE, related_name='readings', null=True, blank=True, db_index=False,
+        help_text="ต้นไม้ที่วัด (ว่างได้ถ้าเป็นค่าของทั้งสถานที่)"
+    )
+    location = models.CharField(
+        max_length=255, blank=True,
+        help_text="สถานที่ที่วัด เช่น โรงเรือน (ว่างได้ถ้าระบุต้นไม้)"
+    )
+    recorded_at = models.DateTimeField(
+        help_text="วัน-เวลาที่เซ็นเซอร์วัดค่า"
+    )
+    ph = models.FloatField(null=True, blank=True, help_text="ค่า pH")
+    ec = models.FloatField(null=True, blank=True, help_text="ค่า EC (uS/cm หรือ ppm)")
+    temp = models.FloatField(null=True, blank=True, help_text="อุณหภูมิ (°C)")
+    humidity = models.FloatField(null=True, blank=True, help_text="ความชื้น (%)")
+
+    VALUE_FIELDS = ('ph', 'ec', 'temp', 'humidity')
+
+    class Meta:
+        indexes = [
+            # Rows arrive roughly in time order, so a BRIN index (a few pages per
+            # million rows) is enough for time-range scans and costs ingest nothing
+            BrinIndex(fields=['recorded_at'], name='reading_recorded_brin_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=Q(tree__isnull=False) | ~Q(location=''),
+                name='reading_tree_or_location',
+            ),
+            # One reading per series and instant, so a retried batch is not stored
+            # twice (trees.readings inserts with ON CONFLICT DO NOTHING). The tree one
+            # also serves per-tree series and replaces the default FK index.
+            models.UniqueConstraint(
+                fields=['tree', 'recorded_at'], condition=Q(tree__isnull=False),
+                name='reading_tree_time_uniq',
+            ),
+            models.UniqueConstraint(
+                fields=['location', 'recorded_at'], condition=Q(tree__isnull=True),
+                name='reading_location_time_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.tree_id or self.location} @ {self.recorded_at:%Y-%m-%d %H:%M}"
+
+class ReadingRollup(models.Model):
+    """
+    สรุปค่าเซ็นเซอร์รายชั่วโมง/รายวัน (จำนวน ผลรวม ต่ำสุด สูงสุด) อัปเดตทุกครั้งที่รับค่าใหม่
+    ค่าของต้นไม้ใช้ tree; ค่าของทั้งสถานที่ใช้ location (tree ว่าง)
+    """
+    bucket = models.CharField(
+        max_length=10, choices=ROLLUP_BUCKET_CHOICES,
+        help_text="ช่วงเวลาที่สรุป"
+    )
+    tree = models.ForeignKey(
+        'Tree', on_delete=models.CASCADE, related_name='reading_rollups', null=True, blank=True, db_index=False,
+        help_text="ต้นไม้ (ว่างถ้าเป็นค่าของทั้งสถานที่)"
+    )
+    location = models.CharField(
+        max_length=255, blank=True,
+        help_text="สถานที่ (เฉพาะแถวที่ไม่มีต้นไม้)"
+    )
+    start = models.DateTimeField(
+        help_text="เวลาเริ่มของช่วง (date_trunc ตาม TIME_ZONE)"
+    )
+    ph_count = models.PositiveIntegerField(default=0)
+    ph_sum = models.FloatField(null=True, blank=True)
+    ph_min = models.FloatField(null=True, blank=True)
+    ph_max = models.FloatField(null=True, blank=True)
+    ec_count = models.PositiveIntegerField(default=0)
+    ec_sum = models.FloatField(null=True, blank=True)
+    ec_min = models.FloatField(null=True, blank=True)
+    ec_max = models.FloatField(null=True, blank=True)
+    temp_count = models.PositiveIntegerField(default=0)
+    temp_sum = models.FloatField(null=True, blank=True)
+    temp_min = models.FloatField(null=True, blank=True)
+    temp_max = models.FloatField(null=True, blank=True)
+    humidity_count = models.PositiveIntegerField(default=0)
+    humidity_sum = models.FloatField(null=True, blank=True)
+    humidity_min = models.FloatField(null=True, blank=True)
+    humidity_max = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            # Upsert targets for trees.readings; they also serve the range scans
+            models.UniqueConstraint(
+                fields=['tree', 'bucket', 'start'], condition=Q(tree__isnull=False),
+                name='rollup_tree_bucket_uniq',
+            ),
+            models.UniqueConstraint(
+                fields=['location', 'bucket', 'start'], condition=Q(tree__isnull=True),
+                name='rollup_location_bucket_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.tree_id or self.location} {self.bucket} @ {self.start:%Y-%m-%d %H:%M}"
+
+class Tombstone(models.Model):
+    """
+    บันทึกการลบสำหรับการซิงก์แบบส่วนต่าง (/api/sync/) ลูกข่ายที่ออฟไลน์จะรู้ว่าต้องลบรายการใด
+    object_id ว่าง = ข้อมูลทั้งชุดถูกเขียนใหม่ (เช่น นำเข้าจากไฟล์) ลูกข่ายต้องโหลดใหม่ทั้งหมด
+    """
+    model = models.CharField(
+        max_length=20, choices=SYNC_MODEL_CHOICES,
+        help_text="ประเภทของรายการที่ถูกลบ"
+    )
+    object_id = models.BigIntegerField(
+        null=True, blank=True,
+        help_text="รหัสของรายการที่ถูกลบ (ว่าง = ต้องซิงก์ข้อมูลประเภทนี้ใหม่ทั้งหมด)"
+    )
+    deleted_at = models.DateTimeField(
+        default=timezone.now, db_index=True,
+        help_text="วัน-เวลาที่ลบ"
+    )
+
+    @classmethod
+    def record(cls, queryset):
+        """Tombstones for every row of `queryset` with one INSERT ... SELECT (for deletes that skip post_delete)"""
+        try:
+            sql, params = queryset.order_by().values('pk').query.sql_with_params()
+        except EmptyResultSet:
+            return
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {quote(cls._meta.db_table)} (model, deleted_at, object_id) '
+                f'SELECT %s, %s, deleted.* FROM ({sql}) AS deleted',
+                [queryset.model._meta.model_name, timezone.now(), *params],
+            )
+
+    @classmethod
+    def reset(cls, model_classes):
+        """Tell sync clients that every row of these models may have changed"""
+        cls.objects.bulk_create([cls(model=model._meta.model_name) for model in model_classes])
+        bump_versions(*model_classes)
+
+    def __str__(self):
+        return f"{self.model} {self.object_id if self.object_id is not None else '*'}"
+
+class Upload(models.Model):
+    """
+    การอัปโหลดไฟล์แบบต่อได้ (resumable): รับไฟล์ทีละส่วนลงดิสก์ แล้วสร้างรูปภาพ
+    หรือแนบเอกสารให้ต้นไม้เมื่อครบ (ดู trees.uploads)
+    """
+    id = models.UUIDField(
+        primary_key=True, default=uuid.uuid4, editable=False,
+        help_text="รหัสการอัปโหลด (ใช้ใน URL ของแต่ละส่วน)"
+    )
+    kind = models.CharField(
+        max_length=20, choices=UPLOAD_KIND_CHOICES,
+        help_text="สิ่งที่จะสร้างเมื่ออัปโหลดครบ"
+    )
+    tree = models.ForeignKey(
+        'Tree', on_delete=models.CASCADE, related_name='+', null=True, blank=True,
+        help_text="ต้นไม้ที่รูปภาพหรือเอกสารจะถูกแนบ"
+    )
+    log = models.ForeignKey(
+        TreeLog, on_delete=models.CASCADE, related_name='+', null=True, blank=True,
+        help_text="บันทึกที่รูปภาพจะถูกแนบ (ถ้ามี)"
+    )
+    filename = models.CharField(
+        max_length=255,
+        help_text="ชื่อไฟล์เดิม"
+    )
+    size = models.PositiveBigIntegerField(
+        help_text="ขนาดไฟล์ทั้งหมด (ไบต์)"
+    )
+    offset = models.PositiveBigIntegerField(
+        default=0,
+        help_text="จำนวนไบต์ที่ได้รับแล้ว"
+    )
+    sha256 = models.CharField(
+        max_length=64, blank=True,
+        help_text="ค่า SHA-256 ที่ลูกข่ายแจ้ง (ถ้ามี ใช้ตรวจสอบเมื่ออัปโหลดครบ)"
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        help_text="วัน-เวลาที่เริ่มอัปโหลด"
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True, db_index=True,
+        help_text="วัน-เวลาที่ได้รับข้อมูลล่าสุด"
+    )
+
+    @property
+    def path(self):
+        """Partial file on disk, outside MEDIA_ROOT so it is never served"""
+        return os.path.join(self.folder(), f'{self.pk}.part')
+
+    @staticmethod
+    def folder():
+        return getattr(settings, 'UPLOAD_TEMP_DIR', os.path.join(settings.MEDIA_ROOT, os.pardir, 'uploads'))
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
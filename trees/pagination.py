@@ -0,0 +1,170 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import namedtuple
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Field, Func, Q, Value
+from django.db.models.lookups import GreaterThan, LessThan
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+from rest_framework.utils.urls import replace_query_param
+
+from .models import TreeLog
+
+KeysetCursor = namedtuple('KeysetCursor', ['reverse', 'position'])
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Cursor pagination that seeks on the full sort key.
+
+    DRF's CursorPagination only filters on the first ordering column and uses
+    OFFSET to step over rows that share it, so deep pages over timestamps get
+    slower. Here the cursor carries every ordering value of the boundary row
+    and the next page is a single seek past it (see `_seek_filter`), so every
+    page costs the same however deep it is.
+    The ordering always ends with `id` so that the key is unique.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('-created_at', 'id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request, queryset)
+        reverse, position = self.cursor or (False, None)
+
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._seek_filter(ordering, position))
+
+        # Fetch one extra row to know whether another page follows.
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = bool(self.page)
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None and bool(self.page)
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if ordering[-1].lstrip('-') not in ('id', 'pk'):
+            ordering += ('id',)
+        return ordering
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        position = self._get_position_from_instance(self.page[-1], self.ordering)
+        return self.encode_cursor(KeysetCursor(reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        position = self._get_position_from_instance(self.page[0], self.ordering)
+        return self.encode_cursor(KeysetCursor(reverse=True, position=position))
+
+    def decode_cursor(self, request, queryset=None):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            tokens = json.loads(urlsafe_b64decode(padded.encode('ascii')))
+            reverse = bool(tokens.get('r', 0))
+            raw_position = tokens['p']
+            if not isinstance(raw_position, list) or len(raw_position) != len(self.ordering):
+                raise ValueError('cursor does not match ordering')
+            position = [
+                self._get_field(queryset, order).to_python(value)
+                for order, value in zip(self.ordering, raw_position)
+            ]
+        except (TypeError, ValueError, KeyError, AttributeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return KeysetCursor(reverse=reverse, position=position)
+
+    def encode_cursor(self, cursor):
+        tokens = {'p': cursor.position}
+        if cursor.reverse:
+            tokens['r'] = 1
+        payload = json.dumps(tokens, separators=(',', ':')).encode('utf-8')
+        encoded = urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _get_position_from_instance(self, instance, ordering):
+        position = []
+        for order in ordering:
+            field_name = order.lstrip('-')
+            if isinstance(instance, dict):
+                value = instance[field_name]
+            else:
+                value = getattr(instance, field_name)
+            # str() keeps full microsecond precision for datetimes.
+            position.append(value if isinstance(value, int) else str(value))
+        return position
+
+    def _get_field(self, queryset, order):
+        field_name = order.lstrip('-')
+        if field_name in queryset.query.annotations:
+            # e.g. `strain_name` ordering on an F('strain__name') annotation
+            return queryset.query.annotations[field_name].output_field
+        opts = queryset.model._meta
+        return opts.pk if field_name == 'pk' else opts.get_field(field_name)
+
+    def _seek_filter(self, ordering, position):
+        """
+        Rows after `position` in `ordering`. With one direction throughout this is
+        a row comparison `(a, b) > (x, y)`; otherwise it's expanded into ORs that
+        respect each column's direction, ANDed with a redundant bound on the
+        leading column so the index can still seek to the start of the page.
+        """
+        descending = {order.startswith('-') for order in ordering}
+        if len(descending) == 1:
+            row = RowValue(*(F(order.lstrip('-')) for order in ordering))
+            boundary = RowValue(*(Value(value) for value in position))
+            return LessThan(row, boundary) if descending.pop() else GreaterThan(row, boundary)
+
+        condition = Q()
+        equal_prefix = {}
+        for order, value in zip(ordering, position):
+            field_name = order.lstrip('-')
+            lookup = '__lt' if order.startswith('-') else '__gt'
+            condition |= Q(**equal_prefix, **{field_name + lookup: value})
+            equal_prefix[field_name] = value
+        leading = ordering[0]
+        bound = Q(**{leading.lstrip('-') + ('__lte' if leading.startswith('-') else '__gte'): position[0]})
+        return bound & condition
+
+
+class RowValue(Func):
+    """`(a, b, ...)`: a row constructor, compared column by column left to right"""
+    function = ''
+    output_field = Field()
+
+
+class TreeCursorPagination(KeysetCursorPagination):
+    ordering = ('-created_at', 'id')
+
+
+class TreeLogCursorPagination(KeysetCursorPagination):
+    ordering = TreeLog.TIMELINE_ORDERING
@@ -0,0 +1,253 @@
+"""
+Inbreeding and kinship over the breeding graph (Colleau's indirect method).
+
+The ancestors of the requested trees are loaded with one recursive query
+(trees.lineage) and ordered so parents come before children. The additive
+relationship matrix A is never built: it factors as A = T D T', where T
+passes half of each parent's genes to its offspring and D is the diagonal of
+Mendelian sampling variances, so any set of columns A[:, c] costs two sweeps
+over the generations, each a few NumPy operations on a (trees x columns)
+array:
+
+    y = T' e_c    from the youngest generation up: y[parent] += y[child] / 2
+    w = T D y     from the founders down: w[i] = D[i] y[i] + (w[sire(i)] + w[dam(i)]) / 2
+
+D needs every tree's inbreeding, F[i] = A[sire(i), dam(i)] / 2, which is
+computed a generation at a time from the parents' columns over the
+generations before it, and kept per tree for the current Tree version so
+later requests only compute it for trees they add. Kinship (coancestry) is
+A / 2, so the expected inbreeding of a cross is the kinship of its parents.
+A clone is genetically its source: it takes all of the source's genes (half
+from each "parent") and adds no sampling variance. `pollinated_by` describes
+a pollination event, not parentage, and is ignored. Loaded pedigrees are
+memoised per Tree version (trees.caching) in an LRU bounded by their size in
+memory (``settings.PEDIGREE_CACHE_BYTES``).
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from django.conf import settings
+
+from .caching import get_versions
+from .lineage import walk_lineage
+from .models import Tree
+
+PEDIGREE_RELATIONS = ('parent_male', 'parent_female', 'clone_source')
+# Far deeper than any real breeding program; only guards against bad data
+MAX_GENERATIONS = 1000
+DEFAULT_PEDIGREE_CACHE_BYTES = 64 * 1024 * 1024
+# Columns of A computed together; bounds the working arrays to trees x 256 floats
+COLUMN_CHUNK = 256
+# Position of a missing parent: the zero row kept at the end of every working array
+UNKNOWN = -1
+
+
+class PedigreeCycleError(ValueError):
+    """A tree is recorded as its own ancestor"""
+
+
+class Pedigree:
+    """Relationship coefficients of a set of trees and all their ancestors"""
+
+    def __init__(self, tree_ids, edges, known=None):
+        """`known`: {tree ID: (A[i, i], D[i])} already computed at this Tree version; filled in as it goes"""
+        parents = {pk: {} for pk in tree_ids}
+        for parent, child, relation in edges:
+            parents.setdefault(child, {})[relation] = parent
+            parents.setdefault(parent, {})
+
+        generation = self._generations(parents)
+        self.ids = sorted(parents, key=lambda pk: (generation[pk], pk))
+        self.index = {pk: i for i, pk in enumerate(self.ids)}
+        n = len(self.ids)
+        self.sires = np.full(n, UNKNOWN)
+        self.dams = np.full(n, UNKNOWN)
+        clone = np.zeros(n, dtype=bool)
+        for i, pk in enumerate(self.ids):
+            links = parents[pk]
+            if 'clone_source' in links:
+                self.sires[i] = self.dams[i] = self.index[links['clone_source']]
+                clone[i] = True
+            else:
+                self.sires[i] = self.index.get(links.get('parent_male'), UNKNOWN)
+                self.dams[i] = self.index.get(links.get('parent_female'), UNKNOWN)
+
+        gens = np.array([generation[pk] for pk in self.ids], dtype=int)
+        bounds = np.flatnonzero(np.diff(gens)) + 1
+        self.blocks = list(zip(np.r_[0, bounds].tolist(), np.r_[bounds, n].tolist()))
+        # Per generation: its trees grouped by parent, so what each parent receives is one reduceat
+        self.scatter = []
+        for lo, hi in self.blocks:
+            links = np.r_[self.sires[lo:hi], self.dams[lo:hi]]
+            order = np.argsort(links, kind='stable')
+            targets, starts = np.unique(links[order], return_index=True)
+            self.scatter.append((np.tile(np.arange(lo, hi), 2)[order], targets, starts))
+        self._variances(clone, {} if known is None else known)
+
+    def _variances(self, clone, known):
+        """A's diagonal and D, one generation at a time (each needs only earlier ones)"""
+        n = len(self.ids)
+        # A spare slot for UNKNOWN (-1): a missing parent, which adds nothing to any column
+        self.diagonal = np.ones(n + 1)
+        self.variance = np.zeros(n + 1)
+        for lo, hi in self.blocks:
+            cached = [known.get(pk) for pk in self.ids[lo:hi]]
+            if None not in cached:
+                self.diagonal[lo:hi], self.variance[lo:hi] = np.array(cached).T
+                continue
+            s, d = self.sires[lo:hi], self.dams[lo:hi]
+            crossed = np.flatnonzero((s != UNKNOWN) & (d != UNKNOWN) & ~clone[lo:hi])
+            between = np.zeros(hi - lo)
+            if crossed.size:
+                rows, columns = s[crossed], d[crossed]
+                if len(np.unique(rows)) < len(np.unique(columns)):
+                    # Columns are the cost: use whichever side has fewer distinct parents
+                    rows, columns = columns, rows
+                between[crossed] = self._entries(rows, columns, lo)
+            diagonal = np.where(clone[lo:hi], self.diagonal[s], 1 + between / 2)
+            inbreeding = self.diagonal[np.array([s, d])] - 1
+            present = np.array([s != UNKNOWN, d != UNKNOWN])
+            # 1 - (number of known parents) / 4 - (their inbreeding) / 4
+            variance = 1 - present.sum(axis=0) / 4 - (inbreeding * present).sum(axis=0) / 4
+            self.diagonal[lo:hi] = diagonal
+            self.variance[lo:hi] = np.where(clone[lo:hi], 0, variance)
+            known.update(zip(self.ids[lo:hi], zip(diagonal.tolist(), self.variance[lo:hi].tolist())))
+
+    @property
+    def nbytes(self):
+        arrays = [self.sires, self.dams, self.diagonal, self.variance, *(a for block in self.scatter for a in block)]
+        return sum(array.nbytes for array in arrays)
+
+    def _columns(self, columns, stop):
+        """A[:stop, columns] (stop at a generation boundary), plus a trailing zero row"""
+        x = np.zeros((stop + 1, len(columns)))
+        x[columns, np.arange(len(columns))] = 1
+        blocks = [block for block in self.blocks if block[1] <= stop]
+        start = max(columns)
+        for (lo, hi), (children, parents, starts) in zip(reversed(blocks), reversed(self.scatter[:len(blocks)])):
+            if lo <= start:
+                received = np.add.reduceat(x[children], starts, axis=0)
+                received *= 0.5
+                x[parents] += received
+        x *= self.variance[np.r_[:stop, UNKNOWN], None]
+        for lo, hi in blocks:
+            inherited = x[self.sires[lo:hi]]
+            inherited += x[self.dams[lo:hi]]
+            inherited *= 0.5
+            x[lo:hi] += inherited
+        return x
+
+    def _entries(self, rows, columns, stop=None):
+        """A[rows[k], columns[k]] for positions before `stop`, a chunk of distinct columns at a time"""
+        stop = len(self.ids) if stop is None else stop
+        values = np.empty(len(rows))
+        distinct, where = np.unique(columns, return_inverse=True)
+        for first in range(0, len(distinct), COLUMN_CHUNK):
+            chunk = slice(first, first + COLUMN_CHUNK)
+            block = self._columns(distinct[chunk], stop)
+            selected = (where >= first) & (where < first + COLUMN_CHUNK)
+            values[selected] = block[rows[selected], where[selected] - first]
+        return values
+
+    @staticmethod
+    def _generations(parents):
+        """Longest path from a founder for every tree (Kahn's algorithm)"""
+        children = {pk: [] for pk in parents}
+        waiting = {}
+        for child, links in parents.items():
+            distinct = set(links.values())
+            waiting[child] = len(distinct)
+            for parent in distinct:
+                children[parent].append(child)
+
+        generation = {pk: 0 for pk, count in waiting.items() if count == 0}
+        ready = list(generation)
+        while ready:
+            pk = ready.pop()
+            for child in children[pk]:
+                generation[child] = max(generation.get(child, 0), generation[pk] + 1)
+                waiting[child] -= 1
+                if waiting[child] == 0:
+                    ready.append(child)
+        if any(waiting.values()):
+            raise PedigreeCycleError("pedigree contains a cycle")
+        return generation
+
+    def positions(self, tree_ids):
+        return np.array([self.index[pk] for pk in tree_ids], dtype=int)
+
+    def inbreeding(self, tree_ids):
+        return self.diagonal[self.positions(tree_ids)] - 1
+
+    def kinship(self, tree_ids, other_ids=None):
+        """Coancestry matrix between two candidate lists (the same list when `other_ids` is None)"""
+        i = self.positions(tree_ids)
+        j = i if other_ids is None else self.positions(other_ids)
+        rows, columns = np.repeat(i, len(j)), np.tile(j, len(i))
+        return self._entries(rows, columns).reshape(len(i), len(j)) / 2
+
+    def cross_inbreeding(self, crosses):
+        """Expected inbreeding of the offspring of each (male, female) pair"""
+        males = self.positions([male for male, _ in crosses])
+        females = self.positions([female for _, female in crosses])
+        return self._entries(males, females) / 2
+
+
+class PedigreeCache:
+    """
+    Thread-safe LRU of loaded pedigrees, bounded by their total size in bytes,
+    plus each tree's A[i, i] and D[i] at the current Tree version, which any
+    later pedigree containing the tree reuses instead of recomputing.
+    """
+
+    def __init__(self, setting='PEDIGREE_CACHE_BYTES', default=DEFAULT_PEDIGREE_CACHE_BYTES):
+        self.setting, self.default = setting, default
+        self.entries = OrderedDict()
+        self.version, self.variances = None, {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            pedigree = self.entries.get(key)
+            if pedigree is not None:
+                self.entries.move_to_end(key)
+            return pedigree
+
+    def set(self, key, pedigree):
+        with self.lock:
+            self.entries[key] = pedigree
+            self.entries.move_to_end(key)
+            limit = getattr(settings, self.setting, self.default)
+            size = sum(entry.nbytes for entry in self.entries.values())
+            while size > limit and self.entries:
+                _, old = self.entries.popitem(last=False)
+                size -= old.nbytes
+
+    def known(self, version):
+        """{tree ID: (A[i, i], D[i])} computed so far at `version`"""
+        with self.lock:
+            if version != self.version:
+                self.version, self.variances = version, {}
+            return self.variances
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.version, self.variances = None, {}
+
+
+pedigrees = PedigreeCache()
+
+
+def get_pedigree(tree_ids):
+    """Pedigree covering `tree_ids`, memoised until the next committed Tree change"""
+    tree_ids = frozenset(tree_ids)
+    version = get_versions([Tree])[0]
+    key = (version, tree_ids)
+    pedigree = pedigrees.get(key)
+    if pedigree is None:
+        edges, _ = walk_lineage(sorted(tree_ids), MAX_GENERATIONS, 'up', PEDIGREE_RELATIONS)
+        pedigree = Pedigree(tree_ids, edges, known=pedigrees.known(version))
+        pedigrees.set(key, pedigree)
+    return pedigree
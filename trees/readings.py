@@ -0,0 +1,213 @@
+"""
+Batched ingest for SensorReading.
+
+Probes post thousands of readings at once. Each one is checked in plain Python
+(a DRF serializer per row would cost more than the insert), tree IDs are
+verified with a single query, and the valid rows are streamed with PostgreSQL
+``COPY`` into a temporary staging table instead of multi-row INSERTs. From
+there one INSERT … SELECT moves them into SensorReading and the hourly/daily
+ReadingRollup rows are updated with a ``date_trunc`` GROUP BY upsert over the
+batch alone, so rollups stay current without rescanning history.
+
+Probes retry batches that timed out, so a reading for a tree (or a location)
+at an instant it already has is dropped by ``ON CONFLICT DO NOTHING``; only
+the rows the INSERT returns reach the rollups.
+"""
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .copying import copy_rows, create_staging
+from .models import ReadingRollup, SensorReading, Tree
+
+DEFAULT_MAX_READINGS = 10000
+MAX_REPORTED_ERRORS = 1000
+COPY_COLUMNS = ('tree_id', 'location', 'recorded_at') + SensorReading.VALUE_FIELDS
+STAGING_TABLE = 'sensor_reading_staging'
+INSERTED_TABLE = 'sensor_reading_inserted'
+
+
+class ReadingError(ValueError):
+    def __init__(self, field, message):
+        super().__init__(message)
+        self.field = field
+
+
+def max_readings():
+    return getattr(settings, 'SENSOR_INGEST_MAX_READINGS', DEFAULT_MAX_READINGS)
+
+
+def _timestamp(value):
+    """ISO 8601 text, Unix seconds or a MessagePack timestamp -> aware datetime"""
+    if isinstance(value, datetime):
+        return timezone.make_aware(value) if timezone.is_naive(value) else value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        try:
+            return datetime.fromtimestamp(value, tz=dt_timezone.utc)
+        except (OverflowError, OSError, ValueError):
+            # NaN, infinities and instants outside years 1-9999
+            raise ReadingError('recorded_at', f'เวลาอยู่นอกช่วงที่รองรับ: {value}')
+    if not isinstance(value, str) or not value:
+        raise ReadingError('recorded_at', 'ต้องระบุเวลา (ISO 8601 หรือ Unix timestamp)')
+    try:
+        parsed = parse_datetime(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ReadingError('recorded_at', f'รูปแบบเวลาไม่ถูกต้อง: {value}')
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+
+def _number(name, value):
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool):
+        raise ReadingError(name, 'ต้องเป็นตัวเลข')
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ReadingError(name, 'ต้องเป็นตัวเลข')
+    if not math.isfinite(number):
+        raise ReadingError(name, 'ต้องเป็นตัวเลข')
+    return number
+
+
+def _tree_id(value):
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool):
+        raise ReadingError('tree', 'รหัสต้นไม้ไม่ถูกต้อง')
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ReadingError('tree', 'รหัสต้นไม้ไม่ถูกต้อง')
+
+
+def clean_reading(item, defaults):
+    """One posted reading (merged over the batch-level `defaults`) -> COPY_COLUMNS tuple"""
+    if not isinstance(item, dict):
+        raise ReadingError(None, 'แต่ละรายการต้องเป็น object')
+    item = {**defaults, **item}
+    tree_id = _tree_id(item.get('tree'))
+    location = item.get('location') or ''
+    if not isinstance(location, str):
+        raise ReadingError('location', 'ต้องเป็นข้อความ')
+    location = location.strip()
+    if len(location) > SensorReading._meta.get_field('location').max_length:
+        raise ReadingError('location', 'ยาวเกินกำหนด')
+    if tree_id is None and not location:
+        raise ReadingError('tree', 'ต้องระบุต้นไม้ (tree) หรือสถานที่ (location)')
+    values = tuple(_number(name, item.get(name)) for name in SensorReading.VALUE_FIELDS)
+    if all(value is None for value in values):
+        raise ReadingError(None, f'ต้องมีค่าอย่างน้อยหนึ่งค่า ({", ".join(SensorReading.VALUE_FIELDS)})')
+    return (tree_id, location, _timestamp(item.get('recorded_at'))) + values
+
+
+def copy_readings(rows, table):
+    """Load COPY_COLUMNS tuples into `table` with a single COPY ... FROM STDIN"""
+    copy_rows(rows, table, COPY_COLUMNS)
+
+
+def update_rollups(source):
+    """
+    Add the readings in table `source` to the hourly and daily ReadingRollup
+    rows: per metric count and sum are added, min/max widened. Tree readings
+    roll up by tree, the rest by location.
+    """
+    quote = connection.ops.quote_name
+    rollup = quote(ReadingRollup._meta.db_table)
+    metrics = SensorReading.VALUE_FIELDS
+    columns = ', '.join(f'{m}_count, {m}_sum, {m}_min, {m}_max' for m in metrics)
+    aggregates = ', '.join(f'count({m}), sum({m}), min({m}), max({m})' for m in metrics)
+    merge = ', '.join(
+        f'{m}_count = r.{m}_count + EXCLUDED.{m}_count, '
+        f'{m}_sum = COALESCE(r.{m}_sum + EXCLUDED.{m}_sum, r.{m}_sum, EXCLUDED.{m}_sum), '
+        # LEAST/GREATEST skip NULLs
+        f'{m}_min = LEAST(r.{m}_min, EXCLUDED.{m}_min), {m}_max = GREATEST(r.{m}_max, EXCLUDED.{m}_max)'
+        for m in metrics
+    )
+    # (conflict target, tree_id, location, rows) per partial unique index
+    keys = [
+        ('tree_id', 'tree_id', "''", 'tree_id IS NOT NULL'),
+        ('location', 'NULL::bigint', 'location', 'tree_id IS NULL'),
+    ]
+    with connection.cursor() as cursor:
+        for bucket, _ in ReadingRollup._meta.get_field('bucket').choices:
+            for target, tree, location, condition in keys:
+                cursor.execute(
+                    f'INSERT INTO {rollup} AS r (bucket, tree_id, location, start, {columns}) '
+                    f'SELECT %s, {tree}, {location}, date_trunc(%s, recorded_at, %s), {aggregates} '
+                    f'FROM {quote(source)} WHERE {condition} GROUP BY 2, 3, 4 '
+                    f'ON CONFLICT ({target}, bucket, start) WHERE {condition} DO UPDATE SET {merge}',
+                    [bucket, bucket, timezone.get_default_timezone_name()],
+                )
+
+
+def rebuild_rollups():
+    """Recompute every ReadingRollup from SensorReading (after loading readings some other way)"""
+    with transaction.atomic():
+        ReadingRollup.objects.all()._raw_delete(ReadingRollup.objects.db)
+        update_rollups(SensorReading._meta.db_table)
+
+
+def store_readings(rows):
+    """
+    COPY into a staging table, then move the rows into SensorReading and the
+    rollups. Returns how many were new; the rest were already stored.
+    """
+    quote = connection.ops.quote_name
+    table = quote(SensorReading._meta.db_table)
+    columns = ', '.join(quote(name) for name in COPY_COLUMNS)
+    with transaction.atomic():
+        create_staging(STAGING_TABLE, SensorReading._meta.db_table, COPY_COLUMNS)
+        create_staging(INSERTED_TABLE, SensorReading._meta.db_table, COPY_COLUMNS)
+        copy_readings(rows, STAGING_TABLE)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'WITH inserted AS ('
+                f'INSERT INTO {table} ({columns}) SELECT {columns} FROM {STAGING_TABLE} '
+                f'ON CONFLICT DO NOTHING RETURNING {columns}'
+                f') INSERT INTO {INSERTED_TABLE} ({columns}) SELECT {columns} FROM inserted'
+            )
+            created = cursor.rowcount
+        update_rollups(INSERTED_TABLE)
+    return created
+
+
+def ingest_readings(items, defaults=None):
+    """
+    Validate and store posted readings. Invalid ones are skipped and reported
+    as ``{index, field, error}``; the rest are written in one transaction, and
+    those already stored are counted as `duplicates`.
+    """
+    defaults = defaults or {}
+    rows, errors = [], []
+    error_count = 0
+
+    def error(index, field, message):
+        nonlocal error_count
+        error_count += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({'index': index, 'field': field, 'error': message})
+
+    indexed = []
+    for index, item in enumerate(items):
+        try:
+            indexed.append((index, clean_reading(item, defaults)))
+        except ReadingError as e:
+            error(index, e.field, str(e))
+
+    tree_ids = {row[0] for _, row in indexed if row[0] is not None}
+    known = set(Tree.objects.filter(pk__in=tree_ids).values_list('pk', flat=True)) if tree_ids else set()
+    for index, row in indexed:
+        if row[0] is not None and row[0] not in known:
+            error(index, 'tree', f'ไม่พบต้นไม้รหัส {row[0]}')
+        else:
+            rows.append(row)
+
+    created = store_readings(rows) if rows else 0
+    return {'created': created, 'duplicates': len(rows) - created, 'skipped': error_count, 'errors': errors}
@@ -0,0 +1,75 @@
+"""
+Fast API renderers and parsers: orjson for JSON, plus MessagePack.
+
+The client picks the format with ``Accept`` (``application/json`` or
+``application/msgpack``) and may send bodies in either with
+``Content-Type``. Both encoders run in C; values they don't know natively
+(Decimal, dates, lazy strings, numpy arrays...) fall back to DRF's
+JSONEncoder rules, so payloads match the stock JSONRenderer apart from
+datetimes keeping their microseconds.
+"""
+import msgpack
+import orjson
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+_fallback = JSONEncoder()
+
+
+def _default(obj):
+    """Values orjson/msgpack can't encode themselves, as DRF's JSONEncoder would"""
+    return _fallback.default(obj)
+
+
+class ORJSONRenderer(BaseRenderer):
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+    options = orjson.OPT_UTC_Z | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        options = self.options
+        if accepted_media_type and 'indent' in accepted_media_type:
+            # application/json; indent=N -> orjson only knows 2
+            options |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=_default, option=options)
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # Aware datetimes become the MessagePack timestamp type
+        return msgpack.packb(data, default=_default, use_bin_type=True, datetime=True)
+
+
+class ORJSONParser(BaseParser):
+    media_type = 'application/json'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read() if stream is not None else b'')
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+class MessagePackParser(BaseParser):
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            # Timestamps arrive as aware datetimes, which serializer fields accept as they are
+            data = msgpack.unpackb(stream.read() if stream is not None else b'', raw=False, timestamp=3)
+        except ValueError as exc:
+            raise ParseError(f'MessagePack parse error - {str(exc) or type(exc).__name__}')
+        return data
+
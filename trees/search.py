@@ -0,0 +1,97 @@
+"""
+Full-text and trigram search over trees and journal entries.
+
+Both models keep a stored `search_vector` column generated by PostgreSQL from
+their text fields, so the vector is rebuilt by the database on every INSERT or
+UPDATE of that row and never needs a separate reindex. The `simple` text search
+config is used because journal text mixes Thai and English: no stemming, and
+every whitespace-separated run becomes one lexeme. Queries match on lexeme
+prefixes, and trigram word similarity on short fields catches typos and
+partial words in nicknames and log titles.
+
+Thai is written without spaces between words, so a word inside a phrase is
+never a lexeme of its own. Every text field is therefore also matched as a
+plain substring (icontains), served by trigram indexes on UPPER(column).
+"""
+import re
+
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity,
+)
+from django.db.models import F, Q
+
+SEARCH_CONFIG = 'simple'
+
+# Characters with a meaning in to_tsquery syntax
+_TSQUERY_SPECIAL = re.compile(r"[&|!():*<>'\\]")
+
+TREE_SEARCH_VECTOR = (
+    SearchVector('nickname', weight='A', config=SEARCH_CONFIG)
+    + SearchVector('variety', weight='B', config=SEARCH_CONFIG)
+    + SearchVector('phenotype', 'flower_quality', weight='C', config=SEARCH_CONFIG)
+    + SearchVector('disease_notes', 'notes', weight='D', config=SEARCH_CONFIG)
+)
+
+TREELOG_SEARCH_VECTOR = (
+    SearchVector('title', weight='A', config=SEARCH_CONFIG)
+    + SearchVector('notes', weight='B', config=SEARCH_CONFIG)
+)
+
+
+TREE_TEXT_FIELDS = ('nickname', 'variety', 'phenotype', 'flower_quality', 'disease_notes', 'notes')
+TREELOG_TEXT_FIELDS = ('title', 'notes')
+
+
+def contains_filter(fields, text):
+    """Q matching `text` anywhere in any of `fields`, case-insensitively"""
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f'{field}__icontains': text})
+    return condition
+
+
+def build_query(text):
+    """Turn user input into a prefix-matching tsquery, or None if nothing is left"""
+    terms = [_TSQUERY_SPECIAL.sub('', term) for term in text.split()]
+    terms = [term for term in terms if term]
+    if not terms:
+        return None
+    raw = ' & '.join(f"'{term}':*" for term in terms)
+    return SearchQuery(raw, config=SEARCH_CONFIG, search_type='raw')
+
+
+def tree_search_filter(text):
+    """Q matching trees by full text, by a nickname close to `text` or by a substring of any text field"""
+    query = build_query(text)
+    condition = Q(nickname__trigram_word_similar=text) | contains_filter(TREE_TEXT_FIELDS, text)
+    if query is not None:
+        condition |= Q(search_vector=query)
+    return condition
+
+
+def search_trees(queryset, text):
+    """Trees matching `text`, best first, with a `rank` annotation"""
+    query = build_query(text)
+    rank = TrigramWordSimilarity(text, 'nickname')
+    if query is not None:
+        rank = rank + SearchRank(F('search_vector'), query)
+    return (
+        queryset.filter(tree_search_filter(text))
+        .annotate(rank=rank)
+        .order_by('-rank', 'id')
+    )
+
+
+def search_logs(queryset, text):
+    """Journal entries matching `text`, best first, with a `rank` annotation"""
+    query = build_query(text)
+    condition = Q(title__trigram_word_similar=text) | contains_filter(TREELOG_TEXT_FIELDS, text)
+    rank = TrigramWordSimilarity(text, 'title')
+    if query is not None:
+        condition |= Q(search_vector=query)
+        rank = rank + SearchRank(F('search_vector'), query)
+    return (
+        queryset.filter(condition)
+        .annotate(rank=rank)
+        .order_by('-rank', '-action_date', 'id')
+    )
@@ -1,5 +1,14 @@
+import copy
+import json
+
+from django.conf import settings
+from django_filters import DateFromToRangeFilter
 from rest_framework import serializers
-from .models import Tree, Strain, Batch, Image, TreeLog
+from rest_framework.reverse import reverse
+from .filters import TreeFilter
+from .models import Tree, Strain, Batch, Image, TreeLog, DeletionJob, Upload
+
+DEFAULT_BULK_LOG_MAX_TREES = 5000
 
 class StrainSerializer(serializers.ModelSerializer):
     class Meta:
@@ -12,10 +21,57 @@ class BatchSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 class ImageSerializer(serializers.ModelSerializer):
+    renditions = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
+
     class Meta:
         model = Image
-        fields = ['id', 'tree', 'log', 'image', 'thumbnail', 'uploaded_at']
-        read_only_fields = ['thumbnail', 'uploaded_at']
+        fields = [
+            'id', 'tree', 'log', 'image', 'thumbnail', 'thumbnail_status',
+            'width', 'height', 'renditions', 'srcset', 'uploaded_at', 'updated_at'
+        ]
+        read_only_fields = ['thumbnail', 'thumbnail_status', 'width', 'height', 'uploaded_at', 'updated_at']
+
+    def _rendition_urls(self, obj):
+        """{width: {fmt: url}} for every configured width narrower than the original"""
+        if not obj.image or obj.width is None:
+            return {}
+        cached = getattr(obj, '_rendition_urls', None)
+        if cached is not None:
+            return cached
+
+        request = self.context.get('request')
+        widths, formats = Image.rendition_config()
+        urls = {}
+        for width in widths:
+            if width >= obj.width:
+                break
+            stored = obj.renditions.get(str(width), {})
+            urls[width] = {
+                fmt: obj.image.storage.url(stored[fmt]) if fmt in stored else reverse(
+                    'image-rendition', kwargs={'pk': obj.pk, 'width': width, 'fmt': fmt}
+                )
+                for fmt in formats
+            }
+            if request is not None:
+                urls[width] = {fmt: request.build_absolute_uri(url) for fmt, url in urls[width].items()}
+        obj._rendition_urls = urls
+        return urls
+
+    def get_renditions(self, obj):
+        return {str(width): files for width, files in self._rendition_urls(obj).items()}
+
+    def get_srcset(self, obj):
+        """Ready-to-use `srcset` strings per format, ending with the original at full width"""
+        urls = self._rendition_urls(obj)
+        if not urls:
+            return {}
+        original = self.fields['image'].to_representation(obj.image)
+        _, formats = Image.rendition_config()
+        return {
+            fmt: ', '.join([f"{files[fmt]} {width}w" for width, files in urls.items()] + [f"{original} {obj.width}w"])
+            for fmt in formats
+        }
 
 class TreeLogSerializer(serializers.ModelSerializer):
     images = ImageSerializer(many=True, read_only=True)
@@ -29,7 +85,116 @@ class TreeLogSerializer(serializers.ModelSerializer):
             'created_at', 'images'
         ]
 
-class TreeSerializer(serializers.ModelSerializer):
+class BulkTreeLogSerializer(serializers.ModelSerializer):
+    """
+    One journal entry for many trees (POST /api/logs/bulk/). The trees come from
+    exactly one of `trees` (IDs), `batch_id` or `filter` (the /api/trees/ query
+    filters as an object); validated data carries them as `tree_ids`.
+    """
+    trees = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    batch_id = serializers.PrimaryKeyRelatedField(queryset=Batch.objects.all(), required=False)
+    filter = serializers.JSONField(required=False)
+    image = serializers.ImageField(required=False)
+
+    class Meta:
+        model = TreeLog
+        fields = [
+            'trees', 'batch_id', 'filter', 'action_date', 'action_type', 'title', 'notes',
+            'ph', 'ec', 'temp', 'humidity', 'image',
+        ]
+
+    @staticmethod
+    def max_trees():
+        return getattr(settings, 'BULK_LOG_MAX_TREES', DEFAULT_BULK_LOG_MAX_TREES)
+
+    def validate_filter(self, value):
+        if isinstance(value, str):
+            # Multipart bodies (with an image) carry the object as JSON text
+            try:
+                value = json.loads(value)
+            except ValueError:
+                raise serializers.ValidationError('filter ต้องเป็น JSON')
+        if not isinstance(value, dict) or not value:
+            raise serializers.ValidationError('filter ต้องเป็นออบเจกต์ที่มีเงื่อนไขอย่างน้อย 1 ข้อ')
+        allowed = set()
+        for name, field in TreeFilter.base_filters.items():
+            if isinstance(field, DateFromToRangeFilter):
+                allowed.update((f'{name}_after', f'{name}_before'))
+            else:
+                allowed.add(name)
+        unknown = sorted(set(value) - allowed)
+        if unknown:
+            raise serializers.ValidationError(f'ไม่รู้จักเงื่อนไข {unknown}')
+        # Same comma-separated form as the query string
+        return {
+            key: ','.join(map(str, item)) if isinstance(item, list) else str(item)
+            for key, item in value.items()
+        }
+
+    def _selected(self, attrs):
+        if 'trees' in attrs:
+            ids = set(attrs.pop('trees'))
+            found = set(Tree.objects.filter(pk__in=ids).values_list('pk', flat=True))
+            if ids - found:
+                raise serializers.ValidationError({'trees': [f'ไม่พบต้นไม้รหัส {sorted(ids - found)}']})
+            return sorted(found)
+        if 'batch_id' in attrs:
+            queryset = Tree.objects.filter(batch=attrs.pop('batch_id'))
+        else:
+            filterset = TreeFilter(data=attrs.pop('filter'), queryset=Tree.objects.all())
+            if not filterset.is_valid():
+                raise serializers.ValidationError({'filter': filterset.errors})
+            queryset = filterset.qs
+        return list(queryset.order_by('pk').values_list('pk', flat=True)[:self.max_trees() + 1])
+
+    def validate(self, attrs):
+        chosen = [name for name in ('trees', 'batch_id', 'filter') if name in attrs]
+        if len(chosen) != 1:
+            raise serializers.ValidationError('ระบุต้นไม้ด้วย trees, batch_id หรือ filter อย่างใดอย่างหนึ่ง')
+        tree_ids = self._selected(attrs)
+        if not tree_ids:
+            raise serializers.ValidationError('ไม่พบต้นไม้ตามที่ระบุ')
+        if len(tree_ids) > self.max_trees():
+            raise serializers.ValidationError(f'บันทึกได้ไม่เกิน {self.max_trees()} ต้นต่อครั้ง')
+        attrs['tree_ids'] = tree_ids
+        return attrs
+
+class SparseFieldsMixin:
+    """
+    Serializer that can be cut down per request: `fields` keeps only the named
+    fields, `omit` drops some, and `expand` adds fields in their full nested
+    form (swapping in `expanded_forms` where the class has a summary instead).
+    Without `fields`, `default_fields` (or every field) is used.
+    """
+    default_fields = None
+    expandable_fields = ()
+    expanded_forms = {}
+
+    def __init__(self, *args, fields=None, omit=(), expand=(), **kwargs):
+        self.only_fields, self.omit_fields, self.expand_fields = fields, set(omit), list(expand)
+        super().__init__(*args, **kwargs)
+
+    @classmethod
+    def field_names(cls):
+        """Every readable field a client may ask for, whatever the defaults"""
+        fields = super(SparseFieldsMixin, cls()).get_fields()
+        return [name for name, field in fields.items() if not field.write_only]
+
+    def get_fields(self):
+        fields = super().get_fields()
+        for name in self.expand_fields:
+            if name in self.expanded_forms:
+                fields[name] = copy.deepcopy(self.expanded_forms[name])
+        if self.only_fields is None and self.default_fields is None and not self.omit_fields:
+            return fields
+        keep = list(self.only_fields or self.default_fields or fields)
+        keep += [name for name in self.expand_fields if name not in keep]
+        return {
+            name: field for name, field in fields.items()
+            if (name in keep or field.write_only) and name not in self.omit_fields
+        }
+
+class TreeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     strain = StrainSerializer(read_only=True)
     strain_id = serializers.PrimaryKeyRelatedField(
         queryset=Strain.objects.all(), source='strain', write_only=True
@@ -41,15 +206,125 @@ class TreeSerializer(serializers.ModelSerializer):
     images = ImageSerializer(source='images_set', many=True, read_only=True)
     latest_log = serializers.SerializerMethodField()
 
+    expandable_fields = ('strain', 'batch', 'images', 'latest_log')
+
     class Meta:
         model = Tree
-        fields = '__all__'
+        exclude = ['search_vector']
         extra_kwargs = {
             'images': {'required': False}
         }
 
     def get_latest_log(self, obj):
-        latest = obj.logs.first() # logs is related_name from TreeLog
-        if latest:
-            return TreeLogSerializer(latest).data
+        # latest_log is a denormalised pointer kept in sync by trees.signals,
+        # so the list view loads it with select_related instead of a query per tree
+        if obj.latest_log_id:
+            return TreeLogSerializer(obj.latest_log, context=self.context).data
         return None
+
+
+class StrainSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Strain
+        fields = ['id', 'name']
+
+class ImageSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Image
+        fields = ['id', 'image', 'thumbnail']
+
+class TreeListSerializer(TreeSerializer):
+    """
+    Default /api/trees/ list row: what the dashboard cards and table show.
+    Strain and images are summaries; ?expand= swaps in the full forms and
+    ?fields= can still ask for any TreeSerializer field.
+    """
+    strain = StrainSummarySerializer(read_only=True)
+    images = ImageSummarySerializer(source='images_set', many=True, read_only=True)
+
+    default_fields = [
+        'id', 'nickname', 'strain', 'variety', 'sex', 'status', 'growth_stage',
+        'plant_date', 'location', 'images', 'created_at', 'updated_at',
+    ]
+    expanded_forms = {
+        'strain': TreeSerializer._declared_fields['strain'],
+        'images': TreeSerializer._declared_fields['images'],
+    }
+
+    class Meta(TreeSerializer.Meta):
+        pass
+
+
+class SyncTreeSerializer(serializers.ModelSerializer):
+    """Flat tree row for /api/sync/: related rows are IDs, synced in their own lists"""
+    images = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+
+    class Meta:
+        model = Tree
+        exclude = ['search_vector', 'latest_log']
+        read_only_fields = ['document']
+
+class SyncTreeLogSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TreeLog
+        exclude = ['search_vector']
+
+
+class TreeSearchResultSerializer(serializers.ModelSerializer):
+    strain_name = serializers.CharField(source='strain.name', read_only=True)
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Tree
+        fields = ['id', 'nickname', 'variety', 'strain_name', 'status', 'growth_stage', 'rank']
+
+class TreeLogSearchResultSerializer(serializers.ModelSerializer):
+    tree_nickname = serializers.CharField(source='tree.nickname', read_only=True)
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = TreeLog
+        fields = ['id', 'tree', 'tree_nickname', 'action_date', 'action_type', 'title', 'rank']
+
+class LineageNodeSerializer(serializers.ModelSerializer):
+    strain_name = serializers.CharField(source='strain.name', read_only=True)
+    depth = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Tree
+        fields = ['id', 'nickname', 'variety', 'strain_name', 'sex', 'status', 'growth_stage', 'plant_date', 'depth']
+
+    def get_depth(self, obj):
+        return self.context['depths'][obj.pk]
+
+class DeletionJobSerializer(serializers.ModelSerializer):
+    progress = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = DeletionJob
+        fields = [
+            'id', 'status', 'trees_deleted', 'images_deleted',
+            'files_total', 'files_removed', 'files_failed', 'progress',
+            'created_at', 'finished_at'
+        ]
+
+class UploadSerializer(serializers.ModelSerializer):
+    sha256 = serializers.RegexField(r'^[0-9a-fA-F]{64}$', required=False, allow_blank=True)
+
+    class Meta:
+        model = Upload
+        fields = ['id', 'kind', 'tree', 'log', 'filename', 'size', 'offset', 'sha256', 'created_at', 'updated_at']
+        read_only_fields = ['offset', 'created_at', 'updated_at']
+
+    def validate(self, attrs):
+        log = attrs.get('log')
+        if log is not None:
+            if attrs.get('tree') is None:
+                attrs['tree'] = log.tree
+            elif attrs['tree'].pk != log.tree_id:
+                raise serializers.ValidationError({'log': ['บันทึกนี้ไม่ได้เป็นของต้นไม้ที่เลือก']})
+        if attrs['kind'] == 'document' and attrs.get('tree') is None:
+            raise serializers.ValidationError({'tree': ['ต้องระบุต้นไม้ที่จะแนบเอกสาร']})
+        if attrs['size'] == 0:
+            raise serializers.ValidationError({'size': ['ไฟล์ว่างเปล่า']})
+        return attrs
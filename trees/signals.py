@@ -0,0 +1,87 @@
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .caching import bump_versions
+from .events import emit
+from .models import Batch, Image, ImageBlob, Strain, Tombstone, Tree, TreeLog
+
+LIVE_TYPES = {Tree: 'tree', TreeLog: 'log', Image: 'image'}
+
+
+@receiver(post_save, sender=TreeLog)
+def treelog_saved(sender, instance, **kwargs):
+    """Keep Tree.latest_log current when a log is created, edited or moved"""
+    # A log moved to another tree must also be dropped from its old tree
+    TreeLog.refresh_latest_for(Q(pk=instance.tree_id) | Q(latest_log=instance))
+
+
+@receiver(post_delete, sender=TreeLog)
+def treelog_deleted(sender, instance, **kwargs):
+    """Point the tree at its next newest log after a delete"""
+    TreeLog.refresh_latest_for(Q(pk=instance.tree_id))
+
+
+@receiver(post_delete, sender=Image)
+def image_deleted(sender, instance, **kwargs):
+    """Release the shared file; also runs for queryset and cascade deletes"""
+    if instance.blob_id:
+        ImageBlob.release(instance.blob_id)
+
+
+@receiver(post_save, sender=Tree)
+@receiver(post_delete, sender=Tree)
+@receiver(post_save, sender=Strain)
+@receiver(post_delete, sender=Strain)
+@receiver(post_save, sender=Batch)
+@receiver(post_delete, sender=Batch)
+@receiver(post_save, sender=TreeLog)
+@receiver(post_delete, sender=TreeLog)
+@receiver(post_save, sender=Image)
+@receiver(post_delete, sender=Image)
+def collection_changed(sender, **kwargs):
+    """New ETags for every API response that includes this model (see trees.caching)"""
+    bump_versions(sender)
+
+
+@receiver(post_delete, sender=Tree)
+@receiver(post_delete, sender=Strain)
+@receiver(post_delete, sender=Batch)
+@receiver(post_delete, sender=TreeLog)
+@receiver(post_delete, sender=Image)
+def record_tombstone(sender, instance, **kwargs):
+    """Let /api/sync/ clients know the row is gone"""
+    Tombstone.objects.create(model=sender._meta.model_name, object_id=instance.pk)
+
+
+@receiver(post_save, sender=Tree)
+@receiver(post_delete, sender=Tree)
+@receiver(post_save, sender=TreeLog)
+@receiver(post_delete, sender=TreeLog)
+@receiver(post_save, sender=Image)
+@receiver(post_delete, sender=Image)
+def live_changed(sender, instance, signal, **kwargs):
+    """Push the change to open /api/events/ streams (see trees.events)"""
+    action = 'deleted' if signal is post_delete else 'saved'
+    tree_id = instance.pk if sender is Tree else instance.tree_id
+    emit(LIVE_TYPES[sender], action, [instance.pk], [tree_id])
+
+
+@receiver(m2m_changed, sender=Tree.images.through)
+def tree_images_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """The image list is part of the tree row: bump updated_at so delta sync sends it again"""
+    if action == 'pre_clear' and reverse:
+        # Cleared from the image side: the trees are only known before the rows go
+        instance._cleared_tree_ids = list(instance.trees.values_list('pk', flat=True))
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        tree_ids = [instance.pk]
+    elif action == 'post_clear':
+        tree_ids = instance.__dict__.pop('_cleared_tree_ids', [])
+    else:
+        tree_ids = pk_set
+    Tree.objects.filter(pk__in=tree_ids).update(updated_at=timezone.now())
+    bump_versions(Tree)
+    emit('tree', 'saved', tree_ids, tree_ids)
@@ -0,0 +1,230 @@
+"""
+Spreadsheet layout shared by import and export, plus streaming readers.
+
+The sheets and columns match scripts/make_excel_template.py and
+data-templates/*.csv. Readers yield one row at a time: CSV through the csv
+module, XLSX by feeding the worksheet XML from the zip to expat in chunks, so
+neither loads the whole file into memory.
+"""
+import codecs
+import csv
+import re
+import zipfile
+import zlib
+from datetime import datetime, timedelta
+from functools import lru_cache
+from xml.etree.ElementTree import iterparse
+from xml.parsers import expat
+
+SHEETS = {
+    'Strains': ['id', 'name', 'description'],
+    'Batches': ['id', 'batch_code', 'description', 'started_date'],
+    'Images': ['id', 'image', 'thumbnail', 'uploaded_at'],
+    'Trees': [
+        'id', 'nickname', 'strain_id', 'variety', 'generation', 'batch_id', 'location', 'status',
+        'created_at', 'updated_at', 'germination_date', 'plant_date', 'growth_stage', 'harvest_date',
+        'sex', 'genotype', 'phenotype', 'parent_male_id', 'parent_female_id', 'clone_source_id',
+        'pollination_date', 'pollinated_by_id', 'yield_amount', 'flower_quality', 'seed_count',
+        'seed_harvest_date', 'disease_notes', 'document', 'notes',
+    ],
+    'TreeImages': ['tree_id', 'image_id'],
+    'TreeLogs': [
+        'id', 'tree_id', 'action_date', 'action_type', 'title', 'notes', 'ph', 'ec', 'temp', 'humidity',
+        'wet_weight', 'dry_weight', 'created_at', 'updated_at',
+    ],
+}
+
+# data-templates/<file>.csv -> sheet
+CSV_SHEETS = {
+    'strains': 'Strains',
+    'batches': 'Batches',
+    'images': 'Images',
+    'trees': 'Trees',
+    'tree_images': 'TreeImages',
+    'tree_logs': 'TreeLogs',
+}
+
+XLSX_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+EXCEL_EPOCH = datetime(1899, 12, 30)
+
+
+class SpreadsheetError(ValueError):
+    """The file itself cannot be read (as opposed to a bad row)"""
+
+
+def sheet_for_filename(filename):
+    """`trees.csv` -> 'Trees'; None if the name doesn't match a template file"""
+    stem = re.sub(r'\.csv$', '', filename.rsplit('/', 1)[-1], flags=re.IGNORECASE).lower()
+    return CSV_SHEETS.get(stem)
+
+
+def excel_serial_to_datetime(value):
+    """Excel stores dates as days since 1899-12-30 when a cell is date-formatted"""
+    return EXCEL_EPOCH + timedelta(days=float(value))
+
+
+def read_csv(file):
+    """Yield ``(row_number, {column: text})`` from a binary CSV file (UTF-8, optional BOM)"""
+    reader = csv.reader(codecs.iterdecode(file, 'utf-8-sig'))
+    try:
+        header = next(reader, None)
+        if header is None:
+            return
+        header = [name.strip() for name in header]
+        for number, values in enumerate(reader, start=2):
+            if any(value.strip() for value in values):
+                yield number, dict(zip(header, values))
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise SpreadsheetError(f'อ่านไฟล์ CSV ไม่ได้ (ต้องเป็น UTF-8): {e}')
+
+
+def _column_index(ref):
+    """'AB12' -> 27 (0-based column)"""
+    return _column_letters(ref.rstrip('0123456789'))
+
+
+@lru_cache(maxsize=1024)
+def _column_letters(letters):
+    index = 0
+    for char in letters.upper():
+        index = index * 26 + ord(char) - 64
+    return index - 1
+
+
+class XlsxReader:
+    """Minimal streaming reader for .xlsx worksheets (values only, no styles)"""
+
+    def __init__(self, file):
+        try:
+            self.zip = zipfile.ZipFile(file)
+            self.sheets = self._sheet_paths()
+        except (zipfile.BadZipFile, KeyError, SyntaxError) as e:
+            raise SpreadsheetError(f'ไฟล์ XLSX ไม่ถูกต้อง: {e}')
+        self._shared = None
+
+    def _sheet_paths(self):
+        rels = {}
+        with self.zip.open('xl/_rels/workbook.xml.rels') as f:
+            for _, elem in iterparse(f):
+                # Some writers put the officeDocument namespace here; match on the local name
+                if elem.tag.rpartition('}')[2] == 'Relationship':
+                    target = elem.get('Target').lstrip('/')
+                    rels[elem.get('Id')] = target if target.startswith('xl/') else f'xl/{target}'
+        sheets = {}
+        with self.zip.open('xl/workbook.xml') as f:
+            for _, elem in iterparse(f):
+                if elem.tag == f'{XLSX_NS}sheet':
+                    sheets[elem.get('name')] = rels[elem.get(f'{REL_NS}id')]
+        return sheets
+
+    @property
+    def shared_strings(self):
+        # The one part that must be held in memory: cells refer to it by index
+        if self._shared is None:
+            self._shared = []
+            if 'xl/sharedStrings.xml' in self.zip.namelist():
+                with self.zip.open('xl/sharedStrings.xml') as f:
+                    for _, elem in iterparse(f):
+                        if elem.tag == f'{XLSX_NS}si':
+                            self._shared.append(''.join(t.text or '' for t in elem.iter(f'{XLSX_NS}t')))
+                            elem.clear()
+        return self._shared
+
+    def rows(self, sheet):
+        """Yield ``(row_number, {column: text})`` for `sheet`, keyed by the first row"""
+        if sheet not in self.sheets:
+            return
+        try:
+            yield from self._rows(self.sheets[sheet])
+        except (zipfile.BadZipFile, zlib.error, expat.ExpatError) as e:
+            raise SpreadsheetError(f'ชีต {sheet} เสียหาย: {e}')
+
+    def _rows(self, path):
+        # expat callbacks instead of iterparse: no Element per cell, which is
+        # most of the cost on a sheet with millions of cells
+        header = None
+        row, ready = {}, []
+        cell = kind = text = None
+        number = position = 0
+        shared = self.shared_strings
+
+        def start(name, attrs):
+            nonlocal cell, kind, text, number, position
+            if ':' in name:
+                name = name.rpartition(':')[2]
+            if name == 'c':
+                ref = attrs.get('r')
+                cell = _column_index(ref) if ref else position
+                position = cell + 1
+                kind = attrs.get('t')
+            elif (name == 'v' or name == 't') and cell is not None:
+                text = []
+            elif name == 'row':
+                number = int(attrs.get('r') or number + 1)
+                position = 0
+
+        def end(name):
+            nonlocal cell, text
+            if ':' in name:
+                name = name.rpartition(':')[2]
+            if name == 'c':
+                cell = None
+            elif name == 'v' or name == 't':
+                if text is not None:
+                    value = ''.join(text)
+                    if name == 't':
+                        # Rich inline strings split their text over several <t> runs
+                        row[cell] = row.get(cell, '') + value
+                    else:
+                        row[cell] = shared[int(value)] if kind == 's' else value
+                text = None
+            elif name == 'row':
+                ready.append((number, dict(row)))
+                row.clear()
+
+        def characters(data):
+            if text is not None:
+                text.append(data)
+
+        parser = expat.ParserCreate()
+        parser.buffer_text = True
+        parser.StartElementHandler = start
+        parser.EndElementHandler = end
+        parser.CharacterDataHandler = characters
+        with self.zip.open(path) as f:
+            while True:
+                chunk = f.read(1 << 16)
+                parser.Parse(chunk, not chunk)
+                for row_number, values in ready:
+                    if header is None:
+                        header = {index: name.strip() for index, name in values.items()}
+                    elif any(value.strip() for value in values.values()):
+                        yield row_number, {header[i]: value for i, value in values.items() if i in header}
+                ready.clear()
+                if not chunk:
+                    break
+
+def read_spreadsheet(file, filename, sheet=None):
+    """
+    ``{sheet: rows}`` for a template file. An .xlsx yields every template sheet
+    it contains (or only `sheet`); a .csv is one sheet, named by `sheet` or by
+    its file name as in data-templates/.
+    """
+    name = filename.lower()
+    if name.endswith('.xlsx'):
+        if sheet is not None and sheet not in SHEETS:
+            raise SpreadsheetError(f'ไม่รู้จักชีต "{sheet}"')
+        reader = XlsxReader(file)
+        found = [each for each in SHEETS if each in reader.sheets and sheet in (None, each)]
+        if not found:
+            raise SpreadsheetError(f'ไม่พบชีต {sheet or ", ".join(SHEETS)} ในไฟล์')
+        return {each: reader.rows(each) for each in found}
+    if name.endswith('.csv'):
+        sheet = sheet or sheet_for_filename(filename)
+        if sheet not in SHEETS:
+            raise SpreadsheetError(
+                f'ไม่ทราบว่า {filename} เป็นชีตใด กรุณาระบุ sheet ({", ".join(SHEETS)})'
+            )
+        return {sheet: read_csv(file)}
+    raise SpreadsheetError('รองรับเฉพาะไฟล์ .csv และ .xlsx')
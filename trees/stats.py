@@ -0,0 +1,131 @@
+"""
+Dashboard aggregates computed in the database.
+
+Every figure comes from an aggregate or GROUP BY query. The whole payload is
+cached under the shared collection versions of the models it reads (see
+trees.caching), so a committed change anywhere retires it in every process.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from .caching import get_versions
+from .models import Batch, Strain, Tree, TreeLog
+
+STATS_CACHE_KEY = 'trees:stats:{}'
+# Strain names and batch codes appear in by_strain / by_batch
+STATS_MODELS = (Tree, TreeLog, Strain, Batch)
+
+# Same rules as mytree-frontend/constants/treeStatus.ts
+ACTIVE_STATUSES = ('กำลังปลูก', 'มีชีวิต')
+HARVESTED = Q(status__contains='เก็บเกี่ยว') | Q(status__contains='Dry') | Q(status__contains='Cure')
+FLOWERING = Q(status='กำลังปลูก', growth_stage__icontains='flower')
+
+
+def harvest_yield():
+    """Per-tree yield: `Tree.yield_amount` when recorded, else the summed dry weight of its logs"""
+    logged = (
+        TreeLog.objects.filter(tree=OuterRef('pk')).order_by()
+        .values('tree').annotate(total=Sum('dry_weight')).values('total')
+    )
+    return Coalesce('yield_amount', Subquery(logged))
+
+
+def _number(value):
+    if isinstance(value, Decimal):
+        return round(float(value), 2)
+    return value
+
+
+def _rows(queryset):
+    return [{key: _number(value) for key, value in row.items()} for row in queryset]
+
+
+def _yield_aggregates():
+    return {
+        'yield_total': Sum('harvest_yield'),
+        'yield_avg': Avg('harvest_yield'),
+        'yield_trees': Count('pk', filter=Q(harvest_yield__isnull=False)),
+    }
+
+
+def compute_stats():
+    trees = Tree.objects.order_by().annotate(harvest_yield=harvest_yield())
+
+    totals = trees.aggregate(
+        total=Count('pk'),
+        active=Count('pk', filter=Q(status__in=ACTIVE_STATUSES)),
+        flowering=Count('pk', filter=FLOWERING),
+        harvested=Count('pk', filter=HARVESTED),
+        recorded_total=Sum('yield_amount'),
+        recorded_avg=Avg('yield_amount'),
+        recorded_trees=Count('pk', filter=Q(yield_amount__isnull=False)),
+        **_yield_aggregates(),
+    )
+    logged = TreeLog.objects.aggregate(
+        wet_total=Sum('wet_weight'),
+        dry_total=Sum('dry_weight'),
+        trees=Count('tree', distinct=True, filter=Q(wet_weight__isnull=False) | Q(dry_weight__isnull=False)),
+    )
+
+    by_strain = _rows(
+        trees.values('strain_id', strain_name=F('strain__name'))
+        .annotate(count=Count('pk'), **_yield_aggregates())
+        .order_by('-count', 'strain_name')
+    )
+    ranked = [row for row in by_strain if row['yield_avg'] is not None]
+    best = max(ranked, key=lambda row: row['yield_avg'], default=None)
+
+    return {
+        'total': totals['total'],
+        'active': totals['active'],
+        'flowering': totals['flowering'],
+        'harvested': totals['harvested'],
+        'by_status': _rows(trees.values('status').annotate(count=Count('pk')).order_by('-count', 'status')),
+        'by_sex': _rows(trees.values('sex').annotate(count=Count('pk')).order_by('-count', 'sex')),
+        'by_growth_stage': _rows(
+            trees.values('growth_stage').annotate(count=Count('pk')).order_by('-count', 'growth_stage')
+        ),
+        'by_strain': by_strain,
+        'by_batch': _rows(
+            trees.values('batch_id', batch_code=F('batch__batch_code'))
+            .annotate(count=Count('pk'), **_yield_aggregates())
+            .order_by('-count', 'batch_code')
+        ),
+        'yield': {
+            # Tree.yield_amount, falling back to summed log dry weight per tree
+            'total': _number(totals['yield_total']) or 0,
+            'average': _number(totals['yield_avg']),
+            'trees': totals['yield_trees'],
+            'best_strain': best and {'strain_id': best['strain_id'], 'strain_name': best['strain_name'],
+                                     'yield_avg': best['yield_avg']},
+            'recorded': {
+                'total': _number(totals['recorded_total']) or 0,
+                'average': _number(totals['recorded_avg']),
+                'trees': totals['recorded_trees'],
+            },
+            'logged': {
+                'wet_total': _number(logged['wet_total']) or 0,
+                'dry_total': _number(logged['dry_total']) or 0,
+                'trees': logged['trees'],
+            },
+        },
+    }
+
+
+def get_stats(versions=None):
+    """
+    Cached compute_stats(). `versions` are those of STATS_MODELS; read them
+    before the data so a payload is never stored under a newer version.
+    """
+    if versions is None:
+        versions = get_versions(STATS_MODELS)
+    key = STATS_CACHE_KEY.format('.'.join(map(str, versions)))
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_stats()
+        cache.set(key, stats, getattr(settings, 'STATS_CACHE_TIMEOUT', 300))
+    return stats
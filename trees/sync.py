@@ -0,0 +1,194 @@
+"""
+Delta sync for offline-first clients (/api/sync/).
+
+``GET ?since=<token>`` returns the strains, batches, images, trees and logs
+whose ``updated_at`` is at or after the token (each table has an
+``(updated_at, id)`` index for this) plus the IDs deleted since then, read
+from Tombstone. Without a token, with one older than the tombstone retention,
+or after an import rewrote whole tables, the response is a full snapshot with
+``reset: true`` and the client replaces its copy.
+
+``updated_at`` is stamped before commit, so a row can become visible after a
+sync that already read past its timestamp. Tokens therefore trail the server
+clock by SYNC_OVERLAP_SECONDS and the next sync sends those rows again;
+clients apply rows by ID, then deletions, so repeats are harmless.
+
+``POST`` takes the client's queued edits as batched upserts (see
+apply_upserts).
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Batch, Image, Strain, Tombstone, Tree, TreeLog
+from .serializers import (
+    BatchSerializer, ImageSerializer, StrainSerializer, SyncTreeLogSerializer, SyncTreeSerializer,
+)
+
+DEFAULT_OVERLAP_SECONDS = 30
+DEFAULT_TOMBSTONE_DAYS = 90
+DEFAULT_MAX_UPSERTS = 1000
+
+# Response key -> (model, serializer, prefetch); upserts run in this order too
+SYNC_TYPES = {
+    'strains': (Strain, StrainSerializer, ()),
+    'batches': (Batch, BatchSerializer, ()),
+    'images': (Image, ImageSerializer, ()),
+    'trees': (Tree, SyncTreeSerializer, ('images',)),
+    'logs': (TreeLog, SyncTreeLogSerializer, ()),
+}
+# Images carry a file and are uploaded through /api/images/
+UPSERT_TYPES = ('strains', 'batches', 'trees', 'logs')
+# Foreign keys that may name a row created earlier in the same POST by its client_id
+CLIENT_REFERENCES = {
+    'trees': {
+        'strain': 'strains', 'batch': 'batches', 'parent_male': 'trees',
+        'parent_female': 'trees', 'clone_source': 'trees', 'pollinated_by': 'trees',
+    },
+    'logs': {'tree': 'trees'},
+}
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def tombstone_days():
+    return getattr(settings, 'SYNC_TOMBSTONE_DAYS', DEFAULT_TOMBSTONE_DAYS)
+
+
+def max_upserts():
+    return getattr(settings, 'SYNC_MAX_UPSERTS', DEFAULT_MAX_UPSERTS)
+
+
+def make_token(moment):
+    """Opaque sync token: microseconds since the epoch"""
+    return str((moment - EPOCH) // timedelta(microseconds=1))
+
+
+def parse_token(token):
+    """Token from make_token() -> aware datetime; ValueError if malformed"""
+    if not token.isascii() or not token.isdigit():
+        raise ValueError(token)
+    try:
+        return EPOCH + timedelta(microseconds=int(token))
+    except OverflowError:
+        raise ValueError(token)
+
+
+def current_token(now=None):
+    """Token for a client that has seen everything committed up to `now`"""
+    now = now or timezone.now()
+    return make_token(now - timedelta(seconds=getattr(settings, 'SYNC_OVERLAP_SECONDS', DEFAULT_OVERLAP_SECONDS)))
+
+
+def needs_reset(since, now):
+    """Whether a client at `since` can't be brought up to date with a delta"""
+    if since is None or since < now - timedelta(days=tombstone_days()):
+        return True
+    return Tombstone.objects.filter(object_id__isnull=True, deleted_at__gte=since).exists()
+
+
+def changes_since(since, context):
+    """``{token, reset, <type>: [rows], deleted: {<type>: [ids]}}`` for a client last synced at `since`"""
+    now = timezone.now()
+    reset = needs_reset(since, now)
+    data = {'token': current_token(now), 'reset': reset}
+    for kind, (model, serializer_class, related) in SYNC_TYPES.items():
+        queryset = model.objects.prefetch_related(*related).order_by('updated_at', 'id')
+        if not reset:
+            queryset = queryset.filter(updated_at__gte=since)
+        data[kind] = serializer_class(queryset, many=True, context=context).data
+
+    data['deleted'] = {kind: [] for kind in SYNC_TYPES}
+    if not reset:
+        kinds = {model._meta.model_name: kind for kind, (model, _, _) in SYNC_TYPES.items()}
+        deleted = (
+            Tombstone.objects.filter(deleted_at__gte=since, object_id__isnull=False)
+            .order_by('deleted_at', 'id').values_list('model', 'object_id')
+        )
+        for name, object_id in deleted:
+            data['deleted'][kinds[name]].append(object_id)
+    return data
+
+
+def _resolve_references(kind, item, created):
+    """Swap client_ids of rows created earlier in this POST for their new IDs"""
+    item = dict(item)
+    for field, target in CLIENT_REFERENCES.get(kind, {}).items():
+        value = item.get(field)
+        if isinstance(value, str) and value in created[target]:
+            item[field] = created[target][value]
+    return item
+
+
+def _upsert(kind, item, context):
+    """Apply one row; returns ('saved' | 'conflict' | 'error', details)"""
+    model, serializer_class, _ = SYNC_TYPES[kind]
+    pk = item.get('id')
+    if pk is None:
+        serializer = serializer_class(data=item, context=context)
+    else:
+        try:
+            instance = model.objects.select_for_update().filter(pk=pk).first()
+        except (TypeError, ValueError):
+            return 'error', {'id': ['รหัสไม่ถูกต้อง']}
+        if instance is None:
+            # Deleted on the server while the client was offline
+            return 'conflict', None
+        seen = item.get('updated_at')
+        if seen is not None:
+            try:
+                seen = parse_datetime(str(seen))
+            except ValueError:
+                seen = None
+            if seen is None:
+                return 'error', {'updated_at': ['รูปแบบวัน-เวลาไม่ถูกต้อง']}
+            if seen != instance.updated_at:
+                return 'conflict', serializer_class(instance, context=context).data
+        serializer = serializer_class(instance, data=item, partial=True, context=context)
+    if not serializer.is_valid():
+        return 'error', serializer.errors
+    serializer.save()
+    return 'saved', serializer.data
+
+
+def apply_upserts(data, context):
+    """
+    Apply a client's queued edits, ``{strains|batches|trees|logs: [row, ...]}``,
+    in that order. A row with `id` updates that row (only the fields sent);
+    one without creates a row and may carry a `client_id` that later rows use
+    in place of the new ID (e.g. a log for a tree created offline). Sending the
+    `updated_at` the client last saw makes an update conditional: if the
+    server row changed since, or was deleted, it is reported as a conflict
+    with the current version instead of being overwritten. Each row runs in
+    its own savepoint, so one bad row doesn't undo the others.
+    """
+    created = {kind: {} for kind in UPSERT_TYPES}
+    report = {'saved': [], 'conflicts': [], 'errors': []}
+    with transaction.atomic():
+        for kind in UPSERT_TYPES:
+            for index, item in enumerate(data.get(kind) or []):
+                entry = {'type': kind, 'index': index}
+                if not isinstance(item, dict):
+                    report['errors'].append({**entry, 'errors': {'non_field_errors': ['แต่ละรายการต้องเป็น object']}})
+                    continue
+                client_id = item.get('client_id')
+                try:
+                    with transaction.atomic():
+                        outcome, details = _upsert(kind, _resolve_references(kind, item, created), context)
+                        if outcome != 'saved':
+                            transaction.set_rollback(True)
+                except Exception as e:
+                    outcome, details = 'error', {'non_field_errors': [f'เกิดข้อผิดพลาด: {str(e)}']}
+
+                if outcome == 'saved':
+                    if item.get('id') is None and isinstance(client_id, str):
+                        created[kind][client_id] = details['id']
+                    report['saved'].append({**entry, 'client_id': client_id, 'id': details['id'], 'row': details})
+                elif outcome == 'conflict':
+                    report['conflicts'].append({**entry, 'id': item.get('id'), 'current': details})
+                else:
+                    report['errors'].append({**entry, 'client_id': client_id, 'errors': details})
+    return report
@@ -0,0 +1,57 @@
+import os
+from unittest import mock
+
+from django.db import connection
+from rest_framework.test import APITestCase
+
+from trees.models import DeletionJob, Tree, TreeLog, Upload
+from trees.uploads import start_upload
+
+from .utils import TempMediaMixin, make_tree
+
+
+@mock.patch.object(DeletionJob, 'start')
+class BulkDeleteTests(TempMediaMixin, APITestCase):
+    url = '/api/trees/bulk_delete/'
+
+    def test_deletes_trees_and_their_logs(self, start):
+        doomed, kept = make_tree(), make_tree()
+        TreeLog.objects.create(tree=doomed, action_type='water')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {'ids': [doomed.pk]}, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['job']['trees_deleted'], 1)
+        self.assertEqual(list(Tree.objects.values_list('pk', flat=True)), [kept.pk])
+        self.assertFalse(TreeLog.objects.exists())
+        start.assert_called_once()
+
+    def test_removes_unfinished_uploads(self, start):
+        tree = make_tree()
+        log = TreeLog.objects.create(tree=tree, action_type='photo')
+        uploads = [
+            start_upload('document', 'plan.pdf', 10, tree=tree),
+            start_upload('image', 'leaf.jpg', 10, tree=tree, log=log),
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {'ids': [tree.pk]}, format='json')
+        self.assertEqual(response.status_code, 202)
+        # The test transaction never commits, so check the deferred foreign keys here
+        connection.check_constraints()
+        self.assertFalse(Upload.objects.exists())
+        for upload in uploads:
+            self.assertFalse(os.path.exists(upload.path))
+
+    def test_rejects_bad_ids(self, start):
+        tree = make_tree()
+        for payload in ({}, {'ids': []}, {'ids': 'abc'}, {'ids': [tree.pk, 'x']}, {'ids': [None]}, {'ids': [True]}):
+            with self.subTest(payload=payload):
+                response = self.client.post(self.url, payload, format='json')
+                self.assertEqual(response.status_code, 400)
+        self.assertTrue(Tree.objects.filter(pk=tree.pk).exists())
+        self.assertFalse(DeletionJob.objects.exists())
+
+    def test_nothing_matched(self, start):
+        response = self.client.post(self.url, {'ids': [999999]}, format='json')
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(DeletionJob.objects.exists())
+        start.assert_not_called()
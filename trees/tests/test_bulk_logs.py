@@ -0,0 +1,70 @@
+import io
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from PIL import Image as PILImage
+from rest_framework.test import APITestCase
+
+from trees.models import Batch, Image, Tree, TreeLog
+
+from .utils import TempMediaMixin, make_tree
+
+
+class BulkLogTests(TempMediaMixin, APITestCase):
+    url = '/api/logs/bulk/'
+
+    def post(self, data, **kwargs):
+        kwargs.setdefault('format', 'json')
+        return self.client.post(self.url, {'action_date': '2025-03-01', 'action_type': 'feed', **data}, **kwargs)
+
+    def test_one_entry_per_tree_by_ids(self):
+        first, second, other = make_tree(), make_tree(), make_tree()
+        response = self.post({'trees': [first.pk, second.pk], 'notes': 'ปุ๋ยสูตรเสมอ'})
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()['trees'], [first.pk, second.pk])
+
+        logs = TreeLog.objects.order_by('tree_id')
+        self.assertEqual([(log.tree_id, log.notes) for log in logs], [(first.pk, 'ปุ๋ยสูตรเสมอ'), (second.pk, 'ปุ๋ยสูตรเสมอ')])
+        # bulk_create bypasses the signals, so latest_log is refreshed explicitly
+        self.assertEqual(
+            dict(Tree.objects.values_list('pk', 'latest_log')),
+            {first.pk: logs[0].pk, second.pk: logs[1].pk, other.pk: None},
+        )
+
+    def test_select_by_batch_or_filter(self):
+        batch = Batch.objects.create(batch_code='B-1')
+        in_batch, female = make_tree(batch=batch), make_tree(sex='female')
+        make_tree(sex='male')
+
+        self.assertEqual(self.post({'batch_id': batch.pk}).json()['trees'], [in_batch.pk])
+        self.assertEqual(self.post({'filter': {'sex': ['female']}}).json()['trees'], [female.pk])
+
+    def test_shared_image_is_stored_once(self):
+        trees = [make_tree(), make_tree(), make_tree()]
+        buffer = io.BytesIO()
+        PILImage.new('RGB', (4, 4), 'green').save(buffer, format='PNG')
+        response = self.post({
+            'trees': [tree.pk for tree in trees],
+            'image': SimpleUploadedFile('room.png', buffer.getvalue(), content_type='image/png'),
+        }, format='multipart')
+        self.assertEqual(response.status_code, 201, response.content)
+
+        images = Image.objects.all()
+        self.assertEqual(len(images), 3)
+        self.assertEqual(len({image.blob_id for image in images}), 1)
+        self.assertEqual(images[0].blob.refcount, 3)
+        self.assertEqual({image.log.tree_id for image in images}, {tree.pk for tree in trees})
+
+    @override_settings(BULK_LOG_MAX_TREES=2)
+    def test_invalid_selection_is_rejected(self):
+        trees = [make_tree(), make_tree(), make_tree()]
+        for data in (
+            {},
+            {'trees': [trees[0].pk], 'batch_id': Batch.objects.create(batch_code='B-2').pk},
+            {'trees': [trees[0].pk, 999999]},
+            {'filter': {'unknown': 'x'}},
+            {'trees': [tree.pk for tree in trees]},
+        ):
+            with self.subTest(data=data):
+                self.assertEqual(self.post(data).status_code, 400)
+        self.assertFalse(TreeLog.objects.exists())
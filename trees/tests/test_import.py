@@ -0,0 +1,114 @@
+import io
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from rest_framework.test import APITestCase
+
+from trees.models import Batch, Image, Strain, Tree, TreeLog
+from trees.spreadsheet import SHEETS
+
+from .utils import TempMediaMixin, make_workbook
+
+
+def workbook():
+    def sheet(name, *rows):
+        columns = SHEETS[name]
+        return [columns] + [[row.get(column, '') for column in columns] for row in rows]
+
+    return make_workbook({
+        'Strains': sheet('Strains', {'id': 901, 'name': 'Thai Stick', 'description': 'พันธุ์พื้นเมือง'}),
+        'Batches': sheet('Batches', {'id': 902, 'batch_code': 'B-2025-01', 'started_date': '2025-01-01'}),
+        'Images': sheet('Images', {'id': 903, 'image': 'tree_images/903.jpg'}),
+        'Trees': sheet(
+            'Trees',
+            {'id': 904, 'nickname': 'แม่', 'strain_id': 'Thai Stick', 'batch_id': 902, 'status': 'กำลังปลูก',
+             'sex': 'female', 'plant_date': '2025-01-02'},
+            {'id': 905, 'nickname': 'ลูก', 'strain_id': 901, 'status': 'กำลังปลูก', 'sex': 'unknown',
+             'plant_date': '2025-02-01', 'parent_female_id': 904},
+        ),
+        'TreeImages': sheet('TreeImages', {'tree_id': 904, 'image_id': 903}),
+        'TreeLogs': sheet(
+            'TreeLogs', {'id': 906, 'tree_id': 905, 'action_date': '2025-02-02T08:00:00+07:00',
+                         'action_type': 'feed', 'notes': 'ให้ปุ๋ยสูตรเร่งโต', 'ph': '6.2'},
+        ),
+    })
+
+
+class ImportTests(TempMediaMixin, APITestCase):
+    def setUp(self):
+        # The Images sheet points at files already under MEDIA_ROOT
+        if not default_storage.exists('tree_images/903.jpg'):
+            default_storage.save('tree_images/903.jpg', ContentFile(b'jpeg'))
+
+    def test_imports_every_sheet(self):
+        response = self.client.post('/api/import/', {'file': workbook()}, format='multipart')
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['error_count'], 0, response.data['errors'])
+        created = {sheet: counts['created'] for sheet, counts in response.data['sheets'].items()}
+        self.assertEqual(created, {sheet: 2 if sheet == 'Trees' else 1 for sheet in SHEETS})
+        self.assertTrue(Strain.objects.filter(pk=901, updated_at__isnull=False).exists())
+        self.assertTrue(Batch.objects.filter(pk=902, updated_at__isnull=False).exists())
+        self.assertEqual(Image.objects.get(pk=903).tree_id, 904)
+        child = Tree.objects.get(pk=905)
+        self.assertEqual(child.parent_female_id, 904)
+        self.assertEqual(child.latest_log_id, 906)
+        self.assertEqual(TreeLog.objects.get(pk=906).notes, 'ให้ปุ๋ยสูตรเร่งโต')
+
+    def test_dry_run_writes_nothing(self):
+        response = self.client.post('/api/import/', {'file': workbook(), 'dry_run': 'true'}, format='multipart')
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['sheets']['Trees']['created'], 2)
+        self.assertFalse(Tree.objects.exists())
+
+    def test_bad_rows_are_reported_and_skipped(self):
+        rows = [SHEETS['Trees'], [''] * len(SHEETS['Trees'])]
+        rows[1][SHEETS['Trees'].index('nickname')] = 'ไม่มีสายพันธุ์'
+        response = self.client.post(
+            '/api/import/', {'file': make_workbook({'Trees': rows})}, format='multipart'
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['sheets']['Trees'], {'created': 0, 'updated': 0, 'matched': 0, 'skipped': 1})
+        self.assertEqual(response.data['errors'][0]['column'], 'strain_id')
+
+    def test_export_imports_back_in_place(self):
+        self.client.post('/api/import/', {'file': workbook()}, format='multipart')
+        Tree.objects.filter(pk=904).update(nickname='แม่ (แก้ไข)')
+        TreeLog.objects.filter(pk=906).update(notes='แก้บันทึก')
+        export = self.client.get('/api/export/xlsx/')
+        self.assertEqual(export.status_code, 200)
+        file = io.BytesIO(b''.join(export.streaming_content))
+        file.name = 'export.xlsx'
+        Tree.objects.filter(pk=904).update(nickname='ชื่อเปลี่ยนภายหลัง')
+        TreeLog.objects.filter(pk=906).update(notes='')
+
+        response = self.client.post('/api/import/', {'file': file}, format='multipart')
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['error_count'], 0, response.data['errors'])
+        self.assertEqual(response.data['sheets']['Trees'], {'created': 0, 'updated': 2, 'matched': 0, 'skipped': 0})
+        self.assertEqual(response.data['sheets']['TreeLogs']['updated'], 1)
+        self.assertEqual(Tree.objects.get(pk=904).nickname, 'แม่ (แก้ไข)')
+        self.assertEqual(TreeLog.objects.get(pk=906).notes, 'แก้บันทึก')
+        # Columns the sheet doesn't carry are left alone
+        self.assertEqual(Tree.objects.get(pk=905).latest_log_id, 906)
+        self.assertEqual(Image.objects.get(pk=903).tree_id, 904)
+
+    def test_duplicate_id_in_the_file(self):
+        rows = [SHEETS['Strains'], [901, 'หนึ่ง', ''], [901, 'สอง', '']]
+        response = self.client.post('/api/import/', {'file': make_workbook({'Strains': rows})}, format='multipart')
+
+        self.assertEqual(response.data['sheets']['Strains']['created'], 1)
+        self.assertEqual(response.data['errors'][0]['column'], 'id')
+
+    def test_image_paths_must_stay_inside_media(self):
+        columns = SHEETS['Images']
+        paths = ['../../etc/passwd', '/etc/passwd', 'tree_images/../../secret.jpg', 'tree_images/missing.jpg']
+        rows = [columns] + [[900 + i, path, '', ''] for i, path in enumerate(paths)]
+        response = self.client.post('/api/import/', {'file': make_workbook({'Images': rows})}, format='multipart')
+
+        self.assertEqual(response.data['sheets']['Images']['skipped'], len(paths), response.data)
+        self.assertEqual({error['column'] for error in response.data['errors']}, {'image'})
+        self.assertFalse(Image.objects.exists())
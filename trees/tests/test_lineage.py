@@ -0,0 +1,46 @@
+from rest_framework.test import APITestCase
+
+from .utils import make_tree
+
+
+class LineageTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        # grandmother -> mother (x father) -> child -> clone
+        cls.grandmother = make_tree(nickname='ยาย')
+        cls.father = make_tree(nickname='พ่อ')
+        cls.mother = make_tree(nickname='แม่', parent_female=cls.grandmother)
+        cls.child = make_tree(nickname='ลูก', parent_female=cls.mother, parent_male=cls.father)
+        cls.clone = make_tree(nickname='โคลน', clone_source=cls.child)
+
+    def lineage(self, tree, **params):
+        response = self.client.get(f'/api/trees/{tree.pk}/lineage/', params)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        edges = {(edge['source'], edge['target'], edge['relation']) for edge in data['edges']}
+        return edges, {node['id']: node['depth'] for node in data['nodes']}
+
+    def test_ancestors(self):
+        edges, depths = self.lineage(self.clone, depth=5)
+        self.assertEqual(edges, {
+            (self.child.pk, self.clone.pk, 'clone_source'),
+            (self.mother.pk, self.child.pk, 'parent_female'),
+            (self.father.pk, self.child.pk, 'parent_male'),
+            (self.grandmother.pk, self.mother.pk, 'parent_female'),
+        })
+        self.assertEqual(depths, {
+            self.clone.pk: 0, self.child.pk: 1, self.mother.pk: 2, self.father.pk: 2, self.grandmother.pk: 3,
+        })
+
+    def test_descendants_within_depth(self):
+        edges, depths = self.lineage(self.grandmother, direction='down', depth=2)
+        self.assertEqual(edges, {
+            (self.grandmother.pk, self.mother.pk, 'parent_female'),
+            (self.mother.pk, self.child.pk, 'parent_female'),
+        })
+        self.assertEqual(depths, {self.grandmother.pk: 0, self.mother.pk: 1, self.child.pk: 2})
+
+    def test_bad_direction(self):
+        response = self.client.get(f'/api/trees/{self.child.pk}/lineage/', {'direction': 'sideways'})
+        self.assertEqual(response.status_code, 400)
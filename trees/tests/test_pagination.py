@@ -0,0 +1,59 @@
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+from django.test import TestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from trees.models import Tree
+from trees.pagination import TreeCursorPagination
+
+from .utils import make_tree
+
+
+class KeysetPaginationTests(TestCase):
+    def page(self, url, ordering=None):
+        """(ids, next url, previous url) of one page"""
+        paginator = TreeCursorPagination()
+        if ordering:
+            paginator.ordering = ordering
+        rows = paginator.paginate_queryset(Tree.objects.all(), Request(APIRequestFactory().get(url)))
+        return [tree.pk for tree in rows], self.path(paginator.get_next_link()), self.path(paginator.get_previous_link())
+
+    @staticmethod
+    def path(link):
+        if link is None:
+            return None
+        parts = urlsplit(link)
+        return f'{parts.path}?{parts.query}'
+
+    def test_pages_across_tied_created_at(self):
+        trees = [make_tree() for _ in range(5)]
+        newest = make_tree()
+        Tree.objects.exclude(pk=newest.pk).update(created_at=datetime(2025, 1, 1, tzinfo=timezone.utc))
+        Tree.objects.filter(pk=newest.pk).update(created_at=datetime(2025, 2, 1, tzinfo=timezone.utc))
+        expected = [newest.pk] + [tree.pk for tree in trees]
+
+        seen, url, pages = [], '/api/trees/?page_size=2', []
+        while url:
+            ids, url, previous = self.page(url)
+            seen.extend(ids)
+            pages.append((ids, previous))
+        self.assertEqual(seen, expected)
+
+        # Walking back from the last page returns the same pages
+        previous = pages[-1][1]
+        for expected_ids, _ in reversed(pages[:-1]):
+            ids, _, previous = self.page(previous)
+            self.assertEqual(ids, expected_ids)
+
+    def test_single_direction_ordering_seeks_on_a_row_value(self):
+        names = ['b', 'a', 'b', 'c', 'a']
+        trees = [make_tree(nickname=name) for name in names]
+        expected = [tree.pk for tree in sorted(trees, key=lambda tree: (tree.nickname, tree.pk))]
+
+        seen, url = [], '/api/trees/?page_size=2'
+        while url:
+            ids, url, _ = self.page(url, ordering=('nickname', 'id'))
+            seen.extend(ids)
+        self.assertEqual(seen, expected)
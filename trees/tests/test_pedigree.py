@@ -0,0 +1,141 @@
+import random
+import time
+
+import numpy as np
+from django.test import SimpleTestCase
+from rest_framework.test import APITestCase
+
+from trees.pedigree import Pedigree, pedigrees
+
+from .utils import make_tree
+
+
+class PedigreeTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        # Two founders, two full siblings, a clone of one sibling and a selfed tree
+        cls.sire, cls.dam = make_tree(nickname='พ่อ'), make_tree(nickname='แม่')
+        cls.brother = make_tree(parent_male=cls.sire, parent_female=cls.dam)
+        cls.sister = make_tree(parent_male=cls.sire, parent_female=cls.dam)
+        cls.clone = make_tree(clone_source=cls.brother)
+        cls.selfed = make_tree(parent_male=cls.brother, parent_female=cls.brother)
+
+    def setUp(self):
+        # Other tests' rolled-back changes leave the Tree version, which keys the cache, unchanged
+        pedigrees.clear()
+
+    def post(self, action, payload):
+        response = self.client.post(f'/api/pedigree/{action}/', payload, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_kinship_and_inbreeding(self):
+        ids = [self.sire.pk, self.brother.pk, self.sister.pk, self.clone.pk, self.selfed.pk]
+        data = self.post('kinship', {'trees': ids})
+        self.assertEqual(data['inbreeding'], [0, 0, 0, 0, 0.5])
+        kinship = data['kinship']
+        self.assertEqual(kinship[0][1], 0.25)   # parent and offspring
+        self.assertEqual(kinship[1][2], 0.25)   # full siblings
+        self.assertEqual(kinship[1][3], 0.5)    # a clone is its source
+        self.assertEqual(kinship[3][3], 0.5)
+        self.assertEqual(kinship[4][4], 0.75)   # (1 + F) / 2
+        self.assertEqual(kinship, [list(row) for row in zip(*kinship)])
+
+    def test_crosses(self):
+        data = self.post('crosses', {'crosses': [
+            [self.brother.pk, self.sister.pk], [self.sire.pk, self.dam.pk], [self.clone.pk, self.brother.pk],
+        ]})
+        self.assertEqual([cross['offspring_inbreeding'] for cross in data['crosses']], [0.25, 0, 0.5])
+
+    def test_committed_changes_are_seen(self):
+        pair = {'crosses': [[self.sire.pk, self.dam.pk]]}
+        self.assertEqual(self.post('crosses', pair)['crosses'][0]['offspring_inbreeding'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dam.parent_male = self.sire
+            self.dam.save()
+        self.assertEqual(self.post('crosses', pair)['crosses'][0]['offspring_inbreeding'], 0.25)
+
+    def test_cycle_is_rejected(self):
+        self.sire.parent_female = self.brother
+        self.sire.save()
+        response = self.client.post('/api/pedigree/kinship/', {'trees': [self.brother.pk]}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+def random_pedigree(generations, size, seed=0):
+    """(tree IDs by generation, lineage edges): random crosses, selfings and clones of the last three generations"""
+    rng = random.Random(seed)
+    ids = [list(range(1, size + 1))]
+    edges = []
+    for _ in range(1, generations):
+        pool = [pk for generation in ids[-3:] for pk in generation]
+        children = list(range(ids[-1][-1] + 1, ids[-1][-1] + size + 1))
+        for child in children:
+            kind = rng.random()
+            if kind < 0.05:
+                edges.append((rng.choice(ids[-1]), child, 'clone_source'))
+            elif kind < 0.1:
+                parent = rng.choice(pool)
+                edges += [(parent, child, 'parent_male'), (parent, child, 'parent_female')]
+            else:
+                for relation in ('parent_male', 'parent_female'):
+                    if rng.random() < 0.9:
+                        edges.append((rng.choice(pool), child, relation))
+        ids.append(children)
+    return ids, edges
+
+
+def full_relationship_matrix(pks, edges):
+    """A by the textbook tabular method, row by row over the whole pedigree"""
+    links = {pk: {} for pk in pks}
+    for parent, child, relation in edges:
+        links[child][relation] = parent
+    index = {pk: i for i, pk in enumerate(pks)}
+    n = len(pks)
+    A = np.zeros((n + 1, n + 1))
+    for i, pk in enumerate(pks):
+        if 'clone_source' in links[pk]:
+            s = index[links[pk]['clone_source']]
+            A[i, :i] = A[:i, i] = A[s, :i]
+            A[i, i] = A[s, s]
+            continue
+        s, d = (index.get(links[pk].get(relation), n) for relation in ('parent_male', 'parent_female'))
+        A[i, :i] = A[:i, i] = (A[s, :i] + A[d, :i]) / 2
+        A[i, i] = 1 + A[s, d] / 2
+    return A[:n, :n], index
+
+
+class PedigreeEngineTests(SimpleTestCase):
+
+    def test_matches_the_full_relationship_matrix(self):
+        generations, edges = random_pedigree(8, 40)
+        pks = [pk for generation in generations for pk in generation]
+        A, index = full_relationship_matrix(pks, edges)
+        candidates = random.Random(1).sample(pks, 50)
+        positions = [index[pk] for pk in candidates]
+
+        pedigree = Pedigree(candidates, edges)
+        np.testing.assert_allclose(pedigree.kinship(candidates), A[np.ix_(positions, positions)] / 2, atol=1e-12)
+        np.testing.assert_allclose(pedigree.inbreeding(candidates), A[positions, positions] - 1, atol=1e-12)
+
+        # A later pedigree reusing the stored diagonal agrees too
+        known = {}
+        Pedigree(candidates[:25], edges, known=known)
+        pedigree = Pedigree(candidates, edges, known=known)
+        np.testing.assert_allclose(pedigree.inbreeding(candidates), A[positions, positions] - 1, atol=1e-12)
+
+    def test_hundreds_of_crosses_over_thousands_of_ancestors(self):
+        generations, edges = random_pedigree(30, 150)
+        rng = random.Random(2)
+        crosses = [(rng.choice(generations[-1]), rng.choice(generations[-1])) for _ in range(300)]
+
+        started = time.perf_counter()
+        pedigree = Pedigree({pk for cross in crosses for pk in cross}, edges)
+        pedigree.cross_inbreeding(crosses)
+        elapsed = time.perf_counter() - started
+
+        self.assertGreater(len(pedigree.ids), 4000)
+        self.assertLess(elapsed, 1.0)
+        # Linear in the number of trees: no trees x trees matrix is kept
+        self.assertLess(pedigree.nbytes, 100 * len(pedigree.ids))
@@ -0,0 +1,75 @@
+from rest_framework.test import APITestCase
+
+from trees.models import ReadingRollup, SensorReading
+
+from .utils import make_tree
+
+
+class ReadingTests(APITestCase):
+    url = '/api/readings/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tree = make_tree()
+
+    def batch(self):
+        return {'tree': self.tree.pk, 'readings': [
+            {'recorded_at': '2025-03-01T08:00:00+07:00', 'ph': 6.0, 'temp': 25},
+            {'recorded_at': '2025-03-01T08:01:00+07:00', 'ph': 6.4},
+        ]}
+
+    def rollup(self):
+        return ReadingRollup.objects.get(bucket='hour', tree=self.tree)
+
+    def test_stores_readings_and_rollups(self):
+        response = self.client.post(self.url, self.batch(), format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(
+            list(SensorReading.objects.filter(tree=self.tree).order_by('recorded_at').values_list('ph', 'temp')),
+            [(6.0, 25.0), (6.4, None)],
+        )
+        rollup = self.rollup()
+        self.assertEqual((rollup.ph_count, rollup.ph_min, rollup.ph_max, rollup.temp_count), (2, 6.0, 6.4, 1))
+        self.assertAlmostEqual(rollup.ph_sum, 12.4)
+
+    def test_retried_batch_is_stored_once(self):
+        self.client.post(self.url, self.batch(), format='json')
+        retry = self.batch()
+        retry['readings'].append({'recorded_at': '2025-03-01T08:02:00+07:00', 'ph': 7.0})
+        response = self.client.post(self.url, retry, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['duplicates']), (1, 2))
+        self.assertEqual(SensorReading.objects.filter(tree=self.tree).count(), 3)
+        self.assertEqual((self.rollup().ph_count, self.rollup().ph_max), (3, 7.0))
+
+        response = self.client.post(self.url, retry, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['created'], response.data['duplicates']), (0, 3))
+        self.assertEqual(SensorReading.objects.filter(tree=self.tree).count(), 3)
+        self.assertEqual(self.rollup().ph_count, 3)
+
+    def test_duplicates_within_a_batch(self):
+        reading = {'recorded_at': '2025-03-01T08:00:00+07:00', 'ph': 6.0}
+        response = self.client.post(self.url, {'location': 'โรงเรือน 1', 'readings': [reading, reading]}, format='json')
+        self.assertEqual((response.data['created'], response.data['duplicates']), (1, 1))
+        self.assertEqual(SensorReading.objects.filter(location='โรงเรือน 1').count(), 1)
+        self.assertEqual(ReadingRollup.objects.get(bucket='day', location='โรงเรือน 1').ph_count, 1)
+
+    def test_invalid_readings_are_reported(self):
+        response = self.client.post(self.url, [{'tree': self.tree.pk, 'ph': 'x', 'recorded_at': 'yesterday'}], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['skipped'], 1)
+        self.assertFalse(SensorReading.objects.exists())
+
+    def test_out_of_range_timestamps_are_reported(self):
+        readings = [{'recorded_at': value, 'ph': 6.0} for value in (1e20, -1e12, 253402300800)]
+        readings.append({'recorded_at': 1740790800, 'ph': 6.0})
+        response = self.client.post(self.url, {'tree': self.tree.pk, 'readings': readings}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual((response.data['created'], response.data['skipped']), (1, 3))
+        self.assertEqual(
+            [(error['index'], error['field']) for error in response.data['errors']],
+            [(0, 'recorded_at'), (1, 'recorded_at'), (2, 'recorded_at')],
+        )
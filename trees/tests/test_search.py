@@ -0,0 +1,55 @@
+from rest_framework.test import APITestCase
+
+from trees.models import Batch, Strain, TreeLog
+
+from .utils import make_tree
+
+
+class ThaiSearchTests(APITestCase):
+    """Thai has no spaces between words, so these only match as substrings"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.yellow = make_tree(nickname='ต้นที่หนึ่ง', disease_notes='ใบเหลืองเพราะขาดไนโตรเจน')
+        cls.fragrant = make_tree(nickname='ต้นที่สอง', phenotype='กลิ่นหอมหวานคล้ายผลไม้')
+        cls.log = TreeLog.objects.create(tree=cls.fragrant, title='ตรวจแปลง', notes='พบเพลี้ยไฟใต้ใบจำนวนมาก')
+
+    def search(self, text, kind):
+        response = self.client.get('/api/search/', {'q': text, 'type': kind})
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.json()[f'{kind}s']]
+
+    def test_word_inside_a_phrase(self):
+        self.assertEqual(self.search('ไนโตรเจน', 'tree'), [self.yellow.pk])
+        self.assertEqual(self.search('หอมหวาน', 'tree'), [self.fragrant.pk])
+        self.assertEqual(self.search('เพลี้ยไฟ', 'log'), [self.log.pk])
+
+    def test_no_match(self):
+        self.assertEqual(self.search('รากเน่า', 'tree'), [])
+
+    def test_tree_list_search_box(self):
+        response = self.client.get('/api/trees/', {'search': 'หอมหวาน'})
+        self.assertEqual([row['id'] for row in response.json()['results']], [self.fragrant.pk])
+
+
+class TreeListSearchTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.kush = make_tree(strain=Strain.objects.create(name='Hindu Kush'), nickname='A')
+        cls.batched = make_tree(batch=Batch.objects.create(batch_code='B-2025-07'), nickname='B')
+        cls.located = make_tree(location='โรงเรือนทิศเหนือ', nickname='C')
+
+    def search(self, text):
+        response = self.client.get('/api/trees/', {'search': text})
+        self.assertEqual(response.status_code, 200)
+        return sorted(row['id'] for row in response.json()['results'])
+
+    def test_related_and_plain_columns(self):
+        self.assertEqual(self.search('kush'), [self.kush.pk])
+        self.assertEqual(self.search('2025-07'), [self.batched.pk])
+        self.assertEqual(self.search('ทิศเหนือ'), [self.located.pk])
+
+    def test_every_term_must_match(self):
+        self.assertEqual(self.search('hindu kush'), [self.kush.pk])
+        self.assertEqual(self.search('hindu เหนือ'), [])
@@ -0,0 +1,45 @@
+from rest_framework.test import APITestCase
+
+from trees.models import Strain, TreeLog
+from trees.stats import get_stats
+
+from .utils import make_tree
+
+
+class StatsTests(APITestCase):
+
+    def test_committed_changes_retire_the_cached_stats(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            tree = make_tree(status='กำลังปลูก')
+        self.assertEqual(get_stats()['total'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            make_tree(status='เก็บเกี่ยวแล้ว')
+            TreeLog.objects.create(tree=tree, dry_weight=12)
+        stats = get_stats()
+        self.assertEqual((stats['total'], stats['active'], stats['harvested']), (2, 1, 1))
+        self.assertEqual(stats['yield']['logged']['dry_total'], 12)
+
+    def test_strain_rename_shows_in_by_strain(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            make_tree()
+        self.assertEqual(get_stats()['by_strain'][0]['strain_name'], 'Test Strain')
+        with self.captureOnCommitCallbacks(execute=True):
+            strain = Strain.objects.get()
+            strain.name = 'Renamed'
+            strain.save()
+        self.assertEqual(get_stats()['by_strain'][0]['strain_name'], 'Renamed')
+
+    def test_revalidation_after_a_write_gets_the_new_payload(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            make_tree()
+        first = self.client.get('/api/stats/')
+        self.assertEqual(first.json()['total'], 1)
+        self.assertEqual(self.client.get('/api/stats/', HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_tree()
+        second = self.client.get('/api/stats/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        self.assertEqual(second.json()['total'], 2)
+        self.assertEqual(self.client.get('/api/stats/', HTTP_IF_NONE_MATCH=second['ETag']).status_code, 304)
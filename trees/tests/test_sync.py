@@ -0,0 +1,71 @@
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from trees.models import Strain, Tree, TreeLog
+
+from .utils import make_tree
+
+
+@override_settings(SYNC_OVERLAP_SECONDS=0)
+class SyncTests(APITestCase):
+    """Writes run their on-commit callbacks, which bump the versions behind /api/sync/'s ETag"""
+    url = '/api/sync/'
+
+    def test_first_sync_is_a_full_snapshot(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            tree = make_tree()
+        data = self.client.get(self.url).json()
+        self.assertTrue(data['reset'])
+        self.assertEqual([row['id'] for row in data['trees']], [tree.pk])
+        self.assertEqual([row['id'] for row in data['strains']], [tree.strain_id])
+
+    def test_delta_has_changes_and_deletions_since_the_token(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            unchanged, edited, deleted = make_tree(), make_tree(), make_tree()
+        token = self.client.get(self.url).json()['token']
+        deleted_pk = deleted.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            edited.nickname = 'แก้ไขแล้ว'
+            edited.save()
+            deleted.delete()
+
+        data = self.client.get(self.url, {'since': token}).json()
+        self.assertFalse(data['reset'])
+        self.assertEqual([row['id'] for row in data['trees']], [edited.pk])
+        self.assertEqual(data['deleted']['trees'], [deleted_pk])
+        self.assertNotIn(unchanged.pk, data['deleted']['trees'])
+
+    def test_bad_token(self):
+        self.assertEqual(self.client.get(self.url, {'since': 'abc'}).status_code, 400)
+
+    def test_upserts_resolve_client_ids(self):
+        strain = Strain.objects.create(name='Offline')
+        response = self.client.post(self.url, {
+            'trees': [{'client_id': 'tmp-1', 'strain': strain.pk, 'nickname': 'ต้นใหม่', 'status': 'กำลังปลูก',
+                       'plant_date': '2025-05-01'}],
+            'logs': [{'tree': 'tmp-1', 'action_type': 'water', 'notes': 'รดน้ำครั้งแรก'}],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['errors'], [])
+        tree_id = data['saved'][0]['id']
+        self.assertEqual(data['saved'][0]['client_id'], 'tmp-1')
+        self.assertEqual(TreeLog.objects.get(pk=data['saved'][1]['id']).tree_id, tree_id)
+        self.assertEqual(Tree.objects.get(pk=tree_id).nickname, 'ต้นใหม่')
+
+    def test_stale_update_is_a_conflict(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            tree = make_tree(nickname='เดิม')
+        seen = self.client.get(self.url).json()['trees'][0]['updated_at']
+        with self.captureOnCommitCallbacks(execute=True):
+            tree.nickname = 'แก้บนเซิร์ฟเวอร์'
+            tree.save()
+
+        response = self.client.post(self.url, {
+            'trees': [{'id': tree.pk, 'updated_at': seen, 'nickname': 'แก้ตอนออฟไลน์'}],
+        }, format='json')
+        data = response.json()
+        self.assertEqual(data['saved'], [])
+        self.assertEqual(data['conflicts'][0]['current']['nickname'], 'แก้บนเซิร์ฟเวอร์')
+        self.assertEqual(Tree.objects.get(pk=tree.pk).nickname, 'แก้บนเซิร์ฟเวอร์')
@@ -0,0 +1,23 @@
+import io
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+from PIL import Image as PILImage
+
+from trees.models import Image
+
+from .utils import TempMediaMixin, make_tree
+
+
+class ProcessThumbnailsTests(TempMediaMixin, TestCase):
+    def test_bad_image_path_fails_only_that_image(self):
+        tree = make_tree()
+        buffer = io.BytesIO()
+        PILImage.new('RGB', (40, 30), 'green').save(buffer, format='PNG')
+        good = Image.objects.create(tree=tree, image=SimpleUploadedFile('leaf.png', buffer.getvalue()))
+        outside = Image.objects.create(tree=tree, image='../../etc/passwd', thumbnail_status='pending')
+
+        call_command('process_thumbnails', '--once', '--workers', '1', stdout=io.StringIO(), stderr=io.StringIO())
+        statuses = dict(Image.objects.values_list('pk', 'thumbnail_status'))
+        self.assertEqual(statuses, {good.pk: 'ready', outside.pk: 'failed'})
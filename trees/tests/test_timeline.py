@@ -0,0 +1,32 @@
+from datetime import datetime, timezone
+
+from rest_framework.test import APITestCase
+
+from trees.models import TreeLog
+
+from .utils import make_tree
+
+
+class TimelineTests(APITestCase):
+    def setUp(self):
+        self.tree = make_tree()
+        other = make_tree()
+        for day in (3, 1, 2):
+            TreeLog.objects.create(tree=self.tree, action_date=datetime(2025, 1, day, tzinfo=timezone.utc), title=f'วันที่ {day}')
+        TreeLog.objects.create(tree=other, action_date=datetime(2025, 1, 4, tzinfo=timezone.utc))
+        self.url = f'/api/trees/{self.tree.pk}/timeline/'
+
+    def titles(self, response):
+        self.assertEqual(response.status_code, 200, response.content)
+        return [log['title'] for log in response.json()['results']]
+
+    def test_newest_first_across_pages(self):
+        first = self.client.get(self.url, {'page_size': 2}).json()
+        self.assertEqual([log['title'] for log in first['results']], ['วันที่ 3', 'วันที่ 2'])
+        self.assertEqual(self.titles(self.client.get(first['next'])), ['วันที่ 1'])
+
+    def test_ordering_param_of_the_tree_list_is_ignored(self):
+        for ordering in ('nickname', 'created_at', '-plant_date'):
+            with self.subTest(ordering=ordering):
+                response = self.client.get(self.url, {'ordering': ordering})
+                self.assertEqual(self.titles(response), ['วันที่ 3', 'วันที่ 2', 'วันที่ 1'])
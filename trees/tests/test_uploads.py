@@ -0,0 +1,81 @@
+import hashlib
+import io
+import os
+
+from PIL import Image as PILImage
+from rest_framework.test import APITestCase
+
+from trees.models import Image, Upload
+
+from .utils import TempMediaMixin, make_tree
+
+
+def png_bytes():
+    buffer = io.BytesIO()
+    PILImage.new('RGB', (4, 4), 'green').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class UploadTests(TempMediaMixin, APITestCase):
+    def setUp(self):
+        self.tree = make_tree()
+
+    def start(self, content, kind='document', **fields):
+        response = self.client.post('/api/uploads/', {
+            'kind': kind, 'tree': self.tree.pk, 'filename': 'report.pdf', 'size': len(content), **fields,
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return f"/api/uploads/{response.json()['id']}/"
+
+    def put(self, url, chunk, offset):
+        return self.client.put(url, chunk, content_type='application/octet-stream', HTTP_UPLOAD_OFFSET=str(offset))
+
+    def test_document_resumes_from_the_reported_offset(self):
+        content = b'%PDF-1.4 ' + b'x' * 100
+        url = self.start(content, sha256=hashlib.sha256(content).hexdigest())
+
+        self.assertEqual(self.put(url, content[:40], 0)['Upload-Offset'], '40')
+        # A retried chunk at a stale offset is refused; HEAD tells the client where to resume
+        self.assertEqual(self.put(url, content[:40], 0).status_code, 409)
+        self.assertEqual(self.client.head(url)['Upload-Offset'], '40')
+        self.assertEqual(self.client.post(f'{url}finalize/').status_code, 409)
+        self.assertEqual(self.put(url, content[40:], 40)['Upload-Offset'], str(len(content)))
+
+        response = self.client.post(f'{url}finalize/')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.tree.refresh_from_db()
+        with self.tree.document.open('rb') as handle:
+            self.assertEqual(handle.read(), content)
+        self.assertFalse(Upload.objects.exists())
+
+    def test_image_upload_creates_an_image(self):
+        content = png_bytes()
+        url = self.start(content, kind='image', filename='leaf.png')
+        self.put(url, content, 0)
+
+        response = self.client.post(f'{url}finalize/')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(list(Image.objects.values_list('tree', flat=True)), [self.tree.pk])
+
+    def test_checksum_mismatch_is_rejected(self):
+        content = b'%PDF-1.4 body'
+        url = self.start(content, sha256='0' * 64)
+        self.put(url, content, 0)
+
+        self.assertEqual(self.client.post(f'{url}finalize/').status_code, 422)
+        self.tree.refresh_from_db()
+        self.assertFalse(self.tree.document)
+
+    def test_chunk_past_the_declared_size_is_rejected(self):
+        url = self.start(b'12345')
+        self.assertEqual(self.put(url, b'123456', 0).status_code, 413)
+
+    def test_abort_removes_the_partial_file(self):
+        url = self.start(b'0123456789')
+        self.put(url, b'01234', 0)
+        path = Upload.objects.get().path
+        self.assertTrue(os.path.exists(path))
+
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(self.client.get(url).status_code, 404)
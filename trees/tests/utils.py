@@ -0,0 +1,74 @@
+"""Shared fixtures for the trees tests (PostgreSQL only, like the app)"""
+import io
+import shutil
+import tempfile
+import zipfile
+from xml.sax.saxutils import escape
+
+from django.test import override_settings
+
+from trees.models import Strain, Tree
+
+
+def make_tree(strain=None, **fields):
+    if strain is None:
+        strain, _ = Strain.objects.get_or_create(name='Test Strain')
+    fields.setdefault('plant_date', '2025-01-01')
+    return Tree.objects.create(strain=strain, **fields)
+
+
+def make_workbook(sheets):
+    """
+    A minimal .xlsx file object from ``{sheet: [header, *rows]}``: only the
+    parts trees.spreadsheet reads, every cell an inline string.
+    """
+    rel_ns = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+    names = ''.join(f'<sheet name="{name}" sheetId="{i}" r:id="rId{i}"/>' for i, name in enumerate(sheets, start=1))
+    links = ''.join(
+        f'<Relationship Id="rId{i}" Type="{rel_ns}/worksheet" Target="worksheets/sheet{i}.xml"/>'
+        for i in range(1, len(sheets) + 1)
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as workbook:
+        workbook.writestr(
+            'xl/workbook.xml',
+            f'<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" xmlns:r="{rel_ns}">'
+            f'<sheets>{names}</sheets></workbook>',
+        )
+        workbook.writestr(
+            'xl/_rels/workbook.xml.rels',
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'{links}</Relationships>',
+        )
+        for i, rows in enumerate(sheets.values(), start=1):
+            cells = (
+                ''.join(f'<c t="inlineStr"><is><t>{escape(str(value))}</t></is></c>' for value in row) for row in rows
+            )
+            workbook.writestr(
+                f'xl/worksheets/sheet{i}.xml',
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                + ''.join(f'<row>{row}</row>' for row in cells)
+                + '</sheetData></worksheet>',
+            )
+    buffer.seek(0)
+    buffer.name = 'import.xlsx'
+    return buffer
+
+
+class TempMediaMixin:
+    """MEDIA_ROOT and UPLOAD_TEMP_DIR in a throwaway directory per test class"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls._media_dir = tempfile.mkdtemp()
+        cls._media_settings = override_settings(
+            MEDIA_ROOT=cls._media_dir, UPLOAD_TEMP_DIR=f'{cls._media_dir}/uploads'
+        )
+        cls._media_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls._media_settings.disable()
+        shutil.rmtree(cls._media_dir, ignore_errors=True)
@@ -0,0 +1,91 @@
+"""
+Thumbnail and responsive rendition rendering.
+
+These helpers only touch Pillow and the filesystem, never the ORM, so the
+`process_thumbnails` command can run them in a process pool.
+"""
+from io import BytesIO
+
+from PIL import Image as PilImage, ImageOps, features
+
+THUMBNAIL_SIZE = (400, 300)
+THUMBNAIL_QUALITY = 85
+
+# Default rendition widths (px) and encodings; override with the
+# IMAGE_RENDITION_WIDTHS / IMAGE_RENDITION_FORMATS settings.
+DEFAULT_RENDITION_WIDTHS = (160, 400, 1024, 2048)
+DEFAULT_RENDITION_FORMATS = ('avif', 'webp')
+
+# Pillow save() options per output format
+ENCODER_OPTIONS = {
+    'avif': {'format': 'AVIF', 'quality': 60, 'speed': 8},
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': THUMBNAIL_QUALITY, 'optimize': True, 'progressive': True},
+}
+
+
+def supported_formats(formats):
+    """Drop encodings this Pillow build cannot write (e.g. AVIF before Pillow 11.3)"""
+    return [fmt for fmt in formats if fmt in ENCODER_OPTIONS and (fmt == 'jpeg' or features.check(fmt))]
+
+
+def to_rgb(img):
+    """Flatten RGBA onto white and convert other modes so the image can be saved as JPEG"""
+    if img.mode == 'RGBA':
+        rgb_img = PilImage.new('RGB', img.size, (255, 255, 255))
+        rgb_img.paste(img, mask=img.split()[3])  # Use alpha channel as mask
+        return rgb_img
+    if img.mode not in ('RGB', 'L'):
+        return img.convert('RGB')
+    return img
+
+
+def encode(img, fmt):
+    buffer = BytesIO()
+    img.save(buffer, **ENCODER_OPTIONS[fmt])
+    return buffer.getvalue()
+
+
+def render_image_set(path, widths=(), formats=(), thumbnail_size=THUMBNAIL_SIZE):
+    """
+    Decode the image at `path` once and render everything derived from it.
+
+    Returns ``{'size': (w, h), 'thumbnail': bytes | None, 'renditions': {width: {fmt: bytes}}}``.
+    Widths wider than the source are skipped rather than upscaled. Each smaller
+    width is resized from the previous, larger result instead of the original.
+    """
+    with PilImage.open(path) as img:
+        # Exact source size before draft() scales anything down
+        source_w, source_h = img.size
+        if img.getexif().get(0x0112) in (5, 6, 7, 8):
+            source_w, source_h = source_h, source_w
+
+        targets = sorted({w for w in widths if w < source_w}, reverse=True)
+        # Let the JPEG decoder scale down by 1/2..1/8 while decoding (no-op for
+        # other formats). Square bound so EXIF rotation can't undershoot.
+        bound = max(targets[:1] + list(thumbnail_size or (0,)))
+        if bound:
+            img.draft('RGB', (bound, bound))
+        img = to_rgb(ImageOps.exif_transpose(img))
+
+        renditions = {}
+        current = thumb_source = img
+        for width in targets:
+            height = max(1, round(source_h * width / source_w))
+            current = current.resize((width, height), PilImage.LANCZOS)
+            renditions[width] = {fmt: encode(current, fmt) for fmt in formats}
+            if thumbnail_size and width >= thumbnail_size[0]:
+                thumb_source = current
+
+        thumbnail = None
+        if thumbnail_size:
+            thumb = thumb_source.copy()
+            thumb.thumbnail(thumbnail_size, PilImage.LANCZOS)
+            thumbnail = encode(thumb, 'jpeg')
+
+    return {'size': (source_w, source_h), 'thumbnail': thumbnail, 'renditions': renditions}
+
+
+def render_thumbnail(path, size=THUMBNAIL_SIZE):
+    """Decode the image at `path` and return JPEG thumbnail bytes"""
+    return render_image_set(path, thumbnail_size=size)['thumbnail']
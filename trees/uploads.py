@@ -0,0 +1,253 @@
+"""
+Resumable uploads for photos and tree documents (/api/uploads/).
+
+1. ``POST /api/uploads/`` with ``{kind: 'image'|'document', tree, log?,
+   filename, size, sha256?}`` opens an upload and returns its ``id``.
+2. ``PUT /api/uploads/<id>/`` with raw bytes and ``Upload-Offset: <n>``
+   appends a chunk. ``n`` must equal the bytes already received; on a
+   dropped connection the client asks ``GET`` (or ``HEAD``) for the current
+   ``offset`` and carries on from there.
+3. ``POST /api/uploads/<id>/finalize/`` once every byte has arrived creates
+   the Image or attaches the document.
+
+Chunks are written straight from the request stream to a partial file under
+UPLOAD_TEMP_DIR and fed to a SHA-256 as they arrive, so finalizing needs
+neither a second read (the digest is known) nor a copy: the partial file is
+renamed into MEDIA_ROOT. A worker that didn't see the earlier chunks (another
+process, or a restart) re-hashes the part already on disk once and continues
+incrementally.
+"""
+import hashlib
+import os
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image as PILImage, UnidentifiedImageError
+
+from .models import Image, ImageBlob, Upload
+
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+DEFAULT_EXPIRE_HOURS = 24
+READ_SIZE = 256 * 1024
+
+
+class UploadError(Exception):
+    """Request that can't be applied; `status` is the HTTP status to answer with"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def max_bytes():
+    return getattr(settings, 'UPLOAD_MAX_BYTES', DEFAULT_MAX_BYTES)
+
+
+def expire_hours():
+    return getattr(settings, 'UPLOAD_EXPIRE_HOURS', DEFAULT_EXPIRE_HOURS)
+
+
+class _Digests:
+    """Running SHA-256 per upload, for chunks received by this process"""
+
+    def __init__(self):
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def take(self, upload):
+        """Hasher positioned at upload.offset, rebuilt from disk if this process lost track"""
+        with self.lock:
+            entry = self.entries.pop(upload.pk, None)
+        if entry is not None and entry[0] == upload.offset:
+            return entry[1]
+        digest = hashlib.sha256()
+        remaining = upload.offset
+        with open(upload.path, 'rb') as handle:
+            while remaining > 0:
+                chunk = handle.read(min(READ_SIZE, remaining))
+                if not chunk:
+                    break
+                digest.update(chunk)
+                remaining -= len(chunk)
+        return digest
+
+    def keep(self, upload, digest):
+        with self.lock:
+            self.entries[upload.pk] = (upload.offset, digest)
+
+    def drop(self, pk):
+        with self.lock:
+            self.entries.pop(pk, None)
+
+
+digests = _Digests()
+
+
+class ReceivedFile(File):
+    """
+    A finished partial file. FileSystemStorage moves files that report a
+    `temporary_file_path()` instead of copying them.
+    """
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def start_upload(kind, filename, size, tree=None, log=None, sha256=''):
+    if size > max_bytes():
+        raise UploadError(f'ไฟล์ใหญ่เกินกำหนด (สูงสุด {max_bytes() // (1024 * 1024)} MB)', status=413)
+    upload = Upload.objects.create(
+        kind=kind, filename=os.path.basename(filename), size=size, tree=tree, log=log, sha256=sha256.lower(),
+    )
+    os.makedirs(os.path.dirname(upload.path), exist_ok=True)
+    open(upload.path, 'wb').close()
+    return upload
+
+
+def append_chunk(upload_id, offset, stream, length):
+    """
+    Write `length` bytes of `stream` at `offset`. Whatever arrived before the
+    stream broke is kept, so the client resumes from the returned upload's offset.
+    """
+    with transaction.atomic():
+        # One writer per upload; a retried chunk waits for the stalled one
+        upload = Upload.objects.select_for_update().filter(pk=upload_id).first()
+        if upload is None:
+            raise UploadError('ไม่พบการอัปโหลดนี้ (อาจหมดอายุแล้ว)', status=404)
+        if offset != upload.offset:
+            raise UploadError(f'Upload-Offset ต้องเป็น {upload.offset}', status=409)
+        if length is None or offset + length > upload.size:
+            raise UploadError('ข้อมูลเกินขนาดไฟล์ที่แจ้งไว้', status=413)
+
+        digest = digests.take(upload)
+        received = 0
+        with open(upload.path, 'r+b') as handle:
+            handle.seek(offset)
+            try:
+                while received < length:
+                    chunk = stream.read(min(READ_SIZE, length - received))
+                    if not chunk:
+                        break
+                    handle.write(chunk)
+                    digest.update(chunk)
+                    received += len(chunk)
+            except OSError:
+                # Client went away mid-chunk: keep what we have
+                pass
+            # Bytes past the offset from an earlier broken chunk are not ours
+            handle.truncate(offset + received)
+        upload.offset = offset + received
+        upload.save(update_fields=['offset', 'updated_at'])
+        digests.keep(upload, digest)
+    return upload
+
+
+def _verified_digest(upload):
+    digest = digests.take(upload).hexdigest()
+    if upload.sha256 and upload.sha256 != digest:
+        raise UploadError('ค่า SHA-256 ของไฟล์ไม่ตรงกับที่แจ้งไว้ กรุณาอัปโหลดใหม่', status=422)
+    return digest
+
+
+def _check_image(path):
+    """Reads only the header: the thumbnail worker decodes the pixels later"""
+    try:
+        with PILImage.open(path) as picture:
+            picture.size
+    except (UnidentifiedImageError, OSError):
+        raise UploadError('ไฟล์ไม่ใช่รูปภาพที่รองรับ')
+
+
+def finalize_upload(upload_id):
+    """Create the Image / attach the document; returns (upload, image or tree)"""
+    with transaction.atomic():
+        upload = Upload.objects.select_for_update(of=('self',)).select_related('tree').filter(pk=upload_id).first()
+        if upload is None:
+            raise UploadError('ไม่พบการอัปโหลดนี้ (อาจหมดอายุแล้ว)', status=404)
+        if upload.offset != upload.size:
+            raise UploadError(f'ยังอัปโหลดไม่ครบ ({upload.offset}/{upload.size} ไบต์)', status=409)
+        digest = _verified_digest(upload)
+
+        received = ReceivedFile(open(upload.path, 'rb'), name=upload.filename)
+        try:
+            if upload.kind == 'image':
+                _check_image(upload.path)
+                image = Image(tree=upload.tree, log=upload.log)
+                image.use_blob(ImageBlob.intern(received, digest=digest))
+                image.save()
+                result = image
+            else:
+                tree = upload.tree
+                previous = tree.document.name if tree.document else None
+                tree.document.save(upload.filename, received, save=False)
+                tree.save(update_fields=['document', 'updated_at'])
+                if previous and previous != tree.document.name:
+                    storage = tree.document.storage
+                    transaction.on_commit(lambda: storage.delete(previous))
+                result = tree
+        finally:
+            received.close()
+        pk, path = upload.pk, upload.path
+        upload.delete()
+        # The content went to storage (moved, or the blob already existed)
+        transaction.on_commit(lambda: _remove(path))
+    digests.drop(pk)
+    return upload, result
+
+
+def _discard(upload):
+    pk, path = upload.pk, upload.path
+    upload.delete()
+    digests.drop(pk)
+    _remove(path)
+
+
+def remove_parts(upload_ids):
+    """Partial files of uploads whose rows were deleted in bulk (Tree.bulk_delete)"""
+    for pk in upload_ids:
+        digests.drop(pk)
+        _remove(Upload(pk=pk).path)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def abort_upload(upload_id):
+    upload = Upload.objects.filter(pk=upload_id).first()
+    if upload is None:
+        raise UploadError('ไม่พบการอัปโหลดนี้ (อาจหมดอายุแล้ว)', status=404)
+    _discard(upload)
+
+
+def expire_uploads(hours=None):
+    """
+    Drop uploads idle for longer than UPLOAD_EXPIRE_HOURS, and partial files
+    left behind by uploads whose tree or log was deleted; returns how many.
+    """
+    cutoff = timezone.now() - timedelta(hours=expire_hours() if hours is None else hours)
+    stale = list(Upload.objects.filter(updated_at__lt=cutoff))
+    for upload in stale:
+        _discard(upload)
+
+    directory = Upload.folder()
+    try:
+        names = [name for name in os.listdir(directory) if name.endswith('.part')]
+    except FileNotFoundError:
+        names = []
+    live = {str(pk) for pk in Upload.objects.values_list('pk', flat=True)}
+    orphans = 0
+    for name in names:
+        path = os.path.join(directory, name)
+        if name[:-len('.part')] in live or os.path.getmtime(path) >= cutoff.timestamp():
+            continue
+        _remove(path)
+        orphans += 1
+    return len(stale) + orphans
@@ -1,6 +1,10 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import TreeViewSet, ImageViewSet, StrainViewSet, BatchViewSet, TreeLogViewSet
+from .views import (
+    TreeViewSet, ImageViewSet, StrainViewSet, BatchViewSet, TreeLogViewSet, SearchViewSet,
+    DeletionJobViewSet, StatsViewSet, PedigreeViewSet, ImportViewSet, ExportViewSet, SensorReadingViewSet,
+    SyncViewSet, UploadViewSet, live_events,
+)
 
 router = DefaultRouter()
 router.register(r'trees', TreeViewSet)
@@ -8,7 +12,17 @@ router.register(r'images', ImageViewSet)
 router.register(r'strains', StrainViewSet)
 router.register(r'batches', BatchViewSet)
 router.register(r'logs', TreeLogViewSet)
+router.register(r'search', SearchViewSet, basename='search')
+router.register(r'deletion-jobs', DeletionJobViewSet)
+router.register(r'stats', StatsViewSet, basename='stats')
+router.register(r'pedigree', PedigreeViewSet, basename='pedigree')
+router.register(r'import', ImportViewSet, basename='import')
+router.register(r'export', ExportViewSet, basename='export')
+router.register(r'readings', SensorReadingViewSet, basename='reading')
+router.register(r'sync', SyncViewSet, basename='sync')
+router.register(r'uploads', UploadViewSet, basename='upload')
 
 urlpatterns = [
+    path('events/', live_events, name='events'),
     path('', include(router.urls)),
 ]
@@ -1,17 +1,173 @@
 from django.shortcuts import render
 
 # Create your views here.
+import asyncio
+import json
+
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import F
+from django.http import HttpResponseRedirect, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.filters import OrderingFilter
 from rest_framework.response import Response
-from .models import Tree, Image, Strain, Batch, TreeLog
-from .serializers import TreeSerializer, ImageSerializer, StrainSerializer, BatchSerializer, TreeLogSerializer
+from .models import Tree, Image, Strain, Batch, TreeLog, DeletionJob, Upload
+from .serializers import (
+    TreeSerializer, TreeListSerializer, ImageSerializer, StrainSerializer, BatchSerializer, TreeLogSerializer,
+    TreeSearchResultSerializer, TreeLogSearchResultSerializer, DeletionJobSerializer,
+    LineageNodeSerializer, UploadSerializer, BulkTreeLogSerializer,
+)
+from .pagination import TreeCursorPagination, TreeLogCursorPagination
+from .filters import IndexedSearchFilter, TreeFilter
+from .search import search_trees, search_logs
+from .stats import STATS_MODELS, get_stats
+from .lineage import walk_lineage
+from .pedigree import PedigreeCycleError, get_pedigree
+from .importer import Importer
+from .spreadsheet import CSV_SHEETS, SHEETS, SpreadsheetError, read_spreadsheet
+from .exporter import stream_csv, stream_xlsx
+from .caching import ConditionalGetMixin
+from .readings import ingest_readings, max_readings
+from .environment import BUCKETS, DEFAULT_POINTS, MAX_POINTS, environment_history, parse_moment
+from .sync import UPSERT_TYPES, apply_upserts, changes_since, current_token, max_upserts, parse_token
+from .events import hub, keepalive_seconds
+from .fieldsets import FieldsetError, parse_fieldset, trim_queryset
+from .uploads import UploadError, abort_upload, append_chunk, finalize_upload, start_upload
 
-class TreeViewSet(viewsets.ModelViewSet):
+class TreeViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Tree.objects.all().select_related(
-        'strain', 'batch', 'parent_male', 'parent_female', 'clone_source', 'pollinated_by'
-    ).prefetch_related('images', 'images_set').order_by('-created_at')
+        'strain', 'batch', 'latest_log'
+    ).prefetch_related('images_set', 'latest_log__images').annotate(
+        strain_name=F('strain__name')
+    ).order_by('-created_at', 'id')
     serializer_class = TreeSerializer
+    pagination_class = TreeCursorPagination
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, OrderingFilter]
+    filterset_class = TreeFilter
+    # Also covers the strain/location/batch matches the dashboard search box used to do client-side.
+    # Each column has a trigram index on UPPER(column) (see Tree/Strain/Batch Meta.indexes)
+    search_fields = [
+        'nickname', 'variety', 'phenotype', 'notes', 'location', 'strain__name', 'batch__batch_code',
+    ]
+    # Only NOT NULL columns: keyset cursors cannot seek across NULLs.
+    # The paginator appends `id` as the final tie-breaker.
+    ordering_fields = [
+        'id', 'created_at', 'updated_at', 'nickname', 'variety', 'strain_name',
+        'status', 'sex', 'growth_stage', 'plant_date', 'location',
+    ]
+    # Everything a tree response embeds; lineage and timeline draw on the same tables
+    cache_models = (Tree, Strain, Batch, TreeLog, Image)
+    conditional_actions = ('list', 'retrieve', 'lineage', 'timeline')
+
+    lineage_default_depth = 3
+    lineage_max_depth = 25
+
+    # Set by list/retrieve from ?fields=/?omit=/?expand=; None on other actions
+    fieldset = None
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return TreeListSerializer
+        return TreeSerializer
+
+    def get_serializer(self, *args, **kwargs):
+        if self.fieldset is not None:
+            kwargs.update(self.fieldset)
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self):
+        if self.fieldset is None:
+            return super().get_queryset()
+        # Only the columns, joins and prefetches the requested fields read
+        queryset = Tree.objects.annotate(strain_name=F('strain__name')).order_by('-created_at', 'id')
+        return trim_queryset(queryset, self.get_serializer())
+
+    def _with_fieldset(self, handler, request, *args, **kwargs):
+        try:
+            self.fieldset = parse_fieldset(request.query_params, self.get_serializer_class())
+        except FieldsetError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return handler(request, *args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        """
+        รายการต้นไม้แบบย่อ (ข้อมูลที่การ์ดและตารางใช้) ปรับได้ด้วย ?fields=, ?omit=
+        และ ?expand=strain,batch,images,latest_log
+        """
+        return self._with_fieldset(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._with_fieldset(super().retrieve, request, *args, **kwargs)
+
+    @action(detail=True, methods=['get'])
+    def lineage(self, request, pk=None):
+        """ผังสายพันธุ์ (บรรพบุรุษ/ลูกหลาน): ?depth=N&direction=up|down"""
+        direction = request.query_params.get('direction', 'up')
+        if direction not in ('up', 'down'):
+            return Response({'error': 'direction ต้องเป็น up หรือ down'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            depth = int(request.query_params.get('depth', self.lineage_default_depth))
+        except ValueError:
+            return Response({'error': 'depth ต้องเป็นตัวเลข'}, status=status.HTTP_400_BAD_REQUEST)
+        depth = max(1, min(depth, self.lineage_max_depth))
+
+        root = get_object_or_404(Tree.objects.only('pk'), pk=pk)
+        edges, depths = walk_lineage([root.pk], depth, direction)
+        nodes = Tree.objects.filter(pk__in=depths).select_related('strain').only(
+            'id', 'nickname', 'variety', 'strain__name', 'sex', 'status', 'growth_stage', 'plant_date'
+        ).order_by('id')
+        return Response({
+            'root': root.pk,
+            'direction': direction,
+            'depth': depth,
+            'nodes': LineageNodeSerializer(nodes, many=True, context={'depths': depths}).data,
+            'edges': [{'source': parent, 'target': child, 'relation': relation} for parent, child, relation in edges],
+        })
+
+    @action(detail=True, methods=['get'])
+    def timeline(self, request, pk=None):
+        """บันทึกของต้นไม้ใหม่สุดก่อน แบ่งหน้าด้วย cursor (?cursor=&page_size=) พร้อมรูปภาพของแต่ละบันทึก"""
+        tree = get_object_or_404(Tree.objects.only('pk'), pk=pk)
+        # Seeks on treelog_tree_timeline_idx; images for the whole page come in one extra query
+        logs = TreeLog.objects.filter(tree=tree).prefetch_related('images')
+        paginator = TreeLogCursorPagination()
+        # No view: this view's OrderingFilter and ?ordering= are for trees, the timeline order is fixed
+        page = paginator.paginate_queryset(logs, request)
+        return paginator.get_paginated_response(TreeLogSerializer(page, many=True, context={'request': request}).data)
+
+    @action(detail=True, methods=['get'])
+    def environment(self, request, pk=None):
+        """
+        ค่าสภาพแวดล้อมย้อนหลังสำหรับกราฟ: ?bucket=1h|1d|1w|raw&from=&to=&points=
+        (ไม่ระบุ bucket = เลือกช่วงที่ละเอียดที่สุดที่ไม่เกิน points จุด)
+        """
+        params = request.query_params
+        bucket = params.get('bucket') or None
+        if bucket is not None and bucket != 'raw' and bucket not in BUCKETS:
+            return Response(
+                {'error': f'bucket ต้องเป็นหนึ่งใน {", ".join([*BUCKETS, "raw"])}'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            points = int(params.get('points', DEFAULT_POINTS))
+        except ValueError:
+            return Response({'error': 'points ต้องเป็นตัวเลข'}, status=status.HTTP_400_BAD_REQUEST)
+        points = max(10, min(points, MAX_POINTS))
+        try:
+            start = parse_moment(params['from']) if params.get('from') else None
+            end = parse_moment(params['to']) if params.get('to') else None
+        except ValueError:
+            return Response(
+                {'error': 'from/to ต้องเป็นวันที่หรือเวลาแบบ ISO 8601'}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if start and end and start >= end:
+            return Response({'error': 'from ต้องมาก่อน to'}, status=status.HTTP_400_BAD_REQUEST)
+
+        tree = get_object_or_404(Tree.objects.only('pk', 'location'), pk=pk)
+        return Response({'tree': tree.pk, **environment_history(tree, bucket, start, end, points)})
 
     @action(detail=True, methods=['delete'])
     def delete_document(self, request, pk=None):
@@ -53,36 +209,452 @@ class TreeViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['post'])
     def bulk_delete(self, request):
-        """ลบต้นไม้หลายรายการพร้อมกัน"""
-        ids = request.data.get('ids', [])
+        """ลบต้นไม้หลายรายการพร้อมกัน: {"ids": [id, ...]}"""
+        ids = request.data.get('ids')
         if not ids:
             return Response({'error': 'No IDs provided'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        try:
-            # ใช้ loop delete เพื่อให้ logic การลบไฟล์ (override delete method) ทำงาน
-            trees = Tree.objects.filter(id__in=ids)
-            count = trees.count()
-            for tree in trees:
-                tree.delete()
-            
-            return Response({'message': f'ลบข้อมูลสำเร็จ {count} รายการ'}, status=status.HTTP_200_OK)
-        except Exception as e:
-            return Response({'error': f'เกิดข้อผิดพลาด: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        if not isinstance(ids, list) or not all(isinstance(pk, (int, str)) and str(pk).isdigit() for pk in ids):
+            return Response({'error': 'ids ต้องเป็นรายการรหัสต้นไม้ (ตัวเลข)'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # ลบข้อมูลทั้งหมดในทรานแซกชันเดียว ส่วนไฟล์จะถูกลบเบื้องหลัง (ติดตามได้ที่ /api/deletion-jobs/<id>/)
+        job = Tree.bulk_delete([int(pk) for pk in ids])
+        if job is None:
+            return Response({'error': 'ไม่พบต้นไม้ที่ต้องการลบ'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({
+            'message': f'ลบข้อมูลสำเร็จ {job.trees_deleted} รายการ',
+            'job': DeletionJobSerializer(job).data,
+        }, status=status.HTTP_202_ACCEPTED)
 
-class ImageViewSet(viewsets.ModelViewSet):
+class ImageViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Image.objects.all()
     serializer_class = ImageSerializer
+    cache_models = (Image,)
 
-class StrainViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=['get'], url_path=r'renditions/(?P<width>\d+)\.(?P<fmt>[a-z]+)', url_name='rendition')
+    def rendition(self, request, pk=None, width=None, fmt=None):
+        """Redirect to a resized copy, rendering it on first request if the worker hasn't yet"""
+        width = int(width)
+        widths, formats = Image.rendition_config()
+        if width not in widths or fmt not in formats:
+            return Response({'error': 'ไม่รองรับขนาดหรือรูปแบบภาพนี้'}, status=status.HTTP_404_NOT_FOUND)
+
+        image = self.get_object()
+        name = None
+        if image.width is None or width < image.width:
+            try:
+                name = image.ensure_rendition(width, fmt)
+            except OSError:
+                return Response({'error': 'ไม่สามารถอ่านไฟล์ภาพต้นฉบับ'}, status=status.HTTP_404_NOT_FOUND)
+        # Source is not wider than the requested size: the original is the best we have
+        return HttpResponseRedirect(image.image.storage.url(name) if name else image.image.url)
+
+class DeletionJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """ความคืบหน้าการลบไฟล์เบื้องหลังจาก bulk_delete"""
+    queryset = DeletionJob.objects.all().order_by('-id')
+    serializer_class = DeletionJobSerializer
+
+class StrainViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Strain.objects.all().order_by('name')
     serializer_class = StrainSerializer
+    cache_models = (Strain,)
 
-class BatchViewSet(viewsets.ModelViewSet):
+class BatchViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Batch.objects.all().order_by('-started_date')
     serializer_class = BatchSerializer
+    cache_models = (Batch,)
 
-class TreeLogViewSet(viewsets.ModelViewSet):
+class TreeLogViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """API for Journal/Timeline entries"""
-    queryset = TreeLog.objects.all().order_by('-action_date', '-created_at')
+    queryset = TreeLog.objects.prefetch_related('images').order_by(*TreeLog.TIMELINE_ORDERING)
     serializer_class = TreeLogSerializer
+    pagination_class = TreeLogCursorPagination
     filterset_fields = ['tree', 'action_type']
+    cache_models = (TreeLog, Image)
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        บันทึกกิจกรรมเดียวกันให้ต้นไม้หลายต้นในครั้งเดียว (เช่น ให้ปุ๋ยทั้งห้อง)
+        เลือกต้นไม้ด้วย trees, batch_id หรือ filter และแนบรูป (image) ร่วมกันได้หนึ่งรูป
+        """
+        serializer = BulkTreeLogSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        values = dict(serializer.validated_data)
+        tree_ids, image = values.pop('tree_ids'), values.pop('image', None)
+        logs, images = TreeLog.bulk_record(tree_ids, values, image=image)
+        return Response({
+            'message': f'บันทึกสำเร็จ {len(logs)} รายการ',
+            'count': len(logs),
+            'logs': [log.pk for log in logs],
+            'trees': tree_ids,
+            'images': [image.pk for image in images],
+        }, status=status.HTTP_201_CREATED)
+
+
+class SearchViewSet(viewsets.ViewSet):
+    """ค้นหาข้อความในต้นไม้และบันทึก: /api/search/?q=<คำค้น>&type=tree|log&limit=20"""
+    default_limit = 20
+    max_limit = 100
+
+    def list(self, request):
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            return Response({'error': 'กรุณาระบุคำค้นหา (q)'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            return Response({'error': 'limit ต้องเป็นตัวเลข'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, self.max_limit))
+        kind = request.query_params.get('type')
+
+        data = {'query': text, 'trees': [], 'logs': []}
+        if kind in (None, '', 'tree'):
+            trees = search_trees(Tree.objects.select_related('strain'), text)[:limit]
+            data['trees'] = TreeSearchResultSerializer(trees, many=True).data
+        if kind in (None, '', 'log'):
+            logs = search_logs(TreeLog.objects.select_related('tree'), text)[:limit]
+            data['logs'] = TreeLogSearchResultSerializer(logs, many=True).data
+        return Response(data)
+
+
+class StatsViewSet(ConditionalGetMixin, viewsets.ViewSet):
+    """สรุปภาพรวมสำหรับแดชบอร์ด (คำนวณในฐานข้อมูลและแคชไว้): /api/stats/"""
+    cache_models = STATS_MODELS
+
+    def list(self, request):
+        return Response(get_stats(self.versions))
+
+
+class PedigreeViewSet(viewsets.ViewSet):
+    """ค่าสัมประสิทธิ์เลือดชิด (inbreeding) และความสัมพันธ์ทางพันธุกรรม (kinship) จากผังสายพันธุ์"""
+    max_trees = 2000
+
+    def _tree_ids(self, values):
+        """Validate a list of tree IDs; returns (ids, error Response)"""
+        try:
+            ids = [int(value) for value in values]
+        except (TypeError, ValueError):
+            return None, Response({'error': 'รหัสต้นไม้ต้องเป็นตัวเลข'}, status=status.HTTP_400_BAD_REQUEST)
+        if not ids:
+            return None, Response({'error': 'กรุณาระบุต้นไม้อย่างน้อย 1 ต้น'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(set(ids)) > self.max_trees:
+            return None, Response(
+                {'error': f'ระบุต้นไม้ได้ไม่เกิน {self.max_trees} ต้นต่อครั้ง'}, status=status.HTTP_400_BAD_REQUEST
+            )
+        missing = set(ids) - set(Tree.objects.filter(pk__in=ids).values_list('pk', flat=True))
+        if missing:
+            return None, Response(
+                {'error': f'ไม่พบต้นไม้รหัส {sorted(missing)}'}, status=status.HTTP_404_NOT_FOUND
+            )
+        return ids, None
+
+    def _pedigree(self, ids):
+        try:
+            return get_pedigree(ids), None
+        except PedigreeCycleError:
+            return None, Response(
+                {'error': 'ผังสายพันธุ์มีการอ้างอิงวนกลับ (ต้นไม้เป็นบรรพบุรุษของตัวเอง)'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+    @action(detail=False, methods=['post'])
+    def kinship(self, request):
+        """{"trees": [id, ...]} -> inbreeding ของแต่ละต้น และเมทริกซ์ kinship ระหว่างกัน"""
+        ids, error = self._tree_ids(request.data.get('trees') or [])
+        if error:
+            return error
+        pedigree, error = self._pedigree(ids)
+        if error:
+            return error
+        return Response({
+            'trees': ids,
+            'inbreeding': pedigree.inbreeding(ids).round(6).tolist(),
+            'kinship': pedigree.kinship(ids).round(6).tolist(),
+        })
+
+    @action(detail=False, methods=['post'])
+    def crosses(self, request):
+        """{"crosses": [[male, female], ...]} -> ค่า inbreeding ที่คาดว่าลูกจะได้"""
+        crosses = request.data.get('crosses') or []
+        if not all(isinstance(pair, (list, tuple)) and len(pair) == 2 for pair in crosses):
+            return Response({'error': 'crosses ต้องเป็นรายการคู่ [ตัวผู้, ตัวเมีย]'}, status=status.HTTP_400_BAD_REQUEST)
+        ids, error = self._tree_ids([pk for pair in crosses for pk in pair])
+        if error:
+            return error
+        pairs = list(zip(ids[::2], ids[1::2]))
+        pedigree, error = self._pedigree(ids)
+        if error:
+            return error
+        return Response({'crosses': [
+            {'male': male, 'female': female, 'offspring_inbreeding': round(float(value), 6)}
+            for (male, female), value in zip(pairs, pedigree.cross_inbreeding(pairs))
+        ]})
+
+
+class ImportViewSet(viewsets.ViewSet):
+    """
+    นำเข้าข้อมูลจากไฟล์ template (.xlsx หรือ .csv): POST /api/import/ แบบ multipart
+    `file` (ส่งได้หลายไฟล์), `sheet` (ไม่บังคับ) และ `dry_run` เพื่อตรวจสอบโดยไม่บันทึก
+    """
+
+    def create(self, request):
+        files = request.FILES.getlist('file')
+        if not files:
+            return Response({'error': 'กรุณาแนบไฟล์ .xlsx หรือ .csv'}, status=status.HTTP_400_BAD_REQUEST)
+        sheet = request.data.get('sheet') or None
+        if sheet is not None and sheet not in SHEETS:
+            return Response(
+                {'error': f'sheet ต้องเป็นหนึ่งใน {", ".join(SHEETS)}'}, status=status.HTTP_400_BAD_REQUEST
+            )
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+
+        sources = {}
+        for upload in files:
+            try:
+                found = read_spreadsheet(upload, upload.name, sheet)
+            except SpreadsheetError as e:
+                return Response({'error': f'{upload.name}: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+            if set(found) & set(sources):
+                return Response(
+                    {'error': f'{upload.name}: ชีต {", ".join(sorted(set(found) & set(sources)))} ซ้ำกับไฟล์อื่น'},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            sources.update(found)
+
+        try:
+            report = Importer(dry_run=dry_run).run(sources)
+        except SpreadsheetError as e:
+            # Raised mid-stream by a corrupt worksheet; the transaction has rolled back
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED)
+
+
+class ExportViewSet(viewsets.ViewSet):
+    """
+    ส่งออกข้อมูลตามรูปแบบ template แบบสตรีม (ไม่โหลดทั้งหมดเข้าหน่วยความจำ):
+    /api/export/xlsx/?sheets=Trees,TreeLogs (ไม่ระบุ = ทุกชีต) และ /api/export/csv/<sheet>/
+    """
+
+    @staticmethod
+    def _sheet(name):
+        """'Trees', 'trees' or 'tree_logs' -> template sheet name (None if unknown)"""
+        return name if name in SHEETS else CSV_SHEETS.get(name.lower())
+
+    @staticmethod
+    def _filename(label, extension):
+        return f'mytree-{label}-{timezone.localdate():%Y%m%d}.{extension}'
+
+    @action(detail=False, methods=['get'])
+    def xlsx(self, request):
+        names = [name.strip() for name in request.query_params.get('sheets', '').split(',') if name.strip()]
+        sheets = [self._sheet(name) for name in names] or list(SHEETS)
+        if None in sheets:
+            return Response(
+                {'error': f'sheets ต้องเป็นหนึ่งใน {", ".join(SHEETS)}'}, status=status.HTTP_400_BAD_REQUEST
+            )
+        response = StreamingHttpResponse(
+            stream_xlsx(list(dict.fromkeys(sheets))),
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        )
+        response['Content-Disposition'] = f'attachment; filename="{self._filename("export", "xlsx")}"'
+        return response
+
+    @action(detail=False, methods=['get'], url_path=r'csv/(?P<sheet>[A-Za-z_]+)')
+    def csv(self, request, sheet=None):
+        name = self._sheet(sheet)
+        if name is None:
+            return Response({'error': f'ไม่พบชีต "{sheet}"'}, status=status.HTTP_404_NOT_FOUND)
+        response = StreamingHttpResponse(stream_csv(name), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{self._filename(name.lower(), "csv")}"'
+        return response
+
+
+class SensorReadingViewSet(viewsets.ViewSet):
+    """
+    รับค่าจากเซ็นเซอร์ครั้งละหลายพันรายการ: POST /api/readings/ ด้วย JSON array
+    หรือ {"tree": ..., "location": ..., "readings": [...]} (tree/location ด้านนอกใช้กับทุกรายการ)
+    แต่ละรายการมี recorded_at และ ph, ec, temp, humidity อย่างน้อยหนึ่งค่า
+    """
+
+    def create(self, request):
+        data = request.data
+        defaults = {}
+        if isinstance(data, dict):
+            defaults = {key: data[key] for key in ('tree', 'location') if key in data}
+            data = data.get('readings')
+        if not isinstance(data, list) or not data:
+            return Response(
+                {'error': 'ต้องส่ง readings เป็นรายการอย่างน้อยหนึ่งค่า'}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(data) > max_readings():
+            return Response(
+                {'error': f'ส่งได้ไม่เกิน {max_readings()} รายการต่อครั้ง'}, status=status.HTTP_400_BAD_REQUEST
+            )
+        report = ingest_readings(data, defaults)
+        if not report['created'] and not report['duplicates']:
+            return Response(report, status=status.HTTP_400_BAD_REQUEST)
+        if not report['created']:
+            # A retry of a batch that was already stored
+            return Response(report, status=status.HTTP_200_OK)
+        return Response(report, status=status.HTTP_201_CREATED)
+
+
+class UploadViewSet(viewsets.ViewSet):
+    """
+    อัปโหลดรูปภาพหรือเอกสารแบบต่อได้ (ดู trees.uploads)
+    POST เริ่ม, PUT ส่งทีละส่วนพร้อม Upload-Offset, GET/HEAD ถามจำนวนไบต์ที่ได้รับ,
+    POST finalize/ สร้างรูปภาพหรือแนบเอกสาร, DELETE ยกเลิก
+    """
+    lookup_value_regex = r'[0-9a-f-]{36}'
+
+    @staticmethod
+    def _respond(upload, status_code=status.HTTP_200_OK):
+        response = Response(UploadSerializer(upload).data, status=status_code)
+        response['Upload-Offset'] = str(upload.offset)
+        return response
+
+    @staticmethod
+    def _error(e):
+        return Response({'error': str(e)}, status=e.status)
+
+    def create(self, request):
+        serializer = UploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            upload = start_upload(**serializer.validated_data)
+        except UploadError as e:
+            return self._error(e)
+        return self._respond(upload, status.HTTP_201_CREATED)
+
+    def retrieve(self, request, pk=None):
+        upload = get_object_or_404(Upload, pk=pk)
+        response = self._respond(upload)
+        response['Cache-Control'] = 'no-store'
+        return response
+
+    def update(self, request, pk=None):
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.headers['Content-Length'])
+        except (KeyError, ValueError):
+            return Response(
+                {'error': 'ต้องส่ง Upload-Offset และ Content-Length เป็นตัวเลข'}, status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            # Read from the request stream directly: request.data would buffer the chunk first
+            upload = append_chunk(pk, offset, request.stream, length)
+        except UploadError as e:
+            return self._error(e)
+        return self._respond(upload)
+
+    @action(detail=True, methods=['post'])
+    def finalize(self, request, pk=None):
+        try:
+            upload, result = finalize_upload(pk)
+        except UploadError as e:
+            return self._error(e)
+        context = {'request': request}
+        if upload.kind == 'image':
+            return Response(ImageSerializer(result, context=context).data, status=status.HTTP_201_CREATED)
+        return Response(TreeSerializer(result, context=context).data)
+
+    def destroy(self, request, pk=None):
+        try:
+            abort_upload(pk)
+        except UploadError as e:
+            return self._error(e)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class SyncViewSet(ConditionalGetMixin, viewsets.ViewSet):
+    """
+    ซิงก์ข้อมูลแบบส่วนต่างสำหรับการใช้งานออฟไลน์ (ดู trees.sync)
+    GET /api/sync/?since=<token>: รายการที่สร้าง/แก้ไข/ลบหลัง token (ไม่ระบุ = ข้อมูลทั้งหมด)
+    POST /api/sync/ ด้วย {"strains": [...], "batches": [...], "trees": [...], "logs": [...]}: บันทึกการแก้ไขที่ค้างไว้
+    """
+    cache_models = (Strain, Batch, Image, Tree, TreeLog)
+    conditional_actions = ('list',)
+
+    def list(self, request):
+        since = None
+        token = request.query_params.get('since')
+        if token:
+            try:
+                since = parse_token(token)
+            except ValueError:
+                return Response(
+                    {'error': 'since ไม่ถูกต้อง (ใช้ token จากการซิงก์ครั้งก่อน)'}, status=status.HTTP_400_BAD_REQUEST
+                )
+        return Response(changes_since(since, {'request': request}))
+
+    def create(self, request):
+        data = request.data
+        if not isinstance(data, dict) or not any(kind in data for kind in UPSERT_TYPES):
+            return Response(
+                {'error': f'ต้องส่งรายการอย่างน้อยหนึ่งประเภท ({", ".join(UPSERT_TYPES)})'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        rows = {kind: data.get(kind) or [] for kind in UPSERT_TYPES}
+        if not all(isinstance(items, list) for items in rows.values()):
+            return Response({'error': 'แต่ละประเภทต้องเป็นรายการ (array)'}, status=status.HTTP_400_BAD_REQUEST)
+        if sum(len(items) for items in rows.values()) > max_upserts():
+            return Response(
+                {'error': f'ส่งได้ไม่เกิน {max_upserts()} รายการต่อครั้ง'}, status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(apply_upserts(rows, {'request': request}))
+
+
+LIVE_EVENT_TYPES = ('tree', 'log', 'image')
+
+
+def _sse(event, data):
+    return f'event: {event}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'
+
+
+async def live_events(request):
+    """
+    สตรีมการเปลี่ยนแปลงแบบ Server-Sent Events: GET /api/events/?types=tree,log,image&tree=<id>
+    เริ่มด้วย event "ready" (มี token สำหรับ /api/sync/) แล้วส่ง event ตามชนิดข้อมูล
+    {"action": "saved" | "deleted", "ids": [...], "trees": [...]} และ "reset" เมื่อควรโหลดข้อมูลใหม่ทั้งหมด
+    ต้องรันผ่าน ASGI เช่น `uvicorn mytree_journal.asgi:application`
+    """
+    if not isinstance(request, ASGIRequest):
+        # WSGI would buffer the endless stream instead of sending it
+        return JsonResponse(
+            {'error': 'ต้องรันเซิร์ฟเวอร์แบบ ASGI (เช่น uvicorn mytree_journal.asgi:application)'}, status=501
+        )
+    types = [name for name in request.GET.get('types', ','.join(LIVE_EVENT_TYPES)).split(',') if name]
+    if not types or any(name not in LIVE_EVENT_TYPES for name in types):
+        return JsonResponse({'error': f'types ต้องเป็น {", ".join(LIVE_EVENT_TYPES)}'}, status=400)
+    tree = request.GET.get('tree')
+    if tree is not None:
+        try:
+            tree = int(tree)
+        except ValueError:
+            return JsonResponse({'error': 'tree ต้องเป็นตัวเลข'}, status=400)
+
+    async def stream():
+        subscriber = hub.subscribe(asyncio.get_running_loop())
+        try:
+            yield 'retry: 5000\n\n'
+            yield _sse('ready', {'token': current_token()})
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), keepalive_seconds())
+                except asyncio.TimeoutError:
+                    # Keeps proxies from closing an idle connection
+                    yield ': keep-alive\n\n'
+                    continue
+                if event['type'] == 'reset':
+                    yield _sse('reset', {})
+                elif event['type'] in types and (tree is None or tree in event['trees']):
+                    yield _sse(event['type'], {key: event[key] for key in ('action', 'ids', 'trees')})
+        finally:
+            hub.unsubscribe(subscriber)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Tell nginx not to buffer the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response